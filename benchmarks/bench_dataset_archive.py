@@ -0,0 +1,77 @@
+"""Time cold imports of the generated modules from folders and from a dataset archive.
+
+The dataset is written as the metamath2py folders (importing them the first
+time also writes ``__pycache__``), as a zip archive of sources and as a zip
+archive with bytecode. Each layout is imported in a fresh interpreter: the
+proof importing the most classes, then every proof.
+
+    python benchmarks/bench_dataset_archive.py metamath2py.jsonl [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench_substitution_templates import write_package  # noqa: E402
+from build_dataset_of_python_files import DatasetArchive, read_dataset  # noqa: E402
+
+IMPORT_PROOFS = '''
+import importlib, json, sys, time
+sys.path.insert(0, sys.argv[1])
+names = sys.stdin.read().split()
+started = time.perf_counter()
+importlib.import_module(f'metamath2py.proofs.{names[0]}')
+largest = time.perf_counter()
+for name in names[1:]:
+    importlib.import_module(f'metamath2py.proofs.{name}')
+print(json.dumps({'largest': largest - started, 'all': time.perf_counter() - started}))
+'''
+
+
+def import_proofs(path: Path, names) -> dict:
+    completed = subprocess.run([sys.executable, '-c', IMPORT_PROOFS, str(path)], input=' '.join(names),
+                               cwd=path.parent, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(completed.stderr)
+    return json.loads(completed.stdout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dataset', help='JSON Lines dataset built by build_jsonl_dataset.py')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    models = list(read_dataset(args.dataset))
+    # the proof with the most imports first
+    models.sort(key=lambda model: -model['executable_proof'].count('\nfrom metamath2py.classes.'))
+    names = [model['name'] for model in models]
+    with tempfile.TemporaryDirectory() as folder:
+        layouts = {'folders': Path(folder) / 'folders',
+                   'archive': Path(folder) / 'sources.zip',
+                   'archive + bytecode': Path(folder) / 'bytecode.zip'}
+        write_package(layouts['folders'], models)
+        for label, bytecode in (('archive', False), ('archive + bytecode', True)):
+            with DatasetArchive(str(layouts[label]), bytecode=bytecode) as archive:
+                for model in models:
+                    archive.write_statement(model['name'], model['executable_class'], model['executable_proof'])
+
+        timings = {}
+        timings['folders, no __pycache__'] = import_proofs(layouts['folders'], names)
+        for label, path in layouts.items():
+            runs = [import_proofs(path, names) for _ in range(args.repeat)]
+            timings[label] = {key: min(run[key] for run in runs) for key in ('largest', 'all')}
+        sizes = {label: os.path.getsize(path) for label, path in layouts.items() if path.is_file()}
+
+    print(f"{len(names)} proofs, the largest imports "
+          f"{models[0]['executable_proof'].count(chr(10) + 'from metamath2py.classes.')} classes, best of {args.repeat}")
+    for label, timing in timings.items():
+        print(f"{label:>24}: largest proof {timing['largest'] * 1e3:8.1f} ms, all proofs {timing['all']:6.2f} s")
+    for label, size in sizes.items():
+        print(f'{label:>24}: {size / 2 ** 20:.1f} MiB in one file')
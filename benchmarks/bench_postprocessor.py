@@ -0,0 +1,64 @@
+"""Micro-benchmark of replace_class_variables on the example classes and proofs.
+
+Compares the single-pass replacer with the former implementation, which read
+class_variables.csv with pandas and applied it row by row on every call
+(skipped when pandas is not installed).
+
+    python benchmarks/bench_postprocessor.py [--repeat 20]
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from code_builders.postprocessor import load_class_variables, replace_class_variables  # noqa: E402
+from paths import class_variables_path  # noqa: E402
+
+
+def pandas_replace_class_variables(text: str):
+    import pandas as pd
+
+    replaces = pd.read_csv(class_variables_path, sep=' ')
+    for _, row in replaces.iterrows():
+        text = text.replace(row['token'], row['replacement'])
+    return text
+
+
+def example_texts():
+    texts = []
+    for folder in ('classes', 'proofs'):
+        for path in sorted((ROOT / 'examples' / folder).glob('*.py')):
+            texts.append(path.read_text())
+    # a class of set.mm using the class variables
+    texts.append('class X:\n    def __init__(self):\n        self.assertion = r"""|- ( ( A .X. B ) .<_ C -> '
+                 '( .0. .+ A ) ./\\ ( B .x. .1. ) )"""\n')
+    return texts
+
+
+def measure(function, texts, repeat: int) -> float:
+    return min(timeit.repeat(lambda: [function(text) for text in texts], number=1, repeat=repeat)) / len(texts)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    texts = example_texts()
+    row_by_row = load_class_variables().replace_row_by_row
+    results = {'single pass': measure(replace_class_variables, texts, args.repeat),
+               'row by row, table loaded once': measure(row_by_row, texts, args.repeat)}
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print('pandas is not installed, skipping the former implementation')
+    else:
+        assert all(pandas_replace_class_variables(text) == replace_class_variables(text) for text in texts)
+        results['pandas, table read per call'] = measure(pandas_replace_class_variables, texts, max(1, args.repeat // 10))
+
+    print(f'{len(texts)} texts, {sum(map(len, texts)) // len(texts)} characters on average')
+    for name, seconds in results.items():
+        print(f'{name:>32}: {seconds * 1e6:10.1f} us per text')
@@ -0,0 +1,67 @@
+"""Time verification.py on the proofs of a database generated for each ProofTarget.
+
+The database is translated once per target and written as a metamath2py
+package. Every proof of a package is then verified with ``verification`` in a
+fresh interpreter: once to write the bytecode, then ``--repeat`` times.
+
+    python benchmarks/bench_proof_targets.py set.mm [--jobs 4] [--repeat 3]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench_substitution_templates import write_package  # noqa: E402
+from code_builders.class_builder import ProofTarget  # noqa: E402
+from translation_pipeline import assertion_names, load_database, translate_parsed  # noqa: E402
+
+VERIFY_PROOFS = '''
+import json, sys, time
+import verification
+proofs_root = sys.argv[1] + '/metamath2py/proofs'
+verification._DEFAULT_CLASSES_ROOT = sys.argv[1] + '/metamath2py/classes'
+names = sys.stdin.read().split()
+started = time.perf_counter()
+results = [verification._verify_proof_at(name, package='metamath2py.proofs', search_root=proofs_root)
+           for name in names]
+print(json.dumps({'seconds': time.perf_counter() - started,
+                  'failed': sorted(result.statement_name for result in results if not result.success)}))
+'''
+
+
+def verify_package(root: Path, names) -> dict:
+    completed = subprocess.run([sys.executable, '-c', VERIFY_PROOFS, str(root)], input=' '.join(names),
+                               cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(completed.stderr)
+    return json.loads(completed.stdout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database', help='Path of the .mm file')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes used for the translations.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    mm = load_database(args.database)
+    names = assertion_names(mm)
+    timings = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for target in ProofTarget:
+            results = list(translate_parsed(mm, names, jobs=args.jobs, target=target))
+            root = Path(folder) / target.value
+            write_package(root, results)
+            module_names = [result['name'] for result in results]
+            verify_package(root, module_names)  # compiles the modules, the timed runs load the bytecode
+            runs = [verify_package(root, module_names) for _ in range(args.repeat)]
+            timings[target] = (min(run['seconds'] for run in runs), runs[0]['failed'])
+
+    print(f'{len(names)} statements, best of {args.repeat}')
+    for target, (seconds, failed) in timings.items():
+        print(f'{target:>8}: {seconds:.2f}s, {len(failed)} failed {" ".join(failed[:5])}')
@@ -0,0 +1,100 @@
+"""Time the proofs of a database with and without precompiled substitution templates.
+
+Every statement is translated and written as a metamath2py package twice: with
+the classes as ClassBuilder generates them, and with their ``call`` rewritten to
+the former ``apply_substitution`` on the statement strings. Each package is
+imported and all of its proofs are run in a fresh interpreter, once to write the
+bytecode and then ``--repeat`` times.
+
+    python benchmarks/bench_substitution_templates.py set.mm [--jobs 4] [--repeat 3]
+"""
+import argparse
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from translation_pipeline import assertion_names, load_database, translate_parsed  # noqa: E402
+
+HELPER = ROOT / 'tools' / 'apply_substitution_for_generated_files.py'
+
+_TEMPLATE_DEFINITION = re.compile(r'^    _\w+_template = StatementTemplate\(r""".*"""\, \w+\.__annotations__\)\n\n?',
+                                  re.MULTILINE)
+_TEMPLATE_CALL = re.compile(r'self\._(\w+)_template\.substitute\(floatings\)')
+
+RUN_PROOFS = '''
+import importlib, json, sys, time
+names = sys.stdin.read().split()
+started = time.perf_counter()
+modules = [importlib.import_module(f'metamath2py.proofs.{name}') for name in names]
+imported = time.perf_counter()
+failures = 0
+for name, module in zip(names, modules):
+    try:
+        getattr(module, f'{name}_proof')().proof()
+    except Exception:
+        failures += 1
+print(json.dumps({'import': imported - started, 'proofs': time.perf_counter() - imported, 'failures': failures}))
+'''
+
+
+def former_class(executable_class: str) -> str:
+    """Return the class as it was generated before the substitution templates."""
+    executable_class = executable_class.replace('import StatementTemplate', 'import apply_substitution')
+    executable_class = _TEMPLATE_DEFINITION.sub('', executable_class)
+    return _TEMPLATE_CALL.sub(r'apply_substitution(self.\1, floatings)', executable_class)
+
+
+def write_package(root: Path, results, rewrite_class=None) -> None:
+    for folder in ('classes', 'proofs'):
+        (root / 'metamath2py' / folder).mkdir(parents=True)
+        (root / 'metamath2py' / folder / '__init__.py').touch()
+    (root / 'metamath2py' / '__init__.py').touch()
+    shutil.copy2(HELPER, root / 'metamath2py' / 'classes')
+    for result in results:
+        executable_class = result['executable_class']
+        if rewrite_class is not None:
+            executable_class = rewrite_class(executable_class)
+        (root / 'metamath2py' / 'classes' / f"{result['name']}.py").write_text(executable_class)
+        (root / 'metamath2py' / 'proofs' / f"{result['name']}.py").write_text(result['executable_proof'])
+
+
+def run_proofs(root: Path, names) -> dict:
+    completed = subprocess.run([sys.executable, '-c', RUN_PROOFS], input=' '.join(names),
+                               cwd=root, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(completed.stderr)
+    return json.loads(completed.stdout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database', help='Path of the .mm file')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes used for the translation.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    mm = load_database(args.database)
+    results = list(translate_parsed(mm, assertion_names(mm), jobs=args.jobs))
+    names = [result['name'] for result in results]
+    with tempfile.TemporaryDirectory() as folder:
+        packages = {'apply_substitution': Path(folder) / 'former', 'templates': Path(folder) / 'templates'}
+        write_package(packages['apply_substitution'], results, former_class)
+        write_package(packages['templates'], results)
+        timings = {}
+        for label, root in packages.items():
+            run_proofs(root, names)  # compiles the modules, the timed runs load the bytecode
+            runs = [run_proofs(root, names) for _ in range(args.repeat)]
+            timings[label] = {phase: min(run[phase] for run in runs) for phase in ('import', 'proofs')}
+            timings[label]['failures'] = runs[0]['failures']
+
+    print(f'{len(names)} statements, best of {args.repeat}')
+    for label, timing in timings.items():
+        print(f"{label:>20}: import {timing['import']:.2f}s, proofs {timing['proofs']:.2f}s, "
+              f"{timing['failures']} failed")
@@ -1,8 +1,18 @@
+import argparse
+import importlib.util
 import json
+import marshal
 import os
 import shutil
+import zipfile
 
-from paths import classes_folder_path, proofs_folder_path, mmverify_output_folder
+from paths import PROJECT_PATH, PathsEnum, classes_folder_path, proofs_folder_path, mmverify_output_folder
+
+apply_substitution_path = os.path.join(PROJECT_PATH, 'tools', 'apply_substitution_for_generated_files.py')
+
+# fixed timestamps keep the archive of the same dataset byte-identical
+_ARCHIVE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_UNCHECKED_HASH_PYC = 0b01  # PEP 552 flags: the bytecode is used without reading the source
 
 
 def write_to_files(name, executable_class, executable_proof):
@@ -15,7 +25,68 @@ def write_to_files(name, executable_class, executable_proof):
         f.write(executable_proof)
 
 
-if __name__ == '__main__':
+class DatasetArchive:
+    """Writes the classes and proofs into one zip archive instead of two files per theorem.
+
+    The archive holds the ``metamath2py.classes`` and ``metamath2py.proofs``
+    packages, so with the archive on ``sys.path`` they are imported by zipimport
+    under the usual names. With ``bytecode`` every module is also stored as an
+    unchecked hash-based ``.pyc``, so importing it is a read from the archive
+    without compiling it.
+    """
+
+    def __init__(self, path: str, bytecode: bool = False) -> None:
+        self.path = path
+        self.bytecode = bytecode
+        self._tmp_path = f'{path}.{os.getpid()}.tmp'
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.write_module(f'{PathsEnum.metamath2py_folder_name}/__init__.py', '')
+        for folder in (PathsEnum.classes_folder_name, PathsEnum.proofs_folder_name):
+            self.write_module(f'{PathsEnum.metamath2py_folder_name}/{folder}/__init__.py', '')
+        with open(apply_substitution_path) as f:
+            self.write_module(f'{PathsEnum.metamath2py_folder_name}/{PathsEnum.classes_folder_name}/'
+                              f'apply_substitution_for_generated_files.py', f.read())
+
+    def write_module(self, module_path: str, source: str) -> None:
+        self._zip.writestr(zipfile.ZipInfo(module_path, _ARCHIVE_DATE_TIME), source)
+        if self.bytecode:
+            source_bytes = source.encode('utf-8')
+            code = compile(source_bytes, os.path.join(os.path.abspath(self.path), module_path), 'exec',
+                           dont_inherit=True)
+            pyc = bytearray(importlib.util.MAGIC_NUMBER)
+            pyc.extend(_UNCHECKED_HASH_PYC.to_bytes(4, 'little'))
+            pyc.extend(importlib.util.source_hash(source_bytes))
+            pyc.extend(marshal.dumps(code))
+            self._zip.writestr(zipfile.ZipInfo(module_path + 'c', _ARCHIVE_DATE_TIME), bytes(pyc))
+
+    def write_statement(self, name, executable_class, executable_proof) -> None:
+        self.write_module(f'{PathsEnum.metamath2py_folder_name}/{PathsEnum.classes_folder_name}/{name}.py',
+                          executable_class)
+        self.write_module(f'{PathsEnum.metamath2py_folder_name}/{PathsEnum.proofs_folder_name}/{name}.py',
+                          executable_proof)
+
+    def close(self) -> None:
+        self._zip.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> 'DatasetArchive':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+            os.remove(self._tmp_path)
+
+
+def read_dataset(dataset_path: str):
+    with open(dataset_path, "r") as f:
+        for line in f:
+            yield json.loads(line.rstrip())
+
+
+def write_folders(dataset_path: str) -> None:
     if not os.path.exists(mmverify_output_folder):
         os.mkdir(mmverify_output_folder)
 
@@ -25,14 +96,30 @@ if __name__ == '__main__':
         os.mkdir(proofs_folder_path)
 
 
-    shutil.copy2('apply_substitution_for_generated_files.py', classes_folder_path)
+    shutil.copy2(apply_substitution_path, classes_folder_path)
     shutil.copy2('__init__.py', classes_folder_path)
     shutil.copy2('__init__.py', proofs_folder_path)
 
-    with open('metamath2py.jsonl', "r") as f:
-        for line in f:
-            model = json.loads(line.rstrip())
-            executable_class = model['executable_class']
-            executable_proof = model['executable_proof']
-            name = model['name']
-            write_to_files(name, executable_class, executable_proof)
\ No newline at end of file
+    for model in read_dataset(dataset_path):
+        executable_class = model['executable_class']
+        executable_proof = model['executable_proof']
+        name = model['name']
+        write_to_files(name, executable_class, executable_proof)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write the classes and proofs of metamath2py.jsonl as Python modules")
+    parser.add_argument("--dataset", default='metamath2py.jsonl', help="JSON Lines dataset built by build_jsonl_dataset.py")
+    parser.add_argument("--archive", default=None,
+                        help="Write every module into this zip archive instead of the metamath2py folders; put the "
+                             "archive on sys.path to import metamath2py.classes.* and metamath2py.proofs.* from it.")
+    parser.add_argument("--bytecode", action="store_true",
+                        help="Also store the compiled bytecode of every module in the archive.")
+    args = parser.parse_args()
+
+    if args.archive:
+        with DatasetArchive(args.archive, bytecode=args.bytecode) as archive:
+            for model in read_dataset(args.dataset):
+                archive.write_statement(model['name'], model['executable_class'], model['executable_proof'])
+    else:
+        write_folders(args.dataset)
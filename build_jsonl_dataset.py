@@ -1,25 +1,98 @@
+import argparse
 import json
+import logging
+import os
 import sys
+from contextlib import nullcontext
 
 from metamath_adapter import MetamathHandler
-from mm import MM
-from models.toks import Toks
+from models.instrumentation import PhaseProfiler, profiling
 from paths import metamath_path
+from code_builders.class_builder import ProofTarget
+from translation_manifest import load_manifest
+from translation_pipeline import translate_database, translate_incrementally
+
+logger = logging.getLogger('build_jsonl_dataset')
+
+output_path = 'metamath2py.jsonl'
+
+
+def as_row(handler: MetamathHandler, statement_info) -> str:
+    original_name = statement_info['original_name']
+    lemmon_notation = handler.read_proof(original_name)
+    statement_info['lemmon_notation'] = lemmon_notation
+    return json.dumps(statement_info)
+
+
+def update_dataset(handler: MetamathHandler, metamath_path: str, manifest_path: str, jobs: int, snapshot_path,
+                   share_subterms: bool = False, target: ProofTarget = ProofTarget.strings):
+    """Re-translate only the changed theorems and rewrite the dataset in database order."""
+    diff, translations = translate_incrementally(metamath_path, manifest_path, jobs=jobs, snapshot_path=snapshot_path,
+                                                 share_subterms=share_subterms, target=target)
+    logger.info('%d new, %d changed, %d renamed, %d deleted, %d unchanged', len(diff.new), len(diff.changed),
+                len(diff.renamed), len(diff.deleted), len(diff.unchanged))
+    for old_name, new_name in diff.renamed.items():
+        logger.info('renamed: %s -> %s', old_name, new_name)
+    for name in diff.deleted:
+        logger.info('deleted: %s', name)
+
+    rows = {}
+    if os.path.exists(output_path):
+        with open(output_path) as f:
+            for line in f:
+                rows[json.loads(line)['original_name']] = line.rstrip('\n')
+    for statement_info in translations:
+        rows[statement_info['original_name']] = as_row(handler, statement_info)
+
+    names = list(load_manifest(manifest_path))
+    missing = [name for name in names if name not in rows]
+    if missing:
+        logger.warning('%d unchanged theorems are missing from %s, run without --manifest to rebuild it',
+                       len(missing), output_path)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        for name in names:
+            if name in rows:
+                f.write(rows[name] + '\n')
+    os.replace(tmp_path, output_path)
+
 
-print("\n".join(sys.path))
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Translate a Metamath database into metamath2py.jsonl")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for verification and code generation; 1 keeps the sequential MM.read.")
+    parser.add_argument("--snapshot", default=None,
+                        help="Path of a parsed-database snapshot to reuse (it is rebuilt when stale).")
+    parser.add_argument("--manifest", default=None,
+                        help="Manifest of the previous run: only new and changed theorems (and the theorems using "
+                             "them) are translated again, and metamath2py.jsonl is updated in place.")
+    parser.add_argument("--profile", default=None,
+                        help="Write a JSON report of the time spent per phase and of the slowest theorems to this "
+                             "path. Work done in --jobs worker processes is not included.")
+    parser.add_argument("--share-subterms", action="store_true",
+                        help="Emit every distinct statement of a proof once and reuse its x_N variable afterwards.")
+    parser.add_argument("--target", choices=[target.value for target in ProofTarget], default=ProofTarget.strings,
+                        help="What the generated proofs pass between calls: statement strings, or tuples of tokens "
+                             "that are only rendered for the final comparison with the assertion.")
+    parser.add_argument("--log-level", default="INFO", help="Logging level, e.g. DEBUG to log every statement.")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(name)s: %(message)s")
+    logger.debug("sys.path:\n%s", "\n".join(sys.path))
 
     handler = MetamathHandler()
-    mm = MM()
     results = []
     metamath_path = r'C:\Users\kamus\PycharmProjects\metamath\set_normal.mm' #change it for your path!
-    toks = Toks(metamath_path)
-
-    with open('metamath2py.jsonl', "a+") as f:
-        for statement_info in mm.read(toks):
-            #a = 5
-            original_name = statement_info['original_name']
-            lemmon_notation = handler.read_proof(original_name)
-            statement_info['lemmon_notation'] = lemmon_notation
-            row = json.dumps(statement_info)
-            f.write(row + '\n')
\ No newline at end of file
+
+    profiler = PhaseProfiler() if args.profile else None
+    with profiling(profiler) if profiler else nullcontext():
+        if args.manifest:
+            update_dataset(handler, metamath_path, args.manifest, args.jobs, args.snapshot, args.share_subterms,
+                           args.target)
+        else:
+            with open(output_path, "a+") as f:
+                for statement_info in translate_database(metamath_path, jobs=args.jobs, snapshot_path=args.snapshot,
+                                                         share_subterms=args.share_subterms, target=args.target):
+                    #a = 5
+                    f.write(as_row(handler, statement_info) + '\n')
+    if profiler:
+        profiler.write_report(args.profile)
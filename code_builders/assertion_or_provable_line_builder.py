@@ -1,18 +1,19 @@
 from typing import List
 
-from code_builders.pythonic_names_handler import PythonicNamesHandler
+from code_builders.pythonic_names_handler import pythonic_names_handler
 from code_builders.floating_names_handler import floating_names_handler
 from models.marked_stack import MarkedStackSample
 from models.mm_models import Statement, FloatingHyp, Var
 
-pythonic_name_handler = PythonicNamesHandler()
+pythonic_name_handler = pythonic_names_handler
 
 class AssertionOrProvableLineBuilder:
-    def __init__(self):
+    def __init__(self, call_method: str = 'call'):
         self.pythonic_name_handler = pythonic_name_handler
+        self._call_method = call_method
 
         self._added_mark = None
-        self._comment = None
+        self._comment_parts = None
         self._floating_args = None
         self._name = None
 
@@ -37,7 +38,13 @@ class AssertionOrProvableLineBuilder:
         self._essential_index += 1
 
     def add_comment(self, used_stack_samples: List[MarkedStackSample], conclusion: Statement):
-        self._comment = f"{marked_stack_samples_as_comment(used_stack_samples)}. Hence, {conclusion}"
+        self._comment_parts = (used_stack_samples, conclusion)
+
+    @property
+    def comment(self) -> str:
+        # formatted on demand: the generated line does not include it
+        used_stack_samples, conclusion = self._comment_parts
+        return f"{marked_stack_samples_as_comment(used_stack_samples)}. Hence, {conclusion}"
 
     def add_stack_added_mark(self, added_mark: str):
         self._added_mark = added_mark
@@ -50,7 +57,7 @@ class AssertionOrProvableLineBuilder:
         else:
             args += ', {}'
 
-        return f"{self._added_mark} = {self._name}().call({args})" # {self._comment}"
+        return f"{self._added_mark} = {self._name}().{self._call_method}({args})" # {self.comment}"
 
 
 def marked_stack_samples_as_comment(samples: List[MarkedStackSample]):
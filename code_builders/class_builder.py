@@ -1,15 +1,23 @@
 import re
+from enum import StrEnum
 from typing import List
 
 from code_builders.postprocessor import replace_class_variables
 from code_builders.floating_names_handler import floating_names_handler
-from code_builders.pythonic_names_handler import PythonicNamesHandler
+from code_builders.pythonic_names_handler import pythonic_names_handler
 from models.errors import MMError
+from models.instrumentation import phase
 from models.mm_models import EssentialHyp, FloatingHyp, Statement, StatementType, Assertion
 
 tabs_4 = '    '
 tabs_8 = '        '
 
+
+class ProofTarget(StrEnum):
+    """What the generated proofs pass between calls."""
+    strings = "strings"  # "wff ( ph -> ps )"
+    tokens = "tokens"  # ("wff", "(", "ph", "->", "ps", ")"), only rendered for the final comparison
+
 FLOATING_ARGS_PATTERN = """
 class {NAME}_FloatingArgs(TypedDict):
 {FLOATING_ARGS_DEFINITION}
@@ -23,16 +31,22 @@ class {NAME}_EssentialArgs(TypedDict):
 CLASS_PATTERN = '''
 class {NAME}:
     """{COMMENT}"""
+{TEMPLATES_DEFINITION}    _assertion_template = StatementTemplate(r"""{ASSERTION}""", {NAME}_FloatingArgs.__annotations__)
+
     def __init__(self):
 {ESSENTIALS_DEFINITION}        self.assertion = r"""{ASSERTION}"""
         
     def call(self, floatings: {NAME}_FloatingArgs, essentials: {NAME}_EssentialArgs):
-{ESSENTIAL_SUBSTITUTION}        assertion_substituted = apply_substitution(self.assertion, floatings)
+{ESSENTIAL_SUBSTITUTION}        assertion_substituted = self._assertion_template.substitute(floatings)
         return assertion_substituted
+{CALL_TOKENS}'''
+CALL_TOKENS_PATTERN = '''
+    def call_tokens(self, floatings: dict[str, tuple[str, ...]], essentials: dict[str, tuple[str, ...]]):
+{ESSENTIAL_SUBSTITUTION}        return self._assertion_template.substitute_tokens(floatings)
 '''
 GENERAL_PATTERN = """
 from typing import TypedDict
-from metamath2py.classes.apply_substitution_for_generated_files import apply_substitution
+from metamath2py.classes.apply_substitution_for_generated_files import StatementTemplate
 
 {FLOATING_ARGS_PATTERN}
 
@@ -50,10 +64,13 @@ class {NAME}_proof({NAME}):
 
 
 
-pythonic_name_handler = PythonicNamesHandler()
+pythonic_name_handler = pythonic_names_handler
 class ClassBuilder:
-    def __init__(self):
+    def __init__(self, share_subterms: bool = False, target: ProofTarget = ProofTarget.strings):
         self.pythonic_name_handler = pythonic_name_handler
+        # emit every distinct statement of a proof once and reuse its x_N afterwards
+        self.share_subterms = share_subterms
+        self.target = ProofTarget(target)
 
         self._COMMENT = None
         self._NAME = None
@@ -68,6 +85,7 @@ class ClassBuilder:
         # init section
         self._ESSENTIALS_DEFINITION = ''
         self._ASSERTION = None
+        self._ESSENTIAL_CONTENTS = []
 
         # proof section
         self._PROOF_LINES = ''
@@ -75,6 +93,7 @@ class ClassBuilder:
 
         # call section
         self._ESSENTIAL_SUBSTITUTION = ''
+        self._ESSENTIAL_TOKENS_SUBSTITUTION = ''
 
         self._essential_map = {}
         self._floating_map = {}
@@ -128,13 +147,18 @@ class ClassBuilder:
             content = ' '.join(content)
 
             essentials_method_body += f'{tabs_8}{self_var} = r"""{content}"""\n'
-            self._essential_map[content] = self_var
+            self._ESSENTIAL_CONTENTS.append(content)
+            if self.target == ProofTarget.tokens:
+                self._essential_map[content] = f'self._essential_{i}_template.tokens'
+            else:
+                self._essential_map[content] = self_var
 
         if len(essentials_method_body) > 0:
             essentials_method_body += '\n'
         self._ESSENTIALS_DEFINITION = essentials_method_body
 
         self._ESSENTIAL_SUBSTITUTION = ClassBuilder.build_essential_substitution(len(essentials))
+        self._ESSENTIAL_TOKENS_SUBSTITUTION = ClassBuilder.build_essential_tokens_substitution(len(essentials))
 
     @staticmethod
     def build_essential_substitution(essentials_amount):
@@ -143,7 +167,7 @@ class ClassBuilder:
             first_exception_message = f'essential_{i} must be in essentials'
             second_exception_message = f'essentials["essential_{i}"] must be equal ' + '{' + f'essential_{i}_substituted' + '} but was ' '{' + f'essentials["essential_{i}"]' + '}'
             essential_substitution = (
-                f'{tabs_8}essential_{i}_substituted = apply_substitution(self.essential_{i}, floatings)\n'
+                f'{tabs_8}essential_{i}_substituted = self._essential_{i}_template.substitute(floatings)\n'
                 f'{tabs_8}if "essential_{i}" not in essentials:\n'
                 f'{tabs_8}{tabs_4}raise Exception("{first_exception_message}")\n'
                 f'{tabs_8}if essentials["essential_{i}"] != essential_{i}_substituted:\n'
@@ -155,6 +179,36 @@ class ClassBuilder:
             return '\n'.join(essentials_substitutions) + '\n'
         return ''
 
+    @staticmethod
+    def build_essential_tokens_substitution(essentials_amount):
+        essentials_substitutions = []
+        for i in range(1, essentials_amount + 1):
+            first_exception_message = f'essential_{i} must be in essentials'
+            second_exception_message = (f'essentials["essential_{i}"] must be equal '
+                                        f'{{" ".join(essential_{i}_substituted)}} '
+                                        f'but was {{" ".join(essentials["essential_{i}"])}}')
+            essential_substitution = (
+                f'{tabs_8}essential_{i}_substituted = self._essential_{i}_template.substitute_tokens(floatings)\n'
+                f'{tabs_8}if "essential_{i}" not in essentials:\n'
+                f'{tabs_8}{tabs_4}raise Exception("{first_exception_message}")\n'
+                f'{tabs_8}if essentials["essential_{i}"] != essential_{i}_substituted:\n'
+                f"{tabs_8}{tabs_4}raise Exception(f'{second_exception_message}')"
+            )
+            essentials_substitutions.append(essential_substitution)
+
+        if len(essentials_substitutions) > 0:
+            return '\n'.join(essentials_substitutions) + '\n'
+        return ''
+
+    @staticmethod
+    def build_templates(name: str, essential_contents: List[str]):
+        # tokenized once, when the generated module is imported
+        templates = []
+        for i, content in enumerate(essential_contents, 1):
+            templates.append(f'{tabs_4}_essential_{i}_template = '
+                             f'StatementTemplate(r"""{content}""", {name}_FloatingArgs.__annotations__)\n')
+        return ''.join(templates)
+
     @staticmethod
     def build_floatings(floatings: List[str]):
         if len(floatings) == 0:
@@ -188,17 +242,29 @@ class ClassBuilder:
         self.set_floatings(assertion.floating)
 
     @staticmethod
-    def build_last_step(last_element_mark: str):
-        exception_message = last_element_mark + ' was equal ' + '{' + f'{last_element_mark}' + '}, but expected it to be equal to assertion: {self.assertion}'
-        return f'{tabs_8}if {last_element_mark} != self.assertion:\n' \
+    def build_last_step(last_element_mark: str, target: ProofTarget = ProofTarget.strings):
+        rendered = last_element_mark
+        if target == ProofTarget.tokens:
+            rendered = f"' '.join({last_element_mark})"
+        exception_message = last_element_mark + ' was equal ' + '{' + f'{rendered}' + '}, but expected it to be equal to assertion: {self.assertion}'
+        return f'{tabs_8}if {rendered} != self.assertion:\n' \
                f'{tabs_8}{tabs_4}raise Exception(f"{exception_message}")'
 
     def set_last_step(self, last_element_mark: str):
-        self._LAST_STEP = ClassBuilder.build_last_step(last_element_mark)
+        self._LAST_STEP = ClassBuilder.build_last_step(last_element_mark, self.target)
+
+    @property
+    def call_method(self) -> str:
+        """The method of the generated classes that the proof lines call."""
+        return 'call_tokens' if self.target == ProofTarget.tokens else 'call'
 
     def add_essential_or_floating(self, statement_type: StatementType, stack_mark: str, statement: Statement):
         if statement_type == StatementType.floating:
-            self.append_line_in_proof(f"{stack_mark} = {statement}")
+            if self.target == ProofTarget.tokens:
+                tokens = ', '.join(f'"{symbol.content}"' for symbol in statement.statement_content)
+                self.append_line_in_proof(f"{stack_mark} = ({tokens})")
+            else:
+                self.append_line_in_proof(f"{stack_mark} = {statement}")
         elif statement_type == StatementType.essential:
             content = [c.content for c in statement.statement_content]
             content = ' '.join(content)
@@ -241,8 +307,11 @@ class ClassBuilder:
             NAME=self._NAME,
             ASSERTION=self._ASSERTION,
             ESSENTIALS_DEFINITION=self._ESSENTIALS_DEFINITION,
+            TEMPLATES_DEFINITION=ClassBuilder.build_templates(self._NAME, self._ESSENTIAL_CONTENTS),
             COMMENT=self._COMMENT,
             ESSENTIAL_SUBSTITUTION = self._ESSENTIAL_SUBSTITUTION,
+            CALL_TOKENS=CALL_TOKENS_PATTERN.format(ESSENTIAL_SUBSTITUTION=self._ESSENTIAL_TOKENS_SUBSTITUTION)
+            if self.target == ProofTarget.tokens else '',
 
         )
         executable_class = GENERAL_PATTERN.format(
@@ -257,8 +326,9 @@ class ClassBuilder:
             LAST_STEP=self._LAST_STEP,
             IMPORTED_STATEMENTS=imported_statements)
 
-        executable_class = replace_class_variables(executable_class)
-        executable_proof = replace_class_variables(executable_proof)
+        with phase('replace_class_variables'):
+            executable_class = replace_class_variables(executable_class)
+            executable_proof = replace_class_variables(executable_proof)
 
         return {
             "floatings": FLOATING_ARGS,
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from typing import List
+
+from models.errors import CompressedProofFormatError, IncompleteProofError
+from models.mm_models import Label, Statement
+from models.symbol_table import symbol_table
+
+# Marker of a "Z" step: the entry on top of the stack is saved for later reuse.
+SAVE_STEP = -1
+
+
+@dataclass
+class CompressedProof:
+    """Decoded compressed proof.
+
+    ``labels`` is the mandatory hypotheses of the proved assertion followed by the
+    labels listed between the parentheses. Every step is either ``SAVE_STEP``, an
+    index into ``labels`` or, when it is ``>= len(labels)``, a backreference to the
+    ``step - len(labels)``-th saved subproof.
+    """
+    labels: List[Label]
+    steps: List[int]
+
+
+def is_compressed(proof: Statement) -> bool:
+    return len(proof.symbols) > 0 and symbol_table.name(proof.symbols[0]) == '('
+
+
+def decode_steps(code: str) -> List[int]:
+    """Decode the A-Z letters block of a compressed proof into step numbers."""
+    steps = []
+    current = 0
+    for char in code:
+        if char == 'Z':
+            if current:
+                raise CompressedProofFormatError('"Z" follows an unfinished number')
+            steps.append(SAVE_STEP)
+        elif 'A' <= char <= 'T':
+            steps.append(20 * current + ord(char) - ord('A'))
+            current = 0
+        elif 'U' <= char <= 'Y':
+            current = 5 * current + ord(char) - ord('U') + 1
+        elif char == '?':
+            raise IncompleteProofError()
+        else:
+            raise CompressedProofFormatError(f'unexpected character "{char}"')
+    if current:
+        raise CompressedProofFormatError('proof ends with an unfinished number')
+    return steps
+
+
+def parse_compressed_proof(proof: Statement, mandatory_labels: List[Label]) -> CompressedProof:
+    """Split a compressed proof "( labels ) CODE" into its label list and decoded steps."""
+    content = symbol_table.names(proof.symbols)
+    try:
+        closing = content.index(')')
+    except ValueError:
+        raise CompressedProofFormatError('missing ")" after the label list')
+
+    labels = list(mandatory_labels)
+    labels.extend(Label(name) for name in content[1:closing])
+    steps = decode_steps(''.join(content[closing + 1:]))
+    return CompressedProof(labels=labels, steps=steps)
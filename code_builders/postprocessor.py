@@ -1,22 +1,79 @@
-import pandas as pd
+import csv
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 from paths import class_variables_path
 
 
-def replace_class_variables(text: str):
-    path = class_variables_path
-    replaces = pd.read_csv(path, sep=' ')
+class ClassVariablesReplacer:
+    """Replaces every token of the class variables table in a single regex pass.
 
-    for _, row in replaces.iterrows():
-        text = text.replace(row['token'], row['replacement'])
+    The table used to be applied row by row with ``str.replace``, and the result
+    must stay the same. One alternation listing the tokens in row order picks the
+    same token at every position, as long as no replacement can be part of a token
+    (then a replacement never creates an occurrence for a later row) and no two
+    occurrences overlap. Overlapping occurrences (``.0.X.``) are resolved by the
+    row order, so such texts, and every text when a replacement could form a token,
+    go through the row-by-row replacement.
+    """
 
-    return text
+    def __init__(self, rows: List[Tuple[str, str]]) -> None:
+        self.rows = rows
+        self._replacements: Dict[str, str] = {}
+        for token, replacement in rows:
+            self._replacements.setdefault(token, replacement)
+        self._pattern = None
+        if rows and not any(_may_form(token, replacement) for token in self._replacements for _, replacement in rows):
+            self._pattern = re.compile('|'.join(re.escape(token) for token in self._replacements))
 
-def reverse_replace_class_variables(text: str):
-    path = class_variables_path
-    replaces = pd.read_csv(path, sep=' ')
+    def replace(self, text: str) -> str:
+        pattern = self._pattern
+        if pattern is None:
+            return self.replace_row_by_row(text)
+        pieces = []
+        position = 0
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            for inner in range(start + 1, end):
+                if pattern.match(text, inner):
+                    return self.replace_row_by_row(text)
+            pieces.append(text[position:start])
+            pieces.append(self._replacements[match.group()])
+            position = end
+        if not pieces:
+            return text
+        pieces.append(text[position:])
+        return ''.join(pieces)
+
+    def replace_row_by_row(self, text: str) -> str:
+        for token, replacement in self.rows:
+            text = text.replace(token, replacement)
+        return text
+
+
+def _may_form(token: str, replacement: str) -> bool:
+    """Whether ``token`` can occur in a text because ``replacement`` was put into it."""
+    if token in replacement or replacement in token:
+        return True
+    return any(token[-k:] == replacement[:k] or token[:k] == replacement[-k:]
+               for k in range(1, min(len(token), len(replacement)) + 1))
 
-    for _, row in replaces.iterrows():
-        text = text.replace(row['replacement'], row['token'])
+
+@lru_cache(maxsize=None)
+def load_class_variables(path: str = class_variables_path) -> ClassVariablesReplacer:
+    """Read the ``token replacement`` table once per path."""
+    with open(path, newline='') as file:
+        reader = csv.reader(file, delimiter=' ')
+        next(reader)  # header
+        return ClassVariablesReplacer([(token, replacement) for token, replacement in reader])
+
+
+def replace_class_variables(text: str):
+    return load_class_variables(class_variables_path).replace(text)
+
+def reverse_replace_class_variables(text: str):
+    for token, replacement in load_class_variables(class_variables_path).rows:
+        text = text.replace(replacement, token)
 
     return text
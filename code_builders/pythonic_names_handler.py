@@ -1,59 +1,202 @@
-import random
+import atexit
+import hashlib
+import os
 import string
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from models.errors import PythonicNameCollisionError
 from paths import pythonic_names_map_path
 
+try:
+    import fcntl
+except ImportError:  # Windows: only the threads of one process are serialized
+    fcntl = None
 
-def generate_unique_name(length, exclusions):
+_FIRST_CHARS = string.ascii_uppercase
+_OTHER_CHARS = string.ascii_uppercase + string.digits[1:]
+
+
+def generate_name(label: str, length: int, exclusions) -> str:
+    """Derive a name from a hash of ``label``; the next hash is tried while the name is taken.
+
+    The same label gets the same name in every process that knows the same names.
+    """
+    attempt = 0
     while True:
-        name = ''.join(random.choices(string.ascii_uppercase, k=1)) + \
-               ''.join(random.choices(string.ascii_uppercase + string.digits[1:], k=length - 1))
+        digest = int.from_bytes(hashlib.blake2b(f'{label}\0{attempt}'.encode(), digest_size=16).digest(), 'big')
+        chars = [_FIRST_CHARS[digest % len(_FIRST_CHARS)]]
+        digest //= len(_FIRST_CHARS)
+        for _ in range(length - 1):
+            chars.append(_OTHER_CHARS[digest % len(_OTHER_CHARS)])
+            digest //= len(_OTHER_CHARS)
+        name = ''.join(chars)
         if name not in exclusions:
             return name
+        attempt += 1
 
 
-def read_file_to_dict(file_path):
-    result_dict = {}
+def parse_names(lines: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Return the label -> name and name -> label maps of the lines of a names file (later lines win)."""
+    forward, reverse = {}, {}
+    for line in lines:
+        if not line.strip():
+            continue
+        key, value = line.strip().split()
+        forward[key] = value
+        reverse[value] = key
+    return forward, reverse
 
-    with open(file_path, 'r') as file:
-        for line in file:
-            key, value = line.strip().split()
-            result_dict[key] = value
 
-    return result_dict
-
-def read_file_to_dict_reverse(file_path):
-    result_dict = {}
+def read_names_map(file_path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    if not os.path.exists(file_path):
+        return {}, {}
     with open(file_path, 'r') as file:
-        for line in file:
-            key, value = line.strip().split()
-            result_dict[value] = key
+        return parse_names(file)
 
-    return result_dict
 
+def _signature(file_path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-class PythonicNamesHandler:
-    def __init__(self):
-        self.map_path = pythonic_names_map_path
 
-        self.maps = read_file_to_dict(self.map_path)
-        self.reverse_map = read_file_to_dict_reverse(self.map_path)
+@contextmanager
+def _locked(path: str):
+    """Hold an exclusive lock on ``path``.lock, so that processes do not rewrite the map concurrently."""
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-    def map_name(self, name: str):
-        if name in self.maps:
-            return self.maps[name]
-        pythonic_name = generate_unique_name(5, self.maps)
-        with open(self.map_path, 'a') as f:
-            f.write(f'{name} {pythonic_name}\n')
 
-        self.maps[name] = pythonic_name
+class PythonicNamesHandler:
+    """Label <-> Python class name registry backed by ``pythonic_names_map.csv``.
+
+    The map is read on first use. Before a new name is created, the names that
+    other processes wrote since are read under a lock, so the new name avoids them.
+    New names are buffered and written in batches: every write merges them into the
+    current file under a lock and replaces the file atomically, so concurrent
+    processes do not lose each other's names. A name that another process wrote for
+    a different label in between cannot be renamed, since it may already be in
+    generated code, so :meth:`flush` raises :class:`PythonicNameCollisionError`.
+
+    Use the shared :data:`pythonic_names_handler`, which is flushed at exit, instead
+    of creating one; another handler has to be flushed by its owner.
+    """
+
+    def __init__(self, map_path: Optional[str] = None, batch_size: int = 1000) -> None:
+        self.map_path = map_path or pythonic_names_map_path
+        self.batch_size = batch_size
+        self._maps: Optional[Dict[str, str]] = None
+        self._reverse_map: Optional[Dict[str, str]] = None
+        self._pending: List[Tuple[str, str]] = []
+        self._signature: Optional[Tuple[int, int]] = None  # of the map file when it was last read
+        self._lock = threading.RLock()
+
+    def load(self) -> None:
+        """Read the map file, unless it was already read."""
+        with self._lock:
+            if self._maps is None:
+                self._signature = _signature(self.map_path)
+                self._maps, self._reverse_map = read_names_map(self.map_path)
+
+    def _refresh(self) -> None:
+        """Add the names written by other processes since the map file was read."""
+        if _signature(self.map_path) == self._signature:
+            return
+        with _locked(self.map_path):
+            self._signature = _signature(self.map_path)
+            on_disk, _ = read_names_map(self.map_path)
+        self._merge(on_disk)
+
+    def _merge(self, on_disk: Dict[str, str]) -> None:
+        for name, pythonic_name in on_disk.items():
+            if name not in self._maps and pythonic_name not in self._reverse_map:
+                self._maps[name] = pythonic_name
+                self._reverse_map[pythonic_name] = name
+
+    @property
+    def maps(self) -> Dict[str, str]:
+        if self._maps is None:
+            self.load()
+        return self._maps
+
+    @property
+    def reverse_map(self) -> Dict[str, str]:
+        if self._reverse_map is None:
+            self.load()
+        return self._reverse_map
 
+    def map_name(self, name: str):
+        pythonic_name = self.maps.get(name)
+        if pythonic_name is not None:
+            return pythonic_name
+        with self._lock:
+            self._refresh()
+            if name in self._maps:
+                return self._maps[name]
+            pythonic_name = generate_name(name, 5, self._reverse_map)
+            self._maps[name] = pythonic_name
+            self._reverse_map[pythonic_name] = name
+            self._pending.append((name, pythonic_name))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
         return pythonic_name
 
+    def flush(self) -> None:
+        """Write the names created since the last flush.
+
+        Raise :class:`PythonicNameCollisionError` after writing the others if some of
+        them were given differently in the file in the meantime.
+        """
+        collisions = []
+        with self._lock:
+            if not self._pending:
+                return
+            with _locked(self.map_path):
+                content = ''
+                if os.path.exists(self.map_path):
+                    with open(self.map_path, 'r') as file:
+                        content = file.read()
+                if content and not content.endswith('\n'):
+                    content += '\n'
+                on_disk, on_disk_reverse = parse_names(content.splitlines())
+                lines = []
+                for name, pythonic_name in self._pending:
+                    if on_disk.get(name, pythonic_name) != pythonic_name or (
+                            on_disk_reverse.get(pythonic_name, name) != name):
+                        # another process wrote this label or name after the map was last read
+                        collisions.append((name, pythonic_name))
+                    elif name not in on_disk:
+                        lines.append(f'{name} {pythonic_name}\n')
+                        on_disk[name] = pythonic_name
+                        on_disk_reverse[pythonic_name] = name
+                tmp_path = f'{self.map_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as file:
+                    file.write(content)
+                    file.writelines(lines)
+                os.replace(tmp_path, self.map_path)
+                self._signature = _signature(self.map_path)
+            self._pending.clear()
+            self._merge(on_disk)
+        if collisions:
+            raise PythonicNameCollisionError(self.map_path, collisions)
+
     def reverse_map_name(self, name: str):
-        if name in self.reverse_map:
-            return self.reverse_map[name]
-        return None
+        return self.reverse_map.get(name)
 
     def list_encoded_names(self):
         return self.maps.values()
+
+
+pythonic_names_handler = PythonicNamesHandler()
+atexit.register(pythonic_names_handler.flush)
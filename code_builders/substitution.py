@@ -1,8 +1,8 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from models.marked_stack import MarkedStackSample
-from models.mm_models import Statement, Symbol, Var
+from models.mm_models import Assertion, Statement, Symbol, Var
 
 
 @dataclass
@@ -14,24 +14,96 @@ class Substitution:
 
 @dataclass
 class SubstitutionResult:
+    """Substituted statement; the per-variable ``substituted`` records are only built when asked for."""
     statement: Statement
-    substituted: List[Substitution]
+    source: Statement = field(repr=False)
+    substitution: Dict[Var, MarkedStackSample] = field(repr=False)
+
+    @property
+    def substituted(self) -> List[Substitution]:
+        by_symbol_id = {variable.symbol_id: (variable, sample) for variable, sample in self.substitution.items()}
+        records = []
+        for symbol_id in self.source.symbols:
+            found = by_symbol_id.get(symbol_id)
+            if found is not None:
+                variable, sample = found
+                records.append(Substitution(variable=variable,
+                                            substituted=sample.statement.statement_content,
+                                            stack_mark=sample.mark))
+        return records
+
+    def __repr__(self):
+        return f'SubstitutionResult(statement={self.statement!r}, substituted={self.substituted!r})'
+
+
+class SubstitutionTemplate:
+    """A statement split at its variables: constant runs alternate with variable slots.
+
+    Applying it concatenates the runs with the values of the slots, without looking
+    at the constant symbols one by one.
+    """
+    __slots__ = ('_head', '_slots')
+
+    def __init__(self, symbols: Sequence[int], variable_ids: set[int]) -> None:
+        runs: List[List[int]] = [[]]
+        slots: List[int] = []
+        for symbol_id in symbols:
+            if symbol_id in variable_ids:
+                slots.append(symbol_id)
+                runs.append([])
+            else:
+                runs[-1].append(symbol_id)
+        self._head = tuple(runs[0])
+        self._slots = tuple(zip(slots, (tuple(run) for run in runs[1:])))
+
+    def apply(self, values: Dict[int, Tuple[int, ...]]) -> Tuple[int, ...]:
+        if not self._slots:
+            return self._head
+        result = list(self._head)
+        for variable_id, run in self._slots:
+            result += values[variable_id]
+            result += run
+        return tuple(result)
+
+
+@dataclass
+class AssertionTemplates:
+    floatings: List[Tuple[int, int]]  # (typecode id, variable id) of every floating hypothesis
+    definitions: List[Tuple[int, int]]  # variable ids of every $d pair
+    essentials: List[SubstitutionTemplate]
+    conclusion: SubstitutionTemplate
+
+
+def assertion_templates(assertion: Assertion) -> AssertionTemplates:
+    """Return the templates of the hypotheses and conclusion of an assertion, compiled on first use."""
+    templates: Optional[AssertionTemplates] = assertion.__dict__.get('_templates')
+    if templates is None:
+        variable_ids = {floating.variable.symbol_id for floating in assertion.floating}
+        templates = AssertionTemplates(
+            floatings=[(floating.const.symbol_id, floating.variable.symbol_id) for floating in assertion.floating],
+            definitions=[(definition.x.symbol_id, definition.y.symbol_id) for definition in assertion.definitions],
+            essentials=[SubstitutionTemplate(essential.symbols, variable_ids) for essential in assertion.essential],
+            conclusion=SubstitutionTemplate(assertion.statement.symbols, variable_ids))
+        assertion.__dict__['_templates'] = templates
+    return templates
 
 
 def apply_subst(statement: Statement, substitution: dict[Var, MarkedStackSample]) -> SubstitutionResult:
     """Return the token list resulting from the given substitution
     (dictionary) applied to the given statement (token list).
     """
+    values = {variable.symbol_id: sample.statement.symbols for variable, sample in substitution.items()}
+    result = substitute_symbols(statement.symbols, values)
+    return SubstitutionResult(statement=Statement.from_symbols(result), source=statement, substitution=substitution)
+
+
+def substitute_symbols(symbols: Sequence[int], substitution: Dict[int, Tuple[int, ...]]) -> Tuple[int, ...]:
+    """Apply a substitution keyed by variable symbol id to a symbol id string, keeping no records."""
     result = []
-    substituted = []
-    for tok in statement.statement_content:
-        variable = Var(tok.content)
-        if variable in substitution:
-            s = Substitution(variable=variable,
-                             substituted=substitution[variable].statement.statement_content,
-                             stack_mark=substitution[variable].mark)
-            substituted.append(s)
-            result.extend(substitution[variable].statement.statement_content)
+    for symbol_id in symbols:
+        replacement = substitution.get(symbol_id)
+        if replacement is None:
+            result.append(symbol_id)
         else:
-            result.append(variable)
-    return SubstitutionResult(statement=Statement(statement_content=result), substituted=substituted)
+            result.extend(replacement)
+    return tuple(result)
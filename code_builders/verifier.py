@@ -1,18 +1,22 @@
-import itertools
+import time
+from typing import Iterator, List, Optional, Tuple, Union
 
 from code_builders.assertion_or_provable_line_builder import AssertionOrProvableLineBuilder
 from code_builders.class_builder import ClassBuilder
 from models.frame_stack import FrameStack
 from models.marked_stack import MarkedStackSample, MarkedStack
-from models.mm_models import StatementType, Statement, Var, Label, FullStatement
-from code_builders.substitution import apply_subst
+from models.instrumentation import phase
+from models.mm_models import StatementType, Statement, Var, Label, FullStatement, VerificationResult
+from models.symbol_table import symbol_table
+from code_builders.compressed_proof import SAVE_STEP, is_compressed, parse_compressed_proof
+from code_builders.substitution import apply_subst, assertion_templates
 from models.errors import (DisjointVariableError,
                            StackEssentialError,
                            StackFloatingError,
                             StackUnderflowError,
                            LabelNotActiveError,
                            LabelNotFoundError,
-                            CompressedProofsError,
+                           CompressedProofFormatError,
                            EmptyStackError,
                            OverfullStackError,
                            NonMatchingStackError)
@@ -27,90 +31,269 @@ def assert_proof(conclusion, stack: MarkedStack):
         raise NonMatchingStackError(stack.get_i_element(0), conclusion)
 
 
-def verify(frame_stack: FrameStack,
-           labels: dict[Label, FullStatement],
-           target_statement: Statement,
-           proof: Statement,
-           builder: ClassBuilder) -> None:
-    if proof.statement_content[0].content == '(':  # compressed format
-        raise CompressedProofsError()
+def iter_proof_steps(frame_stack: FrameStack, target_statement: Statement, proof: Statement) -> Iterator[Union[Label, int]]:
+    """Yield the steps of a normal or compressed proof in order.
+
+    A step is either the ``Label`` to apply, ``SAVE_STEP`` (save the top of the stack)
+    or the index of a previously saved subproof to push again.
+    """
+    if not is_compressed(proof):
+        for name in symbol_table.names(proof.symbols):
+            yield Label(name)
+        return
+
+    assertion = frame_stack.make_assertion(target_statement)
+    mandatory_labels = frame_stack.get_mandatory_hypothesis_labels(assertion)
+    compressed_proof = parse_compressed_proof(proof, mandatory_labels)
+    labels_amount = len(compressed_proof.labels)
+    saved_amount = 0
+    for step in compressed_proof.steps:
+        if step == SAVE_STEP:
+            saved_amount += 1
+            yield SAVE_STEP
+        elif step < labels_amount:
+            yield compressed_proof.labels[step]
+        elif step - labels_amount < saved_amount:
+            yield step - labels_amount
+        else:
+            raise CompressedProofFormatError(f'step {step} refers to a subproof that was not saved')
+
 
-    stack = MarkedStack()
+class DisjointVariableCheck:
+    """$d checking for the steps of one proof.
+
+    The active disjoint pairs are materialized once per proof, when the first
+    assertion with $d conditions is applied, and the variables of every stack entry
+    are computed once and cached on the entry.
+    """
+
+    def __init__(self, frame_stack: FrameStack) -> None:
+        self._frame_stack = frame_stack
+        self._pairs: Optional[frozenset[Tuple[int, int]]] = None
+
+    def check(self, definitions: List[Tuple[int, int]], floating_entries: dict[int, Statement]) -> None:
+        """Check the $d pairs (variable ids) of an assertion against the stack entries substituted for them."""
+        if self._pairs is None:
+            self._pairs = self._frame_stack.disjoint_pairs()
+        pairs = self._pairs
+        variable_ids = self._frame_stack.active_variable_ids()
+        for x, y in definitions:
+            y_vars = floating_entries[y].variable_ids(variable_ids)
+            for x0 in floating_entries[x].variable_ids(variable_ids):
+                for y0 in y_vars:
+                    if x0 == y0 or ((x0, y0) if x0 < y0 else (y0, x0)) not in pairs:
+                        raise DisjointVariableError(Var(symbol_table.name(x0)), Var(symbol_table.name(y0)))
+
+
+def _active_hypotheses(frame_stack: FrameStack) -> set[Label]:
     active_hypotheses = set()
     for frame in frame_stack:
         for label in frame.get_floating_and_essential_labels():
             active_hypotheses.add(label)
+    return active_hypotheses
+
 
-    for label in proof.statement_content:
-        possible_label = Label(label.content)
-        full_statement = labels.get(possible_label)
-        if not full_statement:
-            raise LabelNotFoundError(label)
-
-        if full_statement.statement_type in {StatementType.essential, StatementType.floating}:
-            if possible_label not in active_hypotheses:
-                raise LabelNotActiveError(label)
-
-        statement_type = full_statement.statement_type
-
-        if statement_type in {StatementType.essential, StatementType.floating}:
-            stack.append(full_statement.statement)
-            builder.add_essential_or_floating(statement_type, stack.get_last_element_mark(), full_statement.statement)
-
-        elif statement_type in {StatementType.assertion, StatementType.provable}:
-
-            assertion_or_provable_line_builder = AssertionOrProvableLineBuilder()
-
-            assertion = full_statement.statement
-            definitions = assertion.definitions
-            floatings = assertion.floating
-            essentials = assertion.essential
-            conclusion = assertion.statement
-            hypothesis_amount = len(floatings) + len(essentials)
-            stack_index = len(stack) - hypothesis_amount
-
-            if stack_index < 0:
-                raise StackUnderflowError(full_statement, hypothesis_amount)
-            subst: dict[Var, MarkedStackSample] = {}
-            for floating in floatings:
-                typecode = floating.const
-                var = floating.variable
-                entry = stack.get_i_element(stack_index)
-                if entry.statement.statement_content[0].content != typecode.content:
-                    raise StackFloatingError(entry, typecode, var)
-                subst[var] = MarkedStackSample(mark=entry.mark,
-                                               statement=Statement(entry.statement.statement_content[1:]))
-                stack_index += 1
-
-            for essential in essentials:
-                entry = stack.get_i_element(stack_index)
-                substituted_hypotheses = apply_subst(essential, subst)
-                if entry.statement != substituted_hypotheses.statement:
-                    raise StackEssentialError(entry, substituted_hypotheses)
-
-                assertion_or_provable_line_builder.add_essential_substitution(entry.mark)
-
-                stack_index += 1
-
-            for definition in definitions:
-                x, y = definition.x, definition.y
-                x_vars = frame_stack.find_variables(subst[x].statement)
-                y_vars = frame_stack.find_variables(subst[y].statement)
-                for x0, y0 in itertools.product(x_vars, y_vars):
-                    if x0 == y0 or not frame_stack.lookup_definition(x0, y0):
-                        raise DisjointVariableError(x0, y0)
-            marked_stack_samples = stack.remove(hypothesis_amount)
-            substituted_conclusion = apply_subst(conclusion, subst)
-            assertion_or_provable_line_builder.add_floating_substitution(floatings, subst)
-
-            stack.append(substituted_conclusion.statement)
-            assertion_or_provable_line_builder.add_stack_added_mark(stack.get_last_element_mark())
-
-            call_name = assertion_or_provable_line_builder.add_statement_name(full_statement.label.name)
-            builder.add_imported_statement(call_name)
-
-            assertion_or_provable_line_builder.add_comment(marked_stack_samples, substituted_conclusion.statement)
-            builder.append_line_in_proof(assertion_or_provable_line_builder.build())
+def verify(frame_stack: FrameStack,
+           labels: dict[Label, FullStatement],
+           target_statement: Statement,
+           proof: Statement,
+           builder: Optional[ClassBuilder] = None,
+           verify_only: bool = False) -> None:
+    """Check ``proof`` of ``target_statement`` and, unless ``verify_only``, translate it step by step into ``builder``.
+
+    With ``verify_only`` no marks, substitution records or builder lines are produced,
+    see :func:`check_proof`.
+    """
+    if verify_only:
+        check_proof(frame_stack, labels, target_statement, proof)
+        return
+    if builder is None:
+        raise ValueError("builder is required unless verify_only")
+
+    stack = MarkedStack(share_subterms=builder.share_subterms)
+    active_hypotheses = _active_hypotheses(frame_stack)
+    disjoint = DisjointVariableCheck(frame_stack)
+    saved: List[MarkedStackSample] = []
+    for step in iter_proof_steps(frame_stack, target_statement, proof):
+        if isinstance(step, Label):
+            apply_step(step, frame_stack, labels, active_hypotheses, stack, builder, disjoint)
+        elif step == SAVE_STEP:
+            if not stack:
+                raise CompressedProofFormatError('"Z" applied to an empty stack')
+            saved.append(stack.get_last_element())
+        else:
+            # the tagged subproof was already verified and translated: reuse its mark
+            stack.append_sample(saved[step])
 
     builder.set_last_step(stack.get_last_element_mark())
     assert_proof(target_statement, stack)
+
+
+def check_proof(frame_stack: FrameStack,
+                labels: dict[Label, FullStatement],
+                target_statement: Statement,
+                proof: Statement) -> None:
+    """Verify ``proof`` without any code generation: the stack only holds statements."""
+    stack: List[Statement] = []
+    active_hypotheses = _active_hypotheses(frame_stack)
+    disjoint = DisjointVariableCheck(frame_stack)
+    saved: List[Statement] = []
+    for step in iter_proof_steps(frame_stack, target_statement, proof):
+        if isinstance(step, Label):
+            check_step(step, frame_stack, labels, active_hypotheses, stack, disjoint)
+        elif step == SAVE_STEP:
+            if not stack:
+                raise CompressedProofFormatError('"Z" applied to an empty stack')
+            saved.append(stack[-1])
+        else:
+            stack.append(saved[step])
+
+    if not stack:
+        raise EmptyStackError()
+    if len(stack) > 1:
+        raise OverfullStackError()
+    if stack[0] != target_statement:
+        raise NonMatchingStackError(stack[0], target_statement)
+
+
+def check_theorem(label: Label,
+                  frame_stack: FrameStack,
+                  labels: dict[Label, FullStatement],
+                  target_statement: Statement,
+                  proof: Statement) -> VerificationResult:
+    """Verify one $p with :func:`check_proof`, reporting a failure instead of raising it."""
+    started = time.perf_counter()
+    error = None
+    try:
+        with phase('verify'):
+            check_proof(frame_stack, labels, target_statement, proof)
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+    return VerificationResult(label.name, passed=error is None, seconds=time.perf_counter() - started, error=error)
+
+
+def check_step(possible_label: Label,
+               frame_stack: FrameStack,
+               labels: dict[Label, FullStatement],
+               active_hypotheses: set[Label],
+               stack: List[Statement],
+               disjoint: Optional[DisjointVariableCheck] = None) -> None:
+    """Lean counterpart of :func:`apply_step` working on interned symbol tuples."""
+    full_statement = labels.get(possible_label)
+    if not full_statement:
+        raise LabelNotFoundError(possible_label.name)
+
+    statement_type = full_statement.statement_type
+    if statement_type in {StatementType.essential, StatementType.floating}:
+        if possible_label not in active_hypotheses:
+            raise LabelNotActiveError(possible_label.name)
+        stack.append(full_statement.statement)
+        return
+
+    assertion = full_statement.statement
+    floatings = assertion.floating
+    hypothesis_amount = len(floatings) + len(assertion.essential)
+    stack_index = len(stack) - hypothesis_amount
+    if stack_index < 0:
+        raise StackUnderflowError(full_statement, hypothesis_amount)
+
+    templates = assertion_templates(assertion)
+    subst: dict[int, Tuple[int, ...]] = {}
+    floating_entries: dict[int, Statement] = {}
+    for floating, (typecode_id, variable_id) in zip(floatings, templates.floatings):
+        entry = stack[stack_index]
+        if entry.symbols[0] != typecode_id:
+            raise StackFloatingError(entry, floating.const, floating.variable)
+        subst[variable_id] = entry.symbols[1:]
+        floating_entries[variable_id] = entry
+        stack_index += 1
+
+    for template in templates.essentials:
+        entry = stack[stack_index]
+        substituted = template.apply(subst)
+        if entry.symbols != substituted:
+            raise StackEssentialError(entry, Statement.from_symbols(substituted))
+        stack_index += 1
+
+    if templates.definitions:
+        (disjoint or DisjointVariableCheck(frame_stack)).check(templates.definitions, floating_entries)
+
+    del stack[len(stack) - hypothesis_amount:]
+    stack.append(Statement.from_symbols(templates.conclusion.apply(subst)))
+
+
+def apply_step(possible_label: Label,
+               frame_stack: FrameStack,
+               labels: dict[Label, FullStatement],
+               active_hypotheses: set[Label],
+               stack: MarkedStack,
+               builder: ClassBuilder,
+               disjoint: Optional[DisjointVariableCheck] = None) -> None:
+    full_statement = labels.get(possible_label)
+    if not full_statement:
+        raise LabelNotFoundError(possible_label.name)
+
+    if full_statement.statement_type in {StatementType.essential, StatementType.floating}:
+        if possible_label not in active_hypotheses:
+            raise LabelNotActiveError(possible_label.name)
+
+    statement_type = full_statement.statement_type
+
+    if statement_type in {StatementType.essential, StatementType.floating}:
+        if stack.append_shared(full_statement.statement):
+            return
+        stack.append(full_statement.statement)
+        builder.add_essential_or_floating(statement_type, stack.get_last_element_mark(), full_statement.statement)
+
+    elif statement_type in {StatementType.assertion, StatementType.provable}:
+
+        assertion_or_provable_line_builder = AssertionOrProvableLineBuilder(builder.call_method)
+
+        assertion = full_statement.statement
+        floatings = assertion.floating
+        essentials = assertion.essential
+        hypothesis_amount = len(floatings) + len(essentials)
+        stack_index = len(stack) - hypothesis_amount
+
+        if stack_index < 0:
+            raise StackUnderflowError(full_statement, hypothesis_amount)
+        templates = assertion_templates(assertion)
+        subst: dict[Var, MarkedStackSample] = {}
+        values: dict[int, Tuple[int, ...]] = {}
+        floating_entries: dict[int, Statement] = {}
+        for floating, (typecode_id, variable_id) in zip(floatings, templates.floatings):
+            typecode = floating.const
+            var = floating.variable
+            entry = stack.get_i_element(stack_index)
+            if entry.statement.symbols[0] != typecode_id:
+                raise StackFloatingError(entry, typecode, var)
+            value = values[variable_id] = entry.statement.symbols[1:]
+            subst[var] = MarkedStackSample(mark=entry.mark, statement=Statement.from_symbols(value))
+            floating_entries[variable_id] = entry.statement
+            stack_index += 1
+
+        for essential, template in zip(essentials, templates.essentials):
+            entry = stack.get_i_element(stack_index)
+            if entry.statement.symbols != template.apply(values):
+                raise StackEssentialError(entry, apply_subst(essential, subst))
+
+            assertion_or_provable_line_builder.add_essential_substitution(entry.mark)
+
+            stack_index += 1
+
+        if templates.definitions:
+            (disjoint or DisjointVariableCheck(frame_stack)).check(templates.definitions, floating_entries)
+        marked_stack_samples = stack.remove(hypothesis_amount)
+        substituted_conclusion = Statement.from_symbols(templates.conclusion.apply(values))
+        if stack.append_shared(substituted_conclusion):
+            return
+        assertion_or_provable_line_builder.add_floating_substitution(floatings, subst)
+
+        stack.append(substituted_conclusion)
+        assertion_or_provable_line_builder.add_stack_added_mark(stack.get_last_element_mark())
+
+        call_name = assertion_or_provable_line_builder.add_statement_name(full_statement.label.name)
+        builder.add_imported_statement(call_name)
+
+        assertion_or_provable_line_builder.add_comment(marked_stack_samples, substituted_conclusion)
+        builder.append_line_in_proof(assertion_or_provable_line_builder.build())
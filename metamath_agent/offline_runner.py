@@ -7,14 +7,10 @@ import argparse
 from collections import Counter
 from typing import Iterable
 
-from code_builders.class_builder import ClassBuilder
-from code_builders.pythonic_names_handler import PythonicNamesHandler
-from code_builders.verifier import verify
+from code_builders.pythonic_names_handler import pythonic_names_handler
 from database.opensearch_wrapper import TheoremSearchClient
 from mm import MM
-from models.frame import Frame
-from models.mm_models import Const, FullStatement, Label, Statement, StatementType, Symbol, Var
-from models.toks import Toks
+from models.mm_models import Statement, Symbol
 
 
 @dataclass(frozen=True)
@@ -24,7 +20,7 @@ class GeneratedTheorem:
     proof_path: Path
 
 
-_NAMES = PythonicNamesHandler()
+_NAMES = pythonic_names_handler
 
 
 def _next_name(base_name: str) -> str:
@@ -111,106 +107,10 @@ def _normalized_proof_tokens(*, theorem_label: str, metamath_db: Path) -> list[s
 
 
 def _recover_by_original_label(*, original_label: str, normalized_tokens: list[str]) -> dict[str, str]:
-    mm = MM()
-    toks = Toks(str(_resolve_metamath_db()))
-
-    current_frame = Frame()
-    mm.frame_stack.push(current_frame)
-
-    label: Label | None = None
-    prev_label: Label | None = None
-
-    comment, tok = toks.readc()
-    mm.append_comment_if_exists(comment)
-
-    while tok:
-        statement_type = StatementType.try_cast(tok)
-
-        if statement_type == StatementType.constant:
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            mm.add_constants(statement)
-        elif statement_type == StatementType.variable:
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            mm.add_variables(current_frame, statement)
-        elif statement_type == StatementType.floating:
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            if not label:
-                raise ValueError("Encountered $f without active label")
-            if len(statement.statement_content) != 2:
-                raise ValueError("Floating statement must contain exactly 2 symbols")
-            typecode = Const(statement.statement_content[0].content)
-            variable = Var(statement.statement_content[1].content)
-            mm.add_floating(current_frame, typecode=typecode, var=variable, label=label)
-            mm.labels[label] = FullStatement(label, StatementType.floating, statement)
-            label = None
-        elif statement_type == StatementType.essential:
-            if not label:
-                raise ValueError("Encountered $e without active label")
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            current_frame.add_essential(statement, label)
-            mm.labels[label] = FullStatement(label, StatementType.essential, statement)
-            label = None
-        elif statement_type == StatementType.assertion:
-            if not label:
-                raise ValueError("Encountered $a without active label")
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            assertion = mm.frame_stack.make_assertion(statement)
-            mm.labels[label] = FullStatement(label, StatementType.assertion, assertion)
-            label = None
-            mm.comments = []
-        elif statement_type == StatementType.provable:
-            if not label:
-                raise ValueError("Encountered $p without active label")
-
-            statement, _proof = mm.read_p_stmt(toks)
-            assertion = mm.frame_stack.make_assertion(statement)
-            comment_text = mm.comments[-1] if mm.comments else ""
-            mm.comments = []
-
-            if label.name == original_label:
-                builder = ClassBuilder()
-                builder.set_comment(comment_text)
-                builder.set_statement_name(label.name)
-                builder.set_assertion(assertion)
-                normalized_statement = Statement(statement_content=[Symbol(content=t) for t in normalized_tokens])
-                verify(
-                    frame_stack=mm.frame_stack,
-                    labels=mm.labels,
-                    target_statement=assertion.statement,
-                    proof=normalized_statement,
-                    builder=builder,
-                )
-                mm.labels[label] = FullStatement(label, StatementType.provable, assertion)
-                return builder.build()
-
-            mm.labels[label] = FullStatement(label, StatementType.provable, assertion)
-            label = None
-        elif statement_type == StatementType.definition:
-            statement = mm.read_non_p_stmt(statement_type, toks)
-            current_frame.add_definitions(statement)
-        elif tok == "${":
-            current_frame = Frame()
-            mm.frame_stack.push(current_frame)
-            prev_label = label
-            label = None
-        elif tok == "$}":
-            mm.frame_stack.pop()
-            current_frame = mm.frame_stack[-1]
-            label = prev_label
-        elif tok == "$)":
-            raise ValueError("Unexpected closing comment token")
-        elif tok[0] != "$":
-            candidate = Label(tok)
-            if candidate in mm.labels:
-                raise ValueError(f"Label already defined: {tok}")
-            label = candidate
-        else:
-            raise ValueError(f"Unknown token while parsing Metamath source: {tok}")
-
-        comment, tok = toks.readc()
-        mm.append_comment_if_exists(comment)
-
-    raise ValueError(f"Could not reconstruct theorem by original label: {original_label}")
+    # The sidecar label index lets MM re-read only the theorem's scopes and the
+    # assertions its proof uses; it is (re)built next to the database when stale.
+    normalized_statement = Statement(statement_content=[Symbol(content=t) for t in normalized_tokens])
+    return MM.reconstruct(str(_resolve_metamath_db()), original_label, proof=normalized_statement)
 
 
 def _recover_artifacts_via_metamath(*, base_name: str) -> dict[str, str]:
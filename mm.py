@@ -1,23 +1,37 @@
-from typing import Optional, Dict, Iterable
+import logging
+import time
+from array import array
+from typing import Optional, Dict, Iterable, Union
 
 from tqdm import tqdm
 
-from code_builders.class_builder import ClassBuilder
-from code_builders.verifier import verify
+from code_builders.class_builder import ClassBuilder, ProofTarget
+from code_builders.verifier import check_theorem, verify
 from models.frame import Frame
 from models.frame_stack import FrameStack
 from models.mm_models import (StatementType,
                                        Statement,
-                                       Symbol,
                                        Const,
                                        Var,
                                        Label,
                                        FullStatement,
-                                       FloatingHyp)
+                                       FloatingHyp,
+                                       ParsedAssertion,
+                                       VerificationResult)
+from models.instrumentation import active_profiler, phase
+from models.label_index import LabelIndex, OUTERMOST_SCOPE
+from models.snapshot import is_snapshot_fresh, read_snapshot, write_snapshot
+from models.symbol_table import CONSTANT, VARIABLE, SymbolKinds, symbol_table
 from models.toks import Toks
 from models.errors import MMError, UnknownTokenError, LabelMultipleDefinedError, \
-    UnexpectedClosingBracketError, LabelNotDefinedError, StatementLengthIncorrectError
+    UnexpectedClosingBracketError, LabelNotDefinedError, StatementLengthIncorrectError, LabelNotFoundError
 
+logger = logging.getLogger(__name__)
+
+LABELED_STATEMENT_TYPES = {StatementType.floating,
+                           StatementType.essential,
+                           StatementType.assertion,
+                           StatementType.provable}
 
 
 class MM:
@@ -25,18 +39,23 @@ class MM:
 
     def __init__(self) -> None:
         """Construct an empty Metamath database."""
-        self._constants: set[Const] = set()
+        self._symbol_kinds = SymbolKinds()  # constant/variable flags of the symbols declared in this database
         self.frame_stack = FrameStack()
         self.labels: dict[Label, FullStatement] = {}
 
         self.comments = []
 
+        # filled by parse(): everything needed to verify or translate a theorem after the parse is over
+        self.frame_contexts: dict[Label, FrameStack] = {}
+        self.proofs: dict[Label, Statement] = {}
+        self.comments_by_label: dict[Label, str] = {}
+
     def append_comment_if_exists(self, comment: Optional[str]):
         if comment:
             self.comments.append(comment)
 
     def is_constant_declared(self, const: Const):
-        return const in self._constants
+        return self._symbol_kinds.is_constant(const.symbol_id)
 
     def add_constant(self, tok: Const) -> None:
         """Add a constant to the database."""
@@ -44,14 +63,14 @@ class MM:
             raise MMError(f'Constant already declared: {tok}')
         if self.frame_stack.lookup_variable(tok.as_variable()):
             raise MMError(f'Trying to declare as a constant an active variable: {tok}')
-        self._constants.add(tok)
+        self._symbol_kinds.declare(tok.symbol_id, CONSTANT)
 
     def add_constants(self, statement: Statement):
         for symbol in statement.statement_content:
             constant = Const(symbol.content)
             self.add_constant(constant)
 
-    def _add_variable(self, frame: Frame, tok: Var) -> None:
+    def _add_variable(self, tok: Var) -> None:
         """Add a variable to the frame stack top (that is, the current frame)
         of the database.  Allow local variable declarations.
         """
@@ -59,14 +78,15 @@ class MM:
             raise MMError('var already declared and active: {}'.format(tok))
         if self.is_constant_declared(tok.as_constant()):
             raise MMError('var already declared as constant: {}'.format(tok))
-        frame.add_variable(tok)
+        self.frame_stack.add_variable(tok)
+        self._symbol_kinds.declare(tok.symbol_id, VARIABLE)
 
-    def add_variables(self, frame: Frame, statement: Statement):
+    def add_variables(self, statement: Statement):
         for symbol in statement.statement_content:
             variable = Var(symbol.content)
-            self._add_variable(frame, variable)
+            self._add_variable(variable)
 
-    def add_floating(self, frame: Frame, typecode: Const, var: Var, label: Label) -> None:
+    def add_floating(self, typecode: Const, var: Var, label: Label) -> None:
         """Add a floating hypothesis (ordered pair (variable, typecode)) to
         the frame stack top (that is, the current frame) of the database.
         """
@@ -74,44 +94,46 @@ class MM:
             raise MMError('var in $f not declared: {}'.format(var))
         if not self.is_constant_declared(typecode):
             raise MMError('typecode in $f not declared: {}'.format(typecode))
-        if any(frame.is_floating_variable_declared(var) for frame in self.frame_stack):
+        if self.frame_stack.lookup_floating(var) is not None:
             raise MMError("var in $f already typed by an active  $f-statement: {}".format(var))
         floating = FloatingHyp(typecode, var)
-        frame.add_floating(floating, label)
+        self.frame_stack.add_floating(floating, label)
 
     def readstmt_aux(self, statement_type: StatementType, toks: Toks, end_token: str) -> Statement:
         """Read tokens from the input (assumed to be at the beginning of a
         statement) and return the list of tokens until the end_token
         (typically "$=" or "$.").
         """
-        statement_content = []
-        comment, tok = toks.readc()
-        self.append_comment_if_exists(comment)
-        while tok and tok != end_token:
-            variable = Var(tok)
-            constant = Const(tok)
-            condition = statement_type in {StatementType.definition,
-                                           StatementType.essential,
-                                           StatementType.assertion,
-                                           StatementType.provable}
-
-            if condition and not (self.is_constant_declared(constant) or self.frame_stack.lookup_variable(variable)):
-                raise MMError(f"Token {tok} is not an active symbol")
-            condition = statement_type in {StatementType.essential,
-                                           StatementType.assertion,
-                                           StatementType.provable}
-            if condition and self.frame_stack.lookup_variable(variable) and not self.frame_stack.lookup_floating(
-                    variable):
-                raise MMError(f"Variable {tok} in {statement_type}-statement is not typed  by an active $f-statement).")
-
-            symbol = Symbol(tok)
-            statement_content.append(symbol)
+        with phase('readstmt_aux'):
+            symbols = []
             comment, tok = toks.readc()
             self.append_comment_if_exists(comment)
-        if not tok:
-            raise MMError(f"Unclosed {statement_type}-statement at end of file.")
-        assert tok == end_token
-        return Statement(statement_content)
+            while tok and tok != end_token:
+                symbol_id = symbol_table.intern(tok)
+                is_variable = self.frame_stack.lookup_variable_id(symbol_id)
+                condition = statement_type in {StatementType.definition,
+                                               StatementType.essential,
+                                               StatementType.assertion,
+                                               StatementType.provable}
+
+                if condition and not (self._symbol_kinds.is_constant(symbol_id) or is_variable):
+                    raise MMError(f"Token {tok} is not an active symbol")
+                condition = statement_type in {StatementType.essential,
+                                               StatementType.assertion,
+                                               StatementType.provable}
+                if condition and is_variable and not self.frame_stack.lookup_floating(Var(tok)):
+                    raise MMError(f"Variable {tok} in {statement_type}-statement is not typed  by an active $f-statement).")
+
+                symbols.append(symbol_id)
+                comment, tok = toks.readc()
+                self.append_comment_if_exists(comment)
+            if not tok:
+                raise MMError(f"Unclosed {statement_type}-statement at end of file.")
+            assert tok == end_token
+            if statement_type == StatementType.end_token:
+                # proofs are long and never hashed: a packed array takes half the memory of a tuple
+                return Statement.from_symbols(array('I', symbols))
+            return Statement.from_symbols(tuple(symbols))
 
     def read_non_p_stmt(self, statement_type: StatementType, toks: Toks) -> Statement:
         """Read tokens from the input (assumed to be at the beginning of a
@@ -129,95 +151,114 @@ class MM:
         proof = self.readstmt_aux(StatementType.end_token, toks, end_token="$.")
         return stmt, proof
 
-    def read(self, toks: Toks) -> Iterable[Dict[str, str]]:
+    def read_statement(self, statement_type: StatementType, label: Optional[Label], toks: Toks) -> Optional[ParsedAssertion]:
+        """Read the statement whose keyword was just consumed and add it to the innermost frame.
 
-        pbar = tqdm()
-        current_frame = Frame()
-        self.frame_stack.push(current_frame)
-        label = None
-        prev_label = None
-        comment, tok = toks.readc()
-        self.append_comment_if_exists(comment)
-        while tok:
-            statement_type = StatementType.try_cast(tok)
+        $f and $e statements are registered in ``self.labels`` right away, $a and $p
+        statements are returned so that the caller decides when to register them.
+        """
+        if statement_type == StatementType.constant:
+            statement = self.read_non_p_stmt(statement_type, toks)
+            self.add_constants(statement)
+        elif statement_type == StatementType.variable:
+            statement = self.read_non_p_stmt(statement_type, toks)
+            self.add_variables(statement)
 
-            if statement_type == StatementType.constant:
-                statement = self.read_non_p_stmt(statement_type, toks)
-                self.add_constants(statement)
-            elif statement_type == StatementType.variable:
-                statement = self.read_non_p_stmt(statement_type, toks)
-                self.add_variables(current_frame, statement)
-
-            elif statement_type == StatementType.floating:
-                statement = self.read_non_p_stmt(statement_type, toks)
-                if not label:
-                    raise LabelNotDefinedError('$f')
-
-                if len(statement.statement_content) != 2:
-                    raise StatementLengthIncorrectError(statement)
-                typecode = Const(statement.statement_content[0].content)
-                variable = Var(statement.statement_content[1].content)
-                self.add_floating(current_frame, typecode, variable, label)
-                full_statement = FullStatement(label, StatementType.floating, statement)
-                self.labels[label] = full_statement
-                label = None
+        elif statement_type == StatementType.floating:
+            statement = self.read_non_p_stmt(statement_type, toks)
+            if not label:
+                raise LabelNotDefinedError('$f')
 
-            elif statement_type == StatementType.essential:
-                if not label:
-                    raise LabelNotDefinedError('$e')
-                statement = self.read_non_p_stmt(statement_type, toks)
-                current_frame.add_essential(statement, label)
-                self.labels[label] = FullStatement(label, StatementType.essential, statement)
-                label = None
+            if len(statement.statement_content) != 2:
+                raise StatementLengthIncorrectError(statement)
+            typecode = Const(statement.statement_content[0].content)
+            variable = Var(statement.statement_content[1].content)
+            self.add_floating(typecode, variable, label)
+            full_statement = FullStatement(label, StatementType.floating, statement)
+            self.labels[label] = full_statement
 
-            elif statement_type == StatementType.assertion:
-                if not label:
-                    raise LabelNotDefinedError('$a')
-                print(f'working with {label.name}')
-                comment = self.comments[-1]
-                self.comments = []
-                assertion = self.frame_stack.make_assertion(self.read_non_p_stmt(statement_type, toks))
-                builder = ClassBuilder()
-                builder.set_comment(comment)
-                builder.set_statement_name(label.name)
-                builder.set_assertion(assertion)
-                self.labels[label] = FullStatement(label, StatementType.assertion, assertion)
-                label = None
-                yield builder.build()
-                pbar.update()
+        elif statement_type == StatementType.essential:
+            if not label:
+                raise LabelNotDefinedError('$e')
+            statement = self.read_non_p_stmt(statement_type, toks)
+            self.frame_stack.add_essential(statement, label)
+            self.labels[label] = FullStatement(label, StatementType.essential, statement)
 
+        elif statement_type == StatementType.assertion:
+            if not label:
+                raise LabelNotDefinedError('$a')
+            comment = self.comments[-1] if self.comments else ''
+            self.comments = []
+            statement = self.read_non_p_stmt(statement_type, toks)
+            with phase('make_assertion'):
+                assertion = self.frame_stack.make_assertion(statement)
+            return ParsedAssertion(label, StatementType.assertion, assertion, proof=None, comment=comment)
 
-            elif statement_type == StatementType.provable:
-                if not label:
-                    raise LabelNotDefinedError('$p')
-                print(f'working with {label.name}')
-                comment = self.comments[-1]
-                self.comments = []
-                statement, proof = self.read_p_stmt(toks)
+        elif statement_type == StatementType.provable:
+            if not label:
+                raise LabelNotDefinedError('$p')
+            comment = self.comments[-1] if self.comments else ''
+            self.comments = []
+            statement, proof = self.read_p_stmt(toks)
+            with phase('make_assertion'):
                 assertion = self.frame_stack.make_assertion(statement)
+            return ParsedAssertion(label, StatementType.provable, assertion, proof=proof, comment=comment)
 
-                builder = ClassBuilder()
-                builder.set_comment(comment)
-                builder.set_statement_name(label.name)
-                builder.set_assertion(assertion)
-                verify(frame_stack=self.frame_stack, labels=self.labels, target_statement=assertion.statement, proof=proof, builder=builder)
-                self.labels[label] = FullStatement(label, StatementType.provable, assertion)
-                label = None
+        elif statement_type == StatementType.definition:
+            statement = self.read_non_p_stmt(statement_type, toks)
+            self.frame_stack.add_definitions(statement)
+        else:
+            raise UnknownTokenError(statement_type)
+        return None
 
-                yield builder.build()
-                pbar.update()
+    def replay_statement(self, toks: Toks, offset: int) -> Optional[ParsedAssertion]:
+        """Read the single (possibly labeled) statement starting at byte ``offset``, see :meth:`read_statement`."""
+        toks.seek(offset)
+        _, tok = toks.readc()
+        label = None
+        if tok and tok[0] != '$':
+            label = Label(tok)
+            _, tok = toks.readc()
+        statement_type = StatementType.try_cast(tok)
+        if statement_type is None:
+            raise UnknownTokenError(tok)
+        return self.read_statement(statement_type, label, toks)
 
-            elif statement_type == StatementType.definition:
-                statement = self.read_non_p_stmt(statement_type, toks)
-                current_frame.add_definitions(statement)
+    def iter_assertions(self, toks: Toks) -> Iterable[ParsedAssertion]:
+        """Read the whole database and yield every $a and $p statement.
+
+        A statement is yielded while its frame is still active on ``self.frame_stack``,
+        and its label is added to ``self.labels`` only when the consumer resumes, so a
+        $p can be verified against exactly the labels declared before it.
+        """
+        previous_profiler, toks.profiler = toks.profiler, active_profiler()
+        try:
+            yield from self._iter_assertions(toks)
+        finally:
+            toks.profiler = previous_profiler
+
+    def _iter_assertions(self, toks: Toks) -> Iterable[ParsedAssertion]:
+        self.frame_stack.push(Frame())
+        label = None
+        prev_label = None
+        comment, tok = toks.readc()
+        self.append_comment_if_exists(comment)
+        while tok:
+            statement_type = StatementType.try_cast(tok)
+
+            if statement_type is not None:
+                parsed = self.read_statement(statement_type, label, toks)
+                if parsed:
+                    yield parsed
+                    self.labels[label] = FullStatement(label, parsed.statement_type, parsed.assertion)
+                if statement_type in LABELED_STATEMENT_TYPES:
+                    label = None
             elif tok == '${':
-                current_frame = Frame()
-                self.frame_stack.push(current_frame)
+                self.frame_stack.push(Frame())
                 prev_label = label
                 label = None
             elif tok == '$}':
                 self.frame_stack.pop()
-                current_frame = self.frame_stack[-1]
                 label = prev_label
             elif tok == '$)':
                 raise UnexpectedClosingBracketError()
@@ -229,3 +270,169 @@ class MM:
                 raise UnknownTokenError(tok)
             comment, tok = toks.readc()
             self.append_comment_if_exists(comment)
+
+    def read(self,
+             toks: Toks,
+             verify_only: bool = False,
+             share_subterms: bool = False,
+             target: ProofTarget = ProofTarget.strings) -> Iterable[Union[Dict[str, str], VerificationResult]]:
+        """Verify and translate every $a/$p of the database, yielding :meth:`ClassBuilder.build` results.
+
+        With ``verify_only`` nothing is translated: a :class:`VerificationResult` is
+        yielded for every $p instead, and a failing proof does not stop the run.
+        With ``share_subterms`` every distinct statement of a proof is emitted once
+        and its ``x_N`` is reused wherever the statement occurs again.
+        ``target`` selects what the generated proofs pass between calls, see :class:`ProofTarget`.
+        Wrap the call in ``models.instrumentation.profiling`` to time its phases.
+        """
+        if verify_only:
+            yield from self._verify_all(toks)
+            return
+
+        pbar = tqdm()
+        profiler = active_profiler()
+        for parsed in self.iter_assertions(toks):
+            logger.debug('working with %s', parsed.label.name)
+            started = time.perf_counter()
+            builder = ClassBuilder(share_subterms=share_subterms, target=target)
+            builder.set_comment(parsed.comment)
+            builder.set_statement_name(parsed.label.name)
+            builder.set_assertion(parsed.assertion)
+            if parsed.statement_type == StatementType.provable:
+                with phase('verify'):
+                    verify(frame_stack=self.frame_stack, labels=self.labels, target_statement=parsed.assertion.statement, proof=parsed.proof, builder=builder)
+
+            with phase('build'):
+                result = builder.build()
+            if profiler is not None:
+                profiler.record_theorem(parsed.label.name, time.perf_counter() - started)
+            yield result
+            pbar.update()
+
+    def _verify_all(self, toks: Toks) -> Iterable[VerificationResult]:
+        profiler = active_profiler()
+        for parsed in self.iter_assertions(toks):
+            if parsed.statement_type != StatementType.provable:
+                continue
+            result = check_theorem(parsed.label, self.frame_stack, self.labels, parsed.assertion.statement, parsed.proof)
+            if not result.passed:
+                logger.info('%s failed: %s', result.label, result.error)
+            if profiler is not None:
+                profiler.record_theorem(result.label, result.seconds)
+            yield result
+
+    def parse(self, toks: Toks) -> None:
+        """Read the whole database without verifying or translating it.
+
+        Besides the label table, the frame context of every $p statement, its proof
+        and the comments of all assertions are kept, which is everything needed to
+        verify or translate any theorem later, e.g. after :meth:`load_snapshot`.
+        """
+        for parsed in self.iter_assertions(toks):
+            self.comments_by_label[parsed.label] = parsed.comment
+            if parsed.statement_type == StatementType.provable:
+                self.frame_contexts[parsed.label] = self.frame_stack.snapshot()
+                self.proofs[parsed.label] = parsed.proof
+
+    def dump_snapshot(self, snapshot_path: str, source_path: str) -> None:
+        """Write the parsed state to ``snapshot_path``, tagged with the content hash of ``source_path``."""
+        payload = {
+            'symbol_table': symbol_table,  # restored first, so the ids of everything after it can be translated
+            'symbol_kinds': self._symbol_kinds,
+            'labels': self.labels,
+            'frame_contexts': self.frame_contexts,
+            'proofs': self.proofs,
+            'comments_by_label': self.comments_by_label,
+            'frame_stack': self.frame_stack.snapshot(),
+        }
+        write_snapshot(snapshot_path, source_path, payload)
+
+    @classmethod
+    def load_snapshot(cls, snapshot_path: str, source_path: str) -> 'MM':
+        """Restore a database written by :meth:`dump_snapshot`.
+
+        Raises ``StaleSnapshotError`` when ``source_path`` changed since the snapshot was taken.
+        """
+        try:
+            payload = read_snapshot(snapshot_path, source_path)
+        finally:
+            symbol_table.end_restore()
+        mm = cls()
+        mm._symbol_kinds = payload['symbol_kinds']
+        mm.labels = payload['labels']
+        mm.frame_contexts = payload['frame_contexts']
+        mm.proofs = payload['proofs']
+        mm.comments_by_label = payload['comments_by_label']
+        mm.frame_stack = payload['frame_stack']
+        return mm
+
+    @classmethod
+    def from_database(cls, source_path: str, snapshot_path: Optional[str] = None) -> 'MM':
+        """Return the parsed database, reusing a fresh snapshot and refreshing a missing or stale one."""
+        snapshot_path = snapshot_path or f'{source_path}.snapshot'
+        if is_snapshot_fresh(snapshot_path, source_path):
+            return cls.load_snapshot(snapshot_path, source_path)
+        mm = cls()
+        with Toks(source_path) as toks:
+            mm.parse(toks)
+        mm.dump_snapshot(snapshot_path, source_path)
+        return mm
+
+    @classmethod
+    def reconstruct(cls,
+                    source_path: str,
+                    label_name: str,
+                    index: Optional[LabelIndex] = None,
+                    proof: Optional[Statement] = None) -> Dict[str, str]:
+        """Translate the single theorem ``label_name`` of the database at ``source_path``.
+
+        Instead of walking the whole file, only the declarations of the scopes enclosing
+        the theorem and of the assertions its proof refers to are read, at the offsets
+        recorded in the label index. ``proof`` replaces the proof written in the file.
+        """
+        index = index or LabelIndex.from_database(source_path)
+        target = index.get(label_name)
+        needed = {label_name: target}
+        for name in target.dependencies:
+            entry = index.labels.get(name)
+            if entry is not None and entry.statement_type in {StatementType.assertion, StatementType.provable}:
+                needed[name] = entry
+
+        mm = cls()
+        mm.frame_stack.push(Frame())
+        outermost = index.scopes[OUTERMOST_SCOPE].statements
+        position = 0
+        with Toks(source_path) as toks:
+            for name, entry in sorted(needed.items(), key=lambda item: item[1].offset):
+                # declarations of the outermost scope are replayed once, in file order
+                while position < len(outermost) and outermost[position] < entry.offset:
+                    mm.replay_statement(toks, outermost[position])
+                    position += 1
+                for scope in entry.scopes[1:]:
+                    mm.frame_stack.push(Frame())
+                    for offset in index.scope_statements(scope, before=entry.offset):
+                        mm.replay_statement(toks, offset)
+
+                mm.comments = []
+                if entry.comment_offset is not None:
+                    toks.seek(entry.comment_offset)
+                    comment, _ = toks.readc()
+                    mm.append_comment_if_exists(comment)
+                parsed = mm.replay_statement(toks, entry.offset)
+                if name == label_name:
+                    builder = ClassBuilder()
+                    builder.set_comment(parsed.comment)
+                    builder.set_statement_name(parsed.label.name)
+                    builder.set_assertion(parsed.assertion)
+                    if parsed.statement_type == StatementType.provable:
+                        verify(frame_stack=mm.frame_stack,
+                               labels=mm.labels,
+                               target_statement=parsed.assertion.statement,
+                               proof=proof or parsed.proof,
+                               builder=builder)
+                    return builder.build()
+                mm.labels[parsed.label] = FullStatement(parsed.label, parsed.statement_type, parsed.assertion)
+
+                for _ in entry.scopes[1:]:
+                    mm.frame_stack.pop()
+        raise LabelNotFoundError(label_name)
@@ -11,6 +11,11 @@ class DictWithCollisions:
         else:
             self._inner_dict[key].append(value)
 
+    def copy(self) -> 'DictWithCollisions':
+        copied = DictWithCollisions.__new__(DictWithCollisions)
+        copied._inner_dict = {key: list(values) for key, values in self._inner_dict.items()}
+        return copied
+
     def iter_values(self):
         for l in self._inner_dict.values():
             for v in l:
@@ -63,9 +63,15 @@ class LabelMultipleDefinedError(Exception):
         super().__init__(message)
 
 
-class CompressedProofsError(Exception):
+class CompressedProofFormatError(Exception):
+    def __init__(self, reason):
+        message = f'Malformed compressed proof: {reason}'
+        super().__init__(message)
+
+
+class IncompleteProofError(Exception):
     def __init__(self):
-        message = 'Compressed proofs are not supported'
+        message = 'Proof is incomplete: it contains unknown steps "?"'
         super().__init__(message)
 
 
@@ -91,3 +97,40 @@ class StatementLengthIncorrectError(Exception):
     def __init__(self, statement):
         message = f'$f must have length 2 but is {statement}'
         super().__init__(message)
+
+
+class StaleSnapshotError(Exception):
+    def __init__(self, snapshot_path, source_path):
+        message = f'Snapshot {snapshot_path} was not built from the current content of {source_path}'
+        super().__init__(message)
+
+
+class SnapshotFormatError(Exception):
+    def __init__(self, snapshot_path, reason):
+        message = f'Cannot read snapshot {snapshot_path}: {reason}'
+        super().__init__(message)
+
+
+class ManifestFormatError(Exception):
+    def __init__(self, manifest_path, reason):
+        message = f'Cannot read translation manifest {manifest_path}: {reason}'
+        super().__init__(message)
+
+
+class SyntaxParseError(Exception):
+    def __init__(self, statement, reason):
+        message = f'Cannot parse "{statement}" with the syntax axioms: {reason}'
+        super().__init__(message)
+
+
+class VerificationStoreFormatError(Exception):
+    def __init__(self, store_path, reason):
+        message = f'Cannot read verification results {store_path}: {reason}'
+        super().__init__(message)
+
+
+class PythonicNameCollisionError(Exception):
+    def __init__(self, map_path, collisions):
+        described = ', '.join(f'{label} as {name}' for label, name in collisions)
+        message = f'Names already used in generated code were given differently in {map_path}: {described}'
+        super().__init__(message)
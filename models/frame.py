@@ -12,6 +12,7 @@ class Frame:
         self._floatings: list[FloatingHyp] = []
         self._floating_labels: dict[Var, Label] = {}
         self._essentials: list[EssentialHyp] = []
+        self._essential_labels_order: list[Label] = []
         self._essential_labels: DictWithCollisions = DictWithCollisions(Statement, Label)
         # Note: both self._essentials and self._essential_labels are needed since the keys of
         # self._essential_labels form a set, but the order and repetitions of self._essentials
@@ -21,8 +22,24 @@ class Frame:
         # It is by design: https://groups.google.com/g/metamath/c/ZEso3iMmJD4/m/k6Zo00iGAQAJ
         # so instead of self._essential_labels be dictionary, it needs to be dictionary with repetitions for collision (or use label as a additional key)
 
+        self.version = 0  # incremented on every change, lets FrameStack.snapshot reuse unchanged copies
+
+    def copy(self) -> 'Frame':
+        """Return an independent copy of the frame, e.g. to keep the frame context of a statement."""
+        frame = Frame()
+        frame._variables = set(self._variables)
+        frame._definitions = set(self._definitions)
+        frame._floatings = list(self._floatings)
+        frame._floating_labels = dict(self._floating_labels)
+        frame._essentials = list(self._essentials)
+        frame._essential_labels_order = list(self._essential_labels_order)
+        frame._essential_labels = self._essential_labels.copy()
+        frame.version = self.version
+        return frame
+
     def add_variable(self, variable: Var):
         self._variables.add(variable)
+        self.version += 1
 
     def get_variables(self) -> Iterable[Var]:
         return self._variables
@@ -30,6 +47,7 @@ class Frame:
     def add_floating(self, floating: FloatingHyp, label: Label):
         self._floatings.append(floating)
         self._floating_labels[floating.variable] = label
+        self.version += 1
 
     def get_floatings(self) -> Iterable[FloatingHyp]:
         return self._floatings
@@ -37,12 +55,14 @@ class Frame:
     def is_floating_variable_declared(self, variable: Var):
         return variable in self._floating_labels
 
-    def add_definitions(self, statement: Statement):
+    def add_definitions(self, statement: Statement) -> list[Definition]:
 
         variable_list = [Var(e.content) for e in statement.statement_content]
         product = itertools.product(variable_list, variable_list)
         definitions = [Definition(x=min(x, y), y=max(x, y)) for x, y in product if x != y]
         self._definitions.update(definitions)
+        self.version += 1
+        return definitions
 
     def get_definitions(self) -> Iterable[Definition]:
         return self._definitions
@@ -51,13 +71,19 @@ class Frame:
         return self._floating_labels[variable]
 
     def add_essential(self, statement: Statement, label: Label):
-        essential = EssentialHyp(statement_content=statement.statement_content)
+        essential = EssentialHyp.from_symbols(statement.symbols)
         self._essentials.append(essential)
+        self._essential_labels_order.append(label)
         self._essential_labels.add(statement, label)
+        self.version += 1
 
     def get_essentials(self) -> Iterable[EssentialHyp]:
         return self._essentials
 
+    def get_essential_labels(self) -> Iterable[Label]:
+        """Return the labels of the essential hypotheses in declaration order."""
+        return self._essential_labels_order
+
     def get_floating_and_essential_labels(self) -> set[Label]:
         essential = list(self._essential_labels.iter_values())
         floating = list(self._floating_labels.values())
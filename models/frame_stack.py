@@ -2,53 +2,186 @@ import itertools
 from typing import Optional
 
 from models.frame import Frame
-from models.mm_models import Var, Label, Definition, Statement, Assertion
+from models.mm_models import Var, Label, Definition, Statement, Assertion, FloatingHyp
+from models.symbol_table import symbol_table
+
+
+class _ActiveIndex:
+    """Merged variables, floating hypotheses and disjoint pairs of all active frames.
+
+    Every frame entering the index opens an undo log of the keys it added, so
+    leaving the frame (``$}``) rolls the index back without rebuilding it.
+    """
+
+    def __init__(self) -> None:
+        self.variable_ids: set[int] = set()
+        self.floating_labels: dict[Var, Label] = {}
+        self.definitions: set[Definition] = set()
+        self._undo: list[list[tuple[str, object]]] = []
+
+    def enter(self, frame: Frame) -> None:
+        self._undo.append([])
+        for variable in frame.get_variables():
+            self.add_variable(variable.symbol_id)
+        for floating in frame.get_floatings():
+            self.add_floating(floating.variable, frame.get_floating_label(floating.variable))
+        for definition in frame.get_definitions():
+            self.add_definition(definition)
+
+    def leave(self) -> None:
+        for kind, key in reversed(self._undo.pop()):
+            if kind == 'variable':
+                self.variable_ids.remove(key)
+            elif kind == 'floating':
+                del self.floating_labels[key]
+            else:
+                self.definitions.remove(key)
+
+    def add_variable(self, symbol_id: int) -> None:
+        if symbol_id not in self.variable_ids:
+            self.variable_ids.add(symbol_id)
+            self._undo[-1].append(('variable', symbol_id))
+
+    def add_floating(self, variable: Var, label: Label) -> None:
+        if variable not in self.floating_labels:
+            self.floating_labels[variable] = label
+            self._undo[-1].append(('floating', variable))
+
+    def add_definition(self, definition: Definition) -> None:
+        # an inner scope may repeat a pair of an outer one: only the first one is undone
+        if definition not in self.definitions:
+            self.definitions.add(definition)
+            self._undo[-1].append(('definition', definition))
 
 
 class FrameStack(list[Frame]):
     """Class of frame stacks, which extends lists (considered and used as
     stacks).
+
+    Lookups go through a merged index of the active frames. It is kept up to date
+    by ``push``/``pop`` and the ``add_*`` methods, which is why declarations must
+    be added through the stack rather than to ``self[-1]`` directly. Stacks built
+    otherwise (e.g. by :meth:`snapshot` or unpickling) index themselves lazily.
     """
+    _active: Optional[_ActiveIndex] = None
 
     def push(self, frame: Frame) -> None:
         """Push an empty frame to the stack."""
         self.append(frame)
 
+    def append(self, frame: Frame) -> None:
+        super().append(frame)
+        if self._active is not None:
+            self._active.enter(frame)
+
+    def pop(self, index: int = -1) -> Frame:
+        frame = super().pop(index)
+        self.__dict__.get('_snapshot_cache', {}).pop(id(frame), None)
+        if self._active is not None:
+            if index in {-1, len(self)}:
+                self._active.leave()
+            else:
+                self._active = None
+        return frame
+
+    def __getstate__(self):
+        # the index and the snapshot cache are rebuilt on demand
+        return {key: value for key, value in self.__dict__.items() if key not in {'_active', '_snapshot_cache'}}
+
+    def _active_index(self) -> _ActiveIndex:
+        active = self._active
+        if active is None:
+            active = self._active = _ActiveIndex()
+            for frame in self:
+                active.enter(frame)
+        return active
+
+    def snapshot(self) -> 'FrameStack':
+        """Return a frozen copy of the active frames (the frame context of the current statement).
+
+        Copies of frames that did not change since the previous snapshot are shared,
+        so consecutive statements of one scope reference the same frame objects.
+        """
+        cache: dict[int, tuple[Frame, Frame]] = self.__dict__.setdefault('_snapshot_cache', {})
+        frozen = FrameStack()
+        for frame in self:
+            cached = cache.get(id(frame))
+            if cached is None or cached[0] is not frame or cached[1].version != frame.version:
+                cached = (frame, frame.copy())
+                cache[id(frame)] = cached
+            frozen.append(cached[1])
+        return frozen
+
+    def add_variable(self, variable: Var) -> None:
+        """Declare a variable in the innermost frame."""
+        self[-1].add_variable(variable)
+        if self._active is not None:
+            self._active.add_variable(variable.symbol_id)
+
+    def add_floating(self, floating: FloatingHyp, label: Label) -> None:
+        """Add a floating hypothesis to the innermost frame."""
+        self[-1].add_floating(floating, label)
+        if self._active is not None:
+            self._active.add_floating(floating.variable, label)
+
+    def add_essential(self, statement: Statement, label: Label) -> None:
+        """Add an essential hypothesis to the innermost frame."""
+        self[-1].add_essential(statement, label)
+
+    def add_definitions(self, statement: Statement) -> None:
+        """Add the disjoint variable pairs of a $d statement to the innermost frame."""
+        definitions = self[-1].add_definitions(statement)
+        if self._active is not None:
+            for definition in definitions:
+                self._active.add_definition(definition)
 
     def lookup_variable(self, variable: Var) -> bool:
         """Return whether the given token is an active variable."""
-        for frame in self:
-            if variable in set(frame.get_variables()):
-                return True
+        return variable.symbol_id in self._active_index().variable_ids
 
-        return False
+    def lookup_variable_id(self, symbol_id: int) -> bool:
+        """Return whether the interned symbol ``symbol_id`` is an active variable."""
+        return symbol_id in self._active_index().variable_ids
 
     def lookup_definition(self, x: Var, y: Var) -> bool:
         """Return whether the given ordered pair of tokens belongs to an
         active disjoint variable statement.
         """
         definition = Definition(x=min(x, y), y=(max(x, y)))
-        for frame in self:
-            if definition in set(frame.get_definitions()):
-                return True
+        return definition in self._active_index().definitions
 
-        return False
+    def active_variable_ids(self) -> set[int]:
+        """Return the (live) set of the ids of the active variables."""
+        return self._active_index().variable_ids
+
+    def disjoint_pairs(self) -> frozenset[tuple[int, int]]:
+        """Return the active disjoint variable pairs as (smaller id, larger id) tuples."""
+        pairs = set()
+        for definition in self._active_index().definitions:
+            x, y = definition.x.symbol_id, definition.y.symbol_id
+            pairs.add((x, y) if x < y else (y, x))
+        return frozenset(pairs)
 
     def lookup_floating(self, var: Var) -> Optional[Label]:
         """Return the label of the active floating hypothesis which types the
         given variable.
         """
-        for frame in self:
-            try:
-                return frame.get_floating_label(var)
-            except KeyError:
-                pass
-        return None  # Variable is not actively typed
+        return self._active_index().floating_labels.get(var)  # None when the variable is not actively typed
 
 
+    def get_mandatory_hypothesis_labels(self, assertion: Assertion) -> list[Label]:
+        """Return the labels of the mandatory hypotheses of the given assertion
+        in the order in which a proof consumes them: floating, then essential.
+        """
+        labels = [self.lookup_floating(floating.variable) for floating in assertion.floating]
+        for frame in self:
+            labels.extend(frame.get_essential_labels())
+        return labels
+
     def find_variables(self, statement: Statement) -> set[Var]:
         """Return the set of variables in the given statement."""
-        return {Var(symbol.content) for symbol in statement.statement_content if self.lookup_variable(Var(symbol.content))}
+        variable_ids = self._active_index().variable_ids
+        return {Var(symbol_table.name(symbol_id)) for symbol_id in set(statement.symbols) if symbol_id in variable_ids}
 
     def make_assertion(self, statement: Statement) -> Assertion:
         """Return a quadruple (disjoint variable conditions, floating
@@ -60,12 +193,11 @@ class FrameStack(list[Frame]):
             for essential in frame.get_essentials():
                 essential_hypothesis.append(essential)
 
-        mand_vars = set()
+        variable_ids = self._active_index().variable_ids
+        mand_var_ids = set()
         for hypotheses in itertools.chain(essential_hypothesis, [statement]):
-            for tok in hypotheses.statement_content:
-                variable = Var(tok.content)
-                if self.lookup_variable(variable):
-                    mand_vars.add(variable)
+            mand_var_ids.update(symbol_id for symbol_id in hypotheses.symbols if symbol_id in variable_ids)
+        mand_vars = {Var(symbol_table.name(symbol_id)) for symbol_id in mand_var_ids}
 
         definitions = set()
         for frame in self:
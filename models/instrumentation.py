@@ -0,0 +1,98 @@
+"""Opt-in timing of the phases of reading, verifying and translating a database.
+
+Nothing is measured unless a :class:`PhaseProfiler` is activated with :func:`profiling`;
+the instrumented code only calls :func:`phase`, which is a no-op otherwise.
+"""
+import heapq
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_NULL_PHASE = nullcontext()
+
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0  # excluding the time spent in phases nested in this one
+    calls: int = 0
+
+
+class PhaseProfiler:
+    """Accumulates wall time and call counts per phase and remembers the slowest theorems."""
+
+    def __init__(self, slowest: int = 10) -> None:
+        self.phases: Dict[str, PhaseStats] = {}
+        self._slowest_amount = slowest
+        self._slowest: List[Tuple[float, str]] = []  # min-heap of (seconds, label)
+        self._nested: List[float] = []  # time spent in child phases, one entry per open phase
+        self._started = time.perf_counter()
+        self.statements = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._add(name, elapsed - self._nested.pop())
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def _add(self, name: str, seconds: float) -> None:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.seconds += seconds
+        stats.calls += 1
+
+    def record_theorem(self, label: str, seconds: float) -> None:
+        self.statements += 1
+        if len(self._slowest) < self._slowest_amount:
+            heapq.heappush(self._slowest, (seconds, label))
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, label))
+
+    def report(self) -> dict:
+        total = time.perf_counter() - self._started
+        return {
+            'total_seconds': round(total, 6),
+            'statements': self.statements,
+            'statements_per_second': round(self.statements / total, 3) if total else None,
+            'phases': {name: {'seconds': round(stats.seconds, 6), 'calls': stats.calls}
+                       for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].seconds)},
+            'slowest': [{'label': label, 'seconds': round(seconds, 6)}
+                        for seconds, label in sorted(self._slowest, reverse=True)],
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+_active: Optional[PhaseProfiler] = None
+
+
+def active_profiler() -> Optional[PhaseProfiler]:
+    return _active
+
+
+def phase(name: str):
+    """Context manager timing phase ``name`` in the active profiler, if any."""
+    if _active is None:
+        return _NULL_PHASE
+    return _active.phase(name)
+
+
+@contextmanager
+def profiling(profiler: PhaseProfiler) -> Iterator[PhaseProfiler]:
+    """Make ``profiler`` the active one for the duration of the block."""
+    global _active
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
@@ -0,0 +1,153 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.errors import LabelNotFoundError, MMError, UnexpectedClosingBracketError
+from models.mm_models import StatementType
+from models.snapshot import is_snapshot_fresh, read_snapshot, write_snapshot
+from models.toks import Toks
+
+INDEX_FORMAT = 'metamath2py-label-index'
+INDEX_VERSION = 1
+
+OUTERMOST_SCOPE = 0
+
+
+@dataclass
+class ScopeEntry:
+    """A ``${ ... $}`` block of the database (the outermost scope has no brackets)."""
+    offset: int
+    parent: Optional[int]
+    # offsets of the $c, $v, $f, $e and $d statements declared directly in this scope, in file order
+    statements: List[int] = field(default_factory=list)
+
+
+@dataclass
+class LabelEntry:
+    """Where a labeled statement lives in the database and what its proof refers to."""
+    offset: int
+    statement_type: StatementType
+    scopes: Tuple[int, ...]  # enclosing scopes, from the outermost one to the innermost one
+    comment_offset: Optional[int] = None
+    dependencies: Tuple[str, ...] = ()
+
+
+def _proof_dependencies(proof: List[str]) -> Tuple[str, ...]:
+    if proof and proof[0] == '(':
+        closing = proof.index(')') if ')' in proof else len(proof)
+        proof = proof[1:closing]
+    return tuple(dict.fromkeys(tok for tok in proof if tok != '?'))
+
+
+class LabelIndex:
+    """Sidecar index of a Metamath database giving random access to single statements.
+
+    For every label it keeps the byte offset of the statement, the chain of scopes
+    enclosing it and the labels its proof refers to; for every scope it keeps the
+    offsets of the declarations made in it. This is enough to rebuild the frame of a
+    theorem and the assertions it uses without reading the rest of the file.
+    """
+
+    def __init__(self, labels: Dict[str, LabelEntry], scopes: List[ScopeEntry]) -> None:
+        self.labels = labels
+        self.scopes = scopes
+
+    @classmethod
+    def build(cls, toks: Toks) -> 'LabelIndex':
+        """Index the database in a single lexical pass over its tokens."""
+        labels: Dict[str, LabelEntry] = {}
+        scopes = [ScopeEntry(offset=0, parent=None)]
+        chain = [OUTERMOST_SCOPE]
+
+        label: Optional[Tuple[str, int]] = None
+        comment_offset: Optional[int] = None
+        statement: Optional[LabelEntry] = None
+        in_statement = False
+        proof: Optional[List[str]] = None
+
+        tokens = toks.iter_tokens()
+        for tok, offset in tokens:
+            if tok == '$(':
+                comment_offset = offset
+                for tok, _ in tokens:
+                    if tok == '$)':
+                        break
+                else:
+                    raise MMError("Unclosed comment at end of file.")
+                continue
+
+            if in_statement:
+                if tok == '$.':
+                    if statement is not None and proof is not None:
+                        statement.dependencies = _proof_dependencies(proof)
+                    in_statement, statement, proof = False, None, None
+                elif proof is not None:
+                    proof.append(tok)
+                elif tok == '$=' and statement is not None and statement.statement_type == StatementType.provable:
+                    proof = []
+                continue
+
+            statement_type = StatementType.try_cast(tok)
+            if statement_type in {StatementType.constant, StatementType.variable, StatementType.definition}:
+                scopes[chain[-1]].statements.append(offset)
+                in_statement = True
+            elif statement_type is not None and statement_type != StatementType.end_token:
+                if label is None:
+                    raise MMError(f'{statement_type} must have label')
+                name, label_offset = label
+                statement = LabelEntry(label_offset, statement_type, tuple(chain))
+                labels[name] = statement
+                if statement_type in {StatementType.floating, StatementType.essential}:
+                    scopes[chain[-1]].statements.append(label_offset)
+                else:
+                    statement.comment_offset = comment_offset
+                    comment_offset = None
+                label = None
+                in_statement = True
+            elif tok == '${':
+                scopes.append(ScopeEntry(offset=offset, parent=chain[-1]))
+                chain.append(len(scopes) - 1)
+            elif tok == '$}':
+                if len(chain) == 1:
+                    raise MMError("Unexpected '$}' in the outermost scope")
+                chain.pop()
+            elif tok == '$)':
+                raise UnexpectedClosingBracketError()
+            elif tok[0] != '$':
+                label = (tok, offset)
+            else:
+                raise MMError(f"Unknown token: '{tok}'.")
+
+        return cls(labels, scopes)
+
+    def get(self, name: str) -> LabelEntry:
+        try:
+            return self.labels[name]
+        except KeyError:
+            raise LabelNotFoundError(name)
+
+    def scope_statements(self, scope: int, before: int) -> Iterable[int]:
+        """Offsets of the declarations made directly in ``scope`` before byte offset ``before``."""
+        for offset in self.scopes[scope].statements:
+            if offset >= before:
+                break
+            yield offset
+
+    def dump(self, index_path: str, source_path: str) -> None:
+        write_snapshot(index_path, source_path, (self.labels, self.scopes),
+                       snapshot_format=INDEX_FORMAT, version=INDEX_VERSION)
+
+    @classmethod
+    def load(cls, index_path: str, source_path: str) -> 'LabelIndex':
+        labels, scopes = read_snapshot(index_path, source_path, snapshot_format=INDEX_FORMAT, version=INDEX_VERSION)
+        return cls(labels, scopes)
+
+    @classmethod
+    def from_database(cls, source_path: str, index_path: Optional[str] = None) -> 'LabelIndex':
+        """Return the index of ``source_path``, rebuilding the sidecar file when it is missing or stale."""
+        index_path = index_path or f'{source_path}.index'
+        if is_snapshot_fresh(index_path, source_path, snapshot_format=INDEX_FORMAT, version=INDEX_VERSION):
+            return cls.load(index_path, source_path)
+        with Toks(source_path) as toks:
+            index = cls.build(toks)
+        index.dump(index_path, source_path)
+        return index
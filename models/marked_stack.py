@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Sequence
 
 from models.mm_models import Statement
 
@@ -10,19 +10,43 @@ class MarkedStackSample:
     statement: Statement
 
 class MarkedStack:
-    def __init__(self):
+    def __init__(self, share_subterms: bool = False):
         self._stack: List[MarkedStackSample] = []
         self._counter: int = 1
         self.removed = []
+        # with share_subterms: the first sample marked for every distinct statement (hash-consing)
+        self._shared: Optional[Dict[Sequence[int], MarkedStackSample]] = {} if share_subterms else None
 
     def append(self, statement: Statement):
         sample = MarkedStackSample(f'x_{self._counter}', statement)
         self._stack.append(sample)
         self._counter += 1
+        if self._shared is not None:
+            self._shared.setdefault(statement.symbols, sample)
+
+    def append_shared(self, statement: Statement) -> bool:
+        """Push the sample of an equal statement marked earlier, if subterms are shared and there is one.
+
+        Returns whether it was pushed; otherwise the statement still has to be appended.
+        """
+        if self._shared is None:
+            return False
+        sample = self._shared.get(statement.symbols)
+        if sample is None:
+            return False
+        self._stack.append(sample)
+        return True
+
+    def append_sample(self, sample: MarkedStackSample):
+        """Push an already marked sample again, reusing its mark instead of creating a new one."""
+        self._stack.append(sample)
 
     def get_last_element_mark(self):
         return self._stack[-1].mark
 
+    def get_last_element(self) -> MarkedStackSample:
+        return self._stack[-1]
+
     def __len__(self):
         return len(self._stack)
 
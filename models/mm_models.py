@@ -1,7 +1,9 @@
-from typing import Union, List
+from typing import Container, Union, List, Optional, Iterable, Sequence, Tuple
 from dataclasses import dataclass
 from strenum import StrEnum
 
+from models.symbol_table import symbol_table
+
 
 @dataclass
 class Label:
@@ -18,6 +20,10 @@ class Label:
 class Symbol:
     content: str  # while reading, it is not simple to determine if this is a variable or constant, so because of that here is str type
 
+    @property
+    def symbol_id(self) -> int:
+        return symbol_table.intern(self.content)
+
     def __hash__(self):
         return self.content.__hash__()
 
@@ -27,6 +33,17 @@ class Symbol:
     def __repr__(self):
         return self.__str__()
 
+
+_symbol_views: List[Symbol] = []
+
+
+def symbol_view(symbol_id: int) -> Symbol:
+    """Return the shared Symbol standing for an interned symbol id."""
+    while len(_symbol_views) <= symbol_id:
+        _symbol_views.append(Symbol(symbol_table.name(len(_symbol_views))))
+    return _symbol_views[symbol_id]
+
+
 @dataclass
 class Var(Symbol):
 
@@ -94,26 +111,67 @@ class StatementType(StrEnum):
             return None
 
 
-@dataclass
 class Statement:
-    statement_content: list[Symbol]
+    """String of math symbols, kept as a tuple of ids interned in ``models.symbol_table``
+    (proofs use a packed ``array('I')`` instead).
+
+    ``statement_content`` gives the same string as ``Symbol`` views for the code builders.
+    """
+    __slots__ = ('symbols', '_variable_ids')
+
+    def __init__(self, statement_content: Iterable[Symbol] = ()) -> None:
+        self.symbols: Tuple[int, ...] = symbol_table.intern_all(symbol.content for symbol in statement_content)
+        self._variable_ids: Optional[frozenset[int]] = None
+
+    @classmethod
+    def from_symbols(cls, symbols: Sequence[int]) -> 'Statement':
+        statement = cls.__new__(cls)
+        statement.symbols = symbols
+        statement._variable_ids = None
+        return statement
+
+    def variable_ids(self, active_variable_ids: Container[int]) -> frozenset[int]:
+        """Return the ids of the variables occurring in the statement, computed on the first call.
+
+        A symbol is either always a variable or always a constant wherever a statement
+        using it is valid, so the cached set does not depend on the frame it was computed in.
+        """
+        if self._variable_ids is None:
+            self._variable_ids = frozenset(symbol_id for symbol_id in self.symbols if symbol_id in active_variable_ids)
+        return self._variable_ids
+
+    @property
+    def statement_content(self) -> List[Symbol]:
+        return [symbol_view(symbol_id) for symbol_id in self.symbols]
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.symbols == other.symbols
 
     def __hash__(self):
-        return tuple(self.statement_content).__hash__()
+        return self.symbols.__hash__()
+
+    def __reduce__(self):
+        return _restore_statement, (self.__class__, self.symbols)
 
     def __str__(self):
-        content = " ".join([str(s) for s in self.statement_content])
+        content = " ".join(symbol_table.names(self.symbols))
         return f'"{content}"'
 
     def __repr__(self):
         return self.__str__()
 
 
-@dataclass
+def _restore_statement(cls, symbols: Sequence[int]) -> Statement:
+    return cls.from_symbols(symbol_table.restore_ids(symbols))
+
+
 class EssentialHyp(Statement):
+    __slots__ = ()
 
     def __str__(self):
-        return f'EssentialHyp: {" ".join([str(s) for s in self.statement_content])}'
+        return f'EssentialHyp: {" ".join(symbol_table.names(self.symbols))}'
 
     def __repr__(self):
         return self.__str__()
@@ -154,6 +212,12 @@ class Assertion:
     essential: List[EssentialHyp]
     statement: Statement
 
+    def __getstate__(self):
+        # substitution templates compiled by the verifier hold interned ids: they are rebuilt on demand
+        state = self.__dict__.copy()
+        state.pop('_templates', None)
+        return state
+
 
 @dataclass
 class FullStatement:
@@ -166,3 +230,22 @@ class FullStatement:
 
     def __repr__(self):
         return self.__str__()
+
+
+@dataclass
+class ParsedAssertion:
+    """An $a or $p statement as read from the database, together with the comment preceding it."""
+    label: Label
+    statement_type: StatementType
+    assertion: Assertion
+    proof: Optional[Statement]
+    comment: str
+
+
+@dataclass
+class VerificationResult:
+    """Outcome of checking the proof of one $p statement."""
+    label: str
+    passed: bool
+    seconds: float
+    error: Optional[str] = None
@@ -0,0 +1,87 @@
+import gc
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from typing import Any
+
+from models.errors import SnapshotFormatError, StaleSnapshotError
+
+SNAPSHOT_FORMAT = 'metamath2py-mm-snapshot'
+SNAPSHOT_VERSION = 2
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class SnapshotHeader:
+    format: str
+    version: int
+    source_sha256: str
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_snapshot(snapshot_path: str, source_path: str, payload: Any,
+                   snapshot_format: str = SNAPSHOT_FORMAT, version: int = SNAPSHOT_VERSION) -> None:
+    """Atomically write ``payload`` preceded by a header identifying the source file content."""
+    header = SnapshotHeader(format=snapshot_format, version=version, source_sha256=file_sha256(source_path))
+    tmp_path = f'{snapshot_path}.tmp{os.getpid()}'
+    try:
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_snapshot(snapshot_path: str, source_path: str,
+                  snapshot_format: str = SNAPSHOT_FORMAT, version: int = SNAPSHOT_VERSION) -> Any:
+    """Return the payload of a snapshot, checking its format, version and source hash first.
+
+    The header is read before the payload, so a stale snapshot is rejected without unpickling it.
+    """
+    with open(snapshot_path, 'rb') as file:
+        try:
+            header = pickle.load(file)
+        except Exception as exc:
+            raise SnapshotFormatError(snapshot_path, f'unreadable header ({exc})')
+        if not isinstance(header, SnapshotHeader) or header.format != snapshot_format:
+            raise SnapshotFormatError(snapshot_path, f'not a {snapshot_format} file')
+        if header.version != version:
+            raise SnapshotFormatError(snapshot_path, f'version {header.version}, expected {version}')
+        if header.source_sha256 != file_sha256(source_path):
+            raise StaleSnapshotError(snapshot_path, source_path)
+        # the payload is a large acyclic graph of small objects: the cyclic GC would only slow the load down
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.load(file)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+
+def is_snapshot_fresh(snapshot_path: str, source_path: str,
+                      snapshot_format: str = SNAPSHOT_FORMAT, version: int = SNAPSHOT_VERSION) -> bool:
+    """Return whether ``snapshot_path`` exists and matches the current content of ``source_path``."""
+    if not os.path.isfile(snapshot_path):
+        return False
+    try:
+        with open(snapshot_path, 'rb') as file:
+            header = pickle.load(file)
+    except Exception:
+        return False
+    return (isinstance(header, SnapshotHeader)
+            and header.format == snapshot_format
+            and header.version == version
+            and header.source_sha256 == file_sha256(source_path))
@@ -0,0 +1,105 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class SymbolTable:
+    """Interns math symbols: every distinct token gets a small int id once.
+
+    Statements keep tuples of these ids instead of one object per token, so
+    comparing, hashing and substituting them works on plain ints. Ids are only
+    ever appended, so an id stays valid for the lifetime of the process.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        # set while a snapshot is unpickled: maps the ids of the snapshot to the ids of this table
+        self._remap: Optional[Tuple[int, ...]] = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            symbol_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return symbol_id
+
+    def intern_all(self, names: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self.intern(name) for name in names)
+
+    def name(self, symbol_id: int) -> str:
+        return self._names[symbol_id]
+
+    def names(self, symbol_ids: Iterable[int]) -> List[str]:
+        names = self._names
+        return [names[symbol_id] for symbol_id in symbol_ids]
+
+    def __reduce__(self):
+        return _restore_symbol_table, (tuple(self._names),)
+
+    def begin_restore(self, names: Tuple[str, ...]) -> None:
+        """Merge the names of a pickled table; ids read until :meth:`end_restore` are translated."""
+        remap = self.intern_all(names)
+        self._remap = None if remap == tuple(range(len(names))) else remap
+
+    def end_restore(self) -> None:
+        self._remap = None
+
+    def restore_ids(self, symbol_ids: Sequence[int]) -> Sequence[int]:
+        remap = self._remap
+        if remap is None:
+            return symbol_ids
+        if isinstance(symbol_ids, array):
+            return array(symbol_ids.typecode, [remap[symbol_id] for symbol_id in symbol_ids])
+        return tuple(remap[symbol_id] for symbol_id in symbol_ids)
+
+    def restore_flags(self, flags: bytes) -> bytearray:
+        remap = self._remap
+        if remap is None:
+            return bytearray(flags)
+        restored = bytearray(len(self._names))
+        for symbol_id, flag in enumerate(flags):
+            restored[remap[symbol_id]] = flag
+        return restored
+
+
+CONSTANT = 1
+VARIABLE = 2
+
+
+class SymbolKinds:
+    """Constant/variable flags of the interned symbols of one database, a byte of bits per symbol id."""
+    __slots__ = ('_flags',)
+
+    def __init__(self, flags: bytes = b'') -> None:
+        self._flags = bytearray(flags)
+
+    def declare(self, symbol_id: int, kind: int) -> None:
+        if symbol_id >= len(self._flags):
+            self._flags.extend(bytes(symbol_id + 1 - len(self._flags)))
+        self._flags[symbol_id] |= kind
+
+    def is_constant(self, symbol_id: int) -> bool:
+        return symbol_id < len(self._flags) and self._flags[symbol_id] & CONSTANT != 0
+
+    def is_variable(self, symbol_id: int) -> bool:
+        return symbol_id < len(self._flags) and self._flags[symbol_id] & VARIABLE != 0
+
+    def __reduce__(self):
+        return _restore_symbol_kinds, (bytes(self._flags),)
+
+
+symbol_table = SymbolTable()
+
+
+def _restore_symbol_table(names: Tuple[str, ...]) -> SymbolTable:
+    symbol_table.begin_restore(names)
+    return symbol_table
+
+
+def _restore_symbol_kinds(flags: bytes) -> SymbolKinds:
+    kinds = SymbolKinds()
+    kinds._flags = symbol_table.restore_flags(flags)
+    return kinds
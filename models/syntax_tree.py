@@ -0,0 +1,241 @@
+"""Syntax trees of Metamath expressions.
+
+Statements are flat strings of symbols. The syntax axioms of a database, the $a
+statements of a typecode that $f hypotheses use (``wi $a wff ( ph -> ps ) $.``),
+describe how every expression is built, so an expression can be parsed back into
+the tree of syntax axioms and variables that builds it. Read in reverse Polish
+notation, that tree is the proof of the expression's typecode, e.g. of
+``wff ( ph -> ps )``: ``wph wps wi``.
+
+Nodes are interned per :class:`SyntaxGrammar`: equal subexpressions are the very
+same node, so comparing trees is an identity check and shared subterms are explicit.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models.errors import SyntaxParseError
+from models.frame_stack import FrameStack
+from models.mm_models import StatementType, Statement, Var
+from models.symbol_table import symbol_table
+
+STATEMENT_TYPECODES = {'|-': 'wff'}
+
+
+class SyntaxNode:
+    """A syntax axiom applied to subexpressions, or a variable (a leaf labeled by its $f).
+
+    The ``children`` follow the order of the floating hypotheses of the axiom, which
+    is the order a proof pushes them in. Nodes are created by a :class:`SyntaxGrammar`
+    only and compare by identity.
+    """
+    __slots__ = ('label', 'typecode', 'children', 'symbols')
+
+    def __init__(self, label: str, typecode: int, children: Tuple['SyntaxNode', ...], symbols: Tuple[int, ...]):
+        self.label = label
+        self.typecode = typecode
+        self.children = children
+        self.symbols = symbols  # the expression, without its typecode
+
+    @property
+    def statement(self) -> Statement:
+        return Statement.from_symbols((self.typecode,) + self.symbols)
+
+    def to_proof(self) -> List[str]:
+        """Return the labels of the proof of :attr:`statement` in reverse Polish notation."""
+        proof = []
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            proof.append(node.label)
+            pending.extend(node.children)
+        proof.reverse()
+        return proof
+
+    def __repr__(self):
+        if not self.children:
+            return self.label
+        return f'{self.label}({", ".join(repr(child) for child in self.children)})'
+
+
+@dataclass
+class SyntaxAxiom:
+    label: str
+    typecode: int
+    pattern: Tuple[int, ...]  # the symbols after the typecode
+    variables: Dict[int, int]  # variable id -> typecode id
+    order: Tuple[int, ...]  # variable ids in the order of the floating hypotheses
+
+
+class SyntaxGrammar:
+    """The syntax axioms of a database and the nodes parsed with them so far."""
+
+    def __init__(self,
+                 axioms: Iterable[SyntaxAxiom],
+                 floatings: Dict[str, Tuple[int, int]],
+                 statement_typecodes: Dict[int, int]) -> None:
+        self._by_first_constant: Dict[Tuple[int, int], List[SyntaxAxiom]] = {}
+        self._by_typecode: Dict[int, List[SyntaxAxiom]] = {}  # the axioms starting with a variable
+        for axiom in axioms:
+            if axiom.pattern and axiom.pattern[0] not in axiom.variables:
+                self._by_first_constant.setdefault((axiom.typecode, axiom.pattern[0]), []).append(axiom)
+            else:
+                self._by_typecode.setdefault(axiom.typecode, []).append(axiom)
+        self._floating_typecodes = {label: typecode for label, (typecode, _) in floatings.items()}
+        # variable id -> (typecode id, $f label), for parsing without a frame: the last $f of a variable wins
+        self._floatings = {variable: (typecode, label) for label, (typecode, variable) in floatings.items()}
+        self._statement_typecodes = statement_typecodes
+        self._nodes: Dict[Tuple[str, Tuple[SyntaxNode, ...]], SyntaxNode] = {}
+
+    @classmethod
+    def from_database(cls, mm, statement_typecodes: Dict[str, str] = STATEMENT_TYPECODES) -> 'SyntaxGrammar':
+        """Collect the syntax axioms of a parsed :class:`mm.MM`.
+
+        ``statement_typecodes`` tells which typecode the expressions of the other
+        statements are, by default a ``|-`` statement states a ``wff``.
+        """
+        floatings = {}
+        for label, full_statement in mm.labels.items():
+            if full_statement.statement_type == StatementType.floating:
+                typecode, variable = full_statement.statement.symbols
+                floatings[label.name] = (typecode, variable)
+        statement_typecode_ids = {symbol_table.intern(typecode): symbol_table.intern(syntax_typecode)
+                                  for typecode, syntax_typecode in statement_typecodes.items()}
+        # a typecode may have syntax axioms without having variables, like wff in ql.mm
+        syntax_typecodes = {typecode for typecode, _ in floatings.values()} | set(statement_typecode_ids.values())
+
+        axioms = []
+        for label, full_statement in mm.labels.items():
+            if full_statement.statement_type != StatementType.assertion:
+                continue
+            assertion = full_statement.statement
+            symbols = tuple(assertion.statement.symbols)
+            if symbols[0] in syntax_typecodes and not assertion.essential:
+                axioms.append(SyntaxAxiom(
+                    label=label.name,
+                    typecode=symbols[0],
+                    pattern=symbols[1:],
+                    variables={floating.variable.symbol_id: floating.const.symbol_id for floating in assertion.floating},
+                    order=tuple(floating.variable.symbol_id for floating in assertion.floating)))
+        return cls(axioms, floatings, statement_typecode_ids)
+
+    def parse(self, statement: Statement, frame_stack: Optional[FrameStack] = None) -> SyntaxNode:
+        """Parse a statement, its typecode included, into the syntax tree of its expression.
+
+        The variables are typed by the active floating hypotheses of ``frame_stack``
+        when it is given, by the floating hypotheses of the whole database otherwise.
+        """
+        symbols = tuple(statement.symbols)
+        typecode = self._statement_typecodes.get(symbols[0], symbols[0])
+        return self.parse_expression(typecode, symbols[1:], frame_stack)
+
+    def parse_expression(self,
+                         typecode: int,
+                         symbols: Sequence[int],
+                         frame_stack: Optional[FrameStack] = None) -> SyntaxNode:
+        symbols = tuple(symbols)
+        parser = _Parser(self, symbols, self._variable_types(symbols, frame_stack))
+        for node, end in parser.parse(typecode, 0):
+            if end == len(symbols):
+                return node
+        raise SyntaxParseError(' '.join(symbol_table.names(symbols)),
+                               f'it is not a {symbol_table.name(typecode)}')
+
+    def _variable_types(self, symbols: Sequence[int], frame_stack: Optional[FrameStack]) -> Dict[int, Tuple[int, str]]:
+        if frame_stack is None:
+            return self._floatings
+        variables = {}
+        for symbol_id in set(symbols):
+            label = frame_stack.lookup_floating(Var(symbol_table.name(symbol_id)))
+            if label is not None:
+                variables[symbol_id] = (self._floating_typecodes[label.name], label.name)
+        return variables
+
+    def _candidates(self, typecode: int, first_symbol: Optional[int]) -> List[SyntaxAxiom]:
+        return self._by_first_constant.get((typecode, first_symbol), []) + self._by_typecode.get(typecode, [])
+
+    def node(self, label: str, typecode: int, children: Tuple[SyntaxNode, ...], symbols: Tuple[int, ...]) -> SyntaxNode:
+        """Return the interned node, creating it on first use."""
+        key = (label, children)
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = SyntaxNode(label, typecode, children, symbols)
+        return node
+
+
+class _Parser:
+    """Packrat parser of one expression: every (typecode, position) is parsed once.
+
+    Left-recursive rules (``term ::= a '`` in ql.mm) are handled by growing a seed:
+    a parse that reaches its own (typecode, position) again gets the results found
+    so far, and is repeated until it finds no longer expression. Parses that used an
+    unfinished seed are not memoized.
+    """
+
+    def __init__(self, grammar: SyntaxGrammar, symbols: Tuple[int, ...], variables: Dict[int, Tuple[int, str]]):
+        self._grammar = grammar
+        self._symbols = symbols
+        self._variables = variables
+        self._memo: Dict[Tuple[int, int], List[Tuple[SyntaxNode, int]]] = {}
+        self._seeds: Dict[Tuple[int, int], List[Tuple[SyntaxNode, int]]] = {}
+        self._seeds_used: Set[Tuple[int, int]] = set()
+
+    def parse(self, typecode: int, position: int) -> List[Tuple[SyntaxNode, int]]:
+        """Return every (node, end) such that ``symbols[position:end]`` is an expression of ``typecode``."""
+        key = (typecode, position)
+        results = self._memo.get(key)
+        if results is not None:
+            return results
+        seed = self._seeds.get(key)
+        if seed is not None:
+            self._seeds_used.add(key)
+            return seed
+
+        outer_seeds_used = self._seeds_used
+        self._seeds[key] = []
+        while True:
+            self._seeds_used = set()
+            results = self._parse_once(typecode, position)
+            if key not in self._seeds_used or {end for _, end in results} <= {end for _, end in self._seeds[key]}:
+                break
+            self._seeds[key] = results
+        del self._seeds[key]
+        self._seeds_used.discard(key)
+        if not self._seeds_used:
+            self._memo[key] = results
+        self._seeds_used |= outer_seeds_used
+        return results
+
+    def _parse_once(self, typecode: int, position: int) -> List[Tuple[SyntaxNode, int]]:
+        symbols = self._symbols
+        first_symbol = symbols[position] if position < len(symbols) else None
+        results = []
+        variable = self._variables.get(first_symbol)
+        if variable is not None and variable[0] == typecode:
+            results.append((self._grammar.node(variable[1], typecode, (), (first_symbol,)), position + 1))
+        for axiom in self._grammar._candidates(typecode, first_symbol):
+            for bound, end in self._match(axiom, position):
+                children = tuple(bound[variable_id] for variable_id in axiom.order)
+                results.append((self._grammar.node(axiom.label, typecode, children, symbols[position:end]), end))
+        return results
+
+    def _match(self, axiom: SyntaxAxiom, position: int) -> List[Tuple[Dict[int, SyntaxNode], int]]:
+        symbols = self._symbols
+        states: List[Tuple[Dict[int, SyntaxNode], int]] = [({}, position)]
+        for symbol in axiom.pattern:
+            typecode = axiom.variables.get(symbol)
+            matched = []
+            for bound, at in states:
+                if typecode is None:
+                    if at < len(symbols) and symbols[at] == symbol:
+                        matched.append((bound, at + 1))
+                    continue
+                previous = bound.get(symbol)
+                for node, end in self.parse(typecode, at):
+                    if previous is None:
+                        matched.append(({**bound, symbol: node}, end))
+                    elif previous is node:
+                        matched.append((bound, end))
+            states = matched
+            if not states:
+                break
+        return states
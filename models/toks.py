@@ -1,34 +1,73 @@
-from typing import Tuple, Optional
+import mmap
+import re
+from typing import Tuple, Optional, Iterator
 
 from models.errors import MMError
+from models.instrumentation import PhaseProfiler
+
+_TOKEN_PATTERN = re.compile(rb'\S+')
 
 
 class Toks:
     """Class of sets of tokens from which functions read as in an input
     stream.
+
+    The database file is memory-mapped and scanned lazily, so only the token
+    currently being read is materialized as a Python string.
     """
 
     def __init__(self, filepath: str) -> None:
         """Инициализируем считывание из одного файла."""
-        self.tokbuf: list[str] = []
-        with open(filepath, mode='r', encoding='ascii') as file:
-            self.lines = [l for l in file.read().splitlines() if l]
-        self.current_line = 0
-
-    def _read(self) -> str:
-        """Считывает следующий токен из буфера или загружает следующую строку, если буфер пуст."""
-        if not self.tokbuf:
-            if self.current_line < len(self.lines):
-                line = self.lines[self.current_line]
-                self.current_line += 1
-                self.tokbuf = line.split()
-                self.tokbuf.reverse()
-            else:
-                return None  # Конец файла
-        return self.tokbuf.pop()
+        with open(filepath, mode='rb') as file:
+            try:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                self._buffer = b''
+        if hasattr(self._buffer, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._buffer.madvise(mmap.MADV_SEQUENTIAL)
+        self._scanner = _TOKEN_PATTERN.finditer(self._buffer)
+        self.last_offset: Optional[int] = None
+        self.profiler: Optional[PhaseProfiler] = None  # when set, readc is timed as the 'tokenize' phase
+
+    def close(self) -> None:
+        """Release the memory map of the database file."""
+        self._scanner = iter(())
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b''
+
+    def __enter__(self) -> 'Toks':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def seek(self, offset: int) -> None:
+        """Continue reading from the token starting at ``offset`` bytes into the file."""
+        self._scanner = _TOKEN_PATTERN.finditer(self._buffer, offset)
+
+    def iter_tokens(self) -> Iterator[Tuple[str, int]]:
+        """Yield ``(token, byte_offset)`` pairs from the current position to the end of file."""
+        for match in self._scanner:
+            self.last_offset = match.start()
+            yield match.group().decode('ascii'), self.last_offset
+
+    def _read(self) -> Optional[str]:
+        """Считывает следующий токен из файла или возвращает None в конце файла."""
+        match = next(self._scanner, None)
+        if match is None:
+            return None  # Конец файла
+        self.last_offset = match.start()
+        return match.group().decode('ascii')
 
     def readc(self) -> Tuple[Optional[str], str]:
         """Читает следующий токен, пропуская комментарии."""
+        if self.profiler is None:
+            return self._readc()
+        with self.profiler.phase('tokenize'):
+            return self._readc()
+
+    def _readc(self) -> Tuple[Optional[str], str]:
         tok = self._read()
         comment = []
         while tok == '$(':  # Начало комментария
@@ -42,4 +81,3 @@ class Toks:
                 comment = []
         comment = ' '.join(comment[:-1]) if len(comment) > 0 else None
         return comment, tok
-
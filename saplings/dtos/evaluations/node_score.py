@@ -15,3 +15,5 @@ class NodeScore(Evaluation):
     verify_progress: float = 0.0
     structural_progress: float = 0.0
     stage: Optional[ProofCheckStage] = None
+    valid_steps: int = 0
+    total_steps: int = 0
@@ -7,12 +7,12 @@ import re
 from saplings.dtos.evaluations.node_score import NodeScore
 from saplings.dtos.node import Node
 from saplings.tools.theorem_recovery import TheoremRecoveryRunner
-from verification import ProofCheckResult, ProofCheckStage
+from verification import ProofCheckStage, StepCheckResult
 
 class NodeScorer:
     """
     Compute a heuristic utility score for a Node based on:
-    - verification progress using TheoremRecoveryRunner / ProofCheckResult
+    - verification progress using TheoremRecoveryRunner / StepCheckResult (the share of valid proof steps)
     - simple structural progress signals from theorem/proof state
     - a mild penalty for depth (longer paths without progress are worse)
 
@@ -32,7 +32,7 @@ class NodeScorer:
         proof_state = node.created_node_task.proof
 
         runner = TheoremRecoveryRunner(theorem_state, proof_state)
-        verify_result = runner.verify()
+        verify_result = runner.verify_steps()
 
         verify_progress = self._verify_progress(verify_result)
         structural_progress, structural_details = self._structural_progress(node)
@@ -54,6 +54,7 @@ class NodeScorer:
             f"dependency_consistency={structural_details['dependency_consistency']:.3f}",
             f"proof_growth={structural_details['proof_growth']:.3f}",
             f"stage={verify_result.stage.value}",
+            f"valid_steps={verify_result.valid_steps}/{verify_result.total_steps}",
             f"tie_break={tie_break:.4f}",
         ]
         reasoning = "; ".join(reasoning_parts)
@@ -65,9 +66,11 @@ class NodeScorer:
             verify_progress=verify_progress,
             structural_progress=structural_progress,
             stage=verify_result.stage,
+            valid_steps=verify_result.valid_steps,
+            total_steps=verify_result.total_steps,
         )
 
-    def _verify_progress(self, result: ProofCheckResult) -> float:
+    def _verify_progress(self, result: StepCheckResult) -> float:
         if result is None:
             return 0.0
 
@@ -82,6 +85,11 @@ class NodeScorer:
             ProofCheckStage.SUCCESS: 1.0,
         }
 
+        if result.stage == ProofCheckStage.EXECUTION and result.total_steps:
+            # the proof runs: its progress grows with the share of valid steps
+            low = stage_weights[ProofCheckStage.CONSTRUCTION]
+            return low + (1.0 - low) * result.valid_steps / result.total_steps
+
         return stage_weights[result.stage]
 
     def _tie_breaker(self, node: Node) -> float:
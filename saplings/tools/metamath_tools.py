@@ -78,7 +78,7 @@ async def search_tool(query: str, top_k: int = 5, context_window: int = 40, high
 @function_tool()
 async def verify_tool(theorem_state: TheoremState, proof_state: ProofState) -> ProofCheckResult:
     """
-    Verify a theorem/proof by materializing temporary modules via TheoremRecoveryRunner.
+    Verify a theorem/proof by rendering its modules via TheoremRecoveryRunner and executing them in memory.
     """
 
     runner = TheoremRecoveryRunner(theorem_state, proof_state)
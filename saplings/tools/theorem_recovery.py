@@ -1,17 +1,14 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Iterable, Tuple
-import uuid
+from typing import Tuple
 
-from paths import classes_folder_path, proofs_folder_path
 from saplings.dtos.proof_state import ProofState
 from saplings.dtos.theorem_state import TheoremState
-from verification import ProofCheckResult, verify_proof
+from verification import ProofCheckResult, StepCheckResult, verify_sources, verify_steps
 
 
 class TheoremRecoveryRunner:
-    """Recovers transient theorem/proof modules, verifies them, and cleans up."""
+    """Recovers theorem/proof modules from the search state and verifies them in memory."""
 
     def __init__(self, theorem_state: TheoremState, proof_state: ProofState):
         self.theorem_state = theorem_state
@@ -39,6 +36,8 @@ class TheoremRecoveryRunner:
         lines.append(f"class {label}_FloatingArgs(TypedDict):")
         for floating in self.theorem_state.floating_args:
             lines.append(f"    {floating}: str")
+        if not self.theorem_state.floating_args:
+            lines.append("    pass")
         lines.append("")
         lines.append("")
         lines.append("")
@@ -46,6 +45,8 @@ class TheoremRecoveryRunner:
         lines.append(f"class {label}_EssentialArgs(TypedDict):")
         for essential in self.theorem_state.essential_args:
             lines.append(f"    {essential}: str")
+        if not self.theorem_state.essential_args:
+            lines.append("    pass")
         lines.append("")
         lines.append("")
         lines.append("")
@@ -128,48 +129,18 @@ class TheoremRecoveryRunner:
                     imports.append(token)
         return imports
 
-    def _write_sources(self, class_source: str, proof_source: str, unique_label: str) -> Tuple[Path, Path]:
-        classes_root = Path(classes_folder_path)
-        proofs_root = Path(proofs_folder_path)
-        classes_root.mkdir(parents=True, exist_ok=True)
-        proofs_root.mkdir(parents=True, exist_ok=True)
-
-        class_path = classes_root / f"{unique_label}.py"
-        proof_path = proofs_root / f"{unique_label}.py"
-
-        if class_path.exists() or proof_path.exists():
-            raise FileExistsError(f"Target files already exist for label {unique_label}")
-
-        class_path.write_text(class_source)
-        proof_path.write_text(proof_source)
-        return class_path, proof_path
-
-    def _cleanup(self, paths: Iterable[Path]) -> None:
-        for path in paths:
-            try:
-                if path.exists():
-                    path.unlink()
-            except Exception:
-                # Swallow cleanup errors; verification result already computed.
-                pass
-
     def verify(self) -> ProofCheckResult:
         """
-        Reconstruct temporary theorem/proof modules, run verification, clean up, and
-        return the ProofCheckResult.
+        Reconstruct the theorem/proof modules and verify them without writing them to the
+        metamath2py folders, so concurrent runs with the same label cannot collide.
         """
-        # Generate a unique label to avoid race conditions during parallel execution
-        unique_suffix = str(uuid.uuid4()).replace("-", "")
-        unique_label = f"{self.theorem_state.label}_{unique_suffix}"
+        class_source, proof_source = self.recover_theorem_data()
+        return verify_sources(class_source, proof_source, self.theorem_state.label)
 
-        class_source, proof_source = self.recover_theorem_data(unique_label)
-        written_paths: Tuple[Path, Path] | tuple[()] = tuple()
-
-        try:
-            written_paths = self._write_sources(class_source, proof_source, unique_label)
-            result = verify_proof(unique_label)
-        finally:
-            if written_paths:
-                self._cleanup(written_paths)
-
-        return result
+    def verify_steps(self) -> StepCheckResult:
+        """
+        Verify the proof step by step, reporting how many of its steps are valid. The state after
+        the steps of an already verified node is reused, so a child node only executes its new steps.
+        """
+        class_source, proof_source = self.recover_theorem_data()
+        return verify_steps(class_source, proof_source, self.theorem_state.label)
@@ -0,0 +1,81 @@
+"""Measure how much ``--share-subterms`` shrinks the generated proofs of a database.
+
+Every $p is translated twice, with and without shared subterms, and the
+``executable_proof`` sources are compared: proof lines, ``call`` steps, bytes and
+the time ``compile`` takes for them (a stand-in for the import time, the
+generated modules import the ``metamath2py`` classes and cannot run here).
+"""
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+
+from translation_pipeline import assertion_names, load_database, translate_parsed
+
+
+@dataclass
+class ProofSize:
+    lines: int = 0
+    calls: int = 0
+    bytes: int = 0
+    compile_seconds: float = 0.0
+
+    def add(self, other: 'ProofSize') -> None:
+        self.lines += other.lines
+        self.calls += other.calls
+        self.bytes += other.bytes
+        self.compile_seconds += other.compile_seconds
+
+
+def measure(result: dict) -> ProofSize:
+    source = result['executable_proof']
+    started = time.perf_counter()
+    compile(source, result['name'], 'exec')
+    return ProofSize(lines=result['proof_lines'].count('\n'),
+                     calls=source.count('().call('),
+                     bytes=len(source.encode('utf-8')),
+                     compile_seconds=time.perf_counter() - started)
+
+
+def _shrink(before: int, after: int) -> str:
+    return f"{before} -> {after} ({100 * (before - after) / before:.1f}% smaller)" if before else "0 -> 0"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare generated proofs with and without shared subterms")
+    parser.add_argument("database", help="Path of the .mm file")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes used for the translations.")
+    parser.add_argument("--report", default=None, help="Write one JSON line per $p with both sizes.")
+    parser.add_argument("--largest", type=int, default=10, help="How many of the most shrunk proofs to list.")
+    args = parser.parse_args()
+
+    mm = load_database(args.database)
+    names = assertion_names(mm)
+    plain = translate_parsed(mm, names, jobs=args.jobs)
+    shared = translate_parsed(mm, names, jobs=args.jobs, share_subterms=True)
+
+    total_plain, total_shared = ProofSize(), ProofSize()
+    shrunk = []
+    report = open(args.report, 'w') if args.report else None
+    try:
+        for plain_result, shared_result in zip(plain, shared):
+            if plain_result['proof_lines'].strip() == 'pass':
+                continue  # an axiom, nothing to share
+            before, after = measure(plain_result), measure(shared_result)
+            total_plain.add(before)
+            total_shared.add(after)
+            shrunk.append((before.lines - after.lines, plain_result['original_name']))
+            if report:
+                report.write(json.dumps({'label': plain_result['original_name'],
+                                         'plain': asdict(before), 'shared': asdict(after)}) + '\n')
+    finally:
+        if report:
+            report.close()
+
+    print(f"{len(shrunk)} proofs")
+    print(f"proof lines: {_shrink(total_plain.lines, total_shared.lines)}")
+    print(f"call steps: {_shrink(total_plain.calls, total_shared.calls)}")
+    print(f"bytes: {_shrink(total_plain.bytes, total_shared.bytes)}")
+    print(f"compile: {total_plain.compile_seconds:.2f}s -> {total_shared.compile_seconds:.2f}s")
+    for saved_lines, label in sorted(shrunk, reverse=True)[:args.largest]:
+        print(f"  {label}: {saved_lines} lines fewer")
@@ -0,0 +1,51 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+import code_builders.floating_names_handler as floating_names_module
+import verification
+from code_builders.pythonic_names_handler import pythonic_names_handler
+from mm import MM
+from models.toks import Toks
+
+DEMO_DB = Path(__file__).resolve().parents[1] / "metamath_program" / "metamath" / "demo0.mm"
+TOOLS = Path(__file__).resolve().parents[1] / "tools"
+
+
+@pytest.fixture
+def isolated_name_maps(tmp_path, monkeypatch):
+    """Keep names generated for test databases out of the tracked csv maps."""
+    pythonic_names_handler.load()  # the names already in the tracked map are still used
+    monkeypatch.setattr(pythonic_names_handler, "map_path", str(tmp_path / "names.csv"))
+    monkeypatch.setattr(floating_names_module, "floating_names_map_path", str(tmp_path / "floatings.csv"))
+    yield
+    pythonic_names_handler.flush()
+
+
+@pytest.fixture
+def demo_proofs(isolated_name_maps, tmp_path, monkeypatch):
+    """The demo0 modules written into metamath2py folders that verification uses instead of the default ones."""
+    with Toks(str(DEMO_DB)) as toks:
+        results = list(MM().read(toks))
+    classes, proofs = tmp_path / "metamath2py" / "classes", tmp_path / "metamath2py" / "proofs"
+    classes.mkdir(parents=True)
+    proofs.mkdir()
+    shutil.copy2(TOOLS / "apply_substitution_for_generated_files.py", classes)
+    for result in results:
+        (classes / f"{result['name']}.py").write_text(result["executable_class"])
+        (proofs / f"{result['name']}.py").write_text(result["executable_proof"])
+    # the broken proof of the last theorem
+    (proofs / "BROKEN.py").write_text((proofs / f"{results[-1]['name']}.py").read_text().replace(
+        "def proof(self):", "def proof(self):\n        raise Exception('broken')").replace(
+        f"class {results[-1]['name']}_proof", "class BROKEN_proof"))
+
+    monkeypatch.setattr(verification, "_DEFAULT_PROOFS_ROOT", str(proofs))
+    monkeypatch.setattr(verification, "_DEFAULT_CLASSES_ROOT", str(classes))
+    loaded = set(sys.modules)
+    yield [result["name"] for result in results] + ["BROKEN"]
+    verification.module_cache.clear()
+    for name in set(sys.modules) - loaded:
+        if name.startswith("metamath2py"):
+            del sys.modules[name]
@@ -0,0 +1,33 @@
+import pytest
+
+from code_builders.compressed_proof import SAVE_STEP, decode_steps, parse_compressed_proof
+from models.errors import CompressedProofFormatError, IncompleteProofError
+from models.mm_models import Label, Statement, Symbol
+
+
+def _proof(text: str) -> Statement:
+    return Statement([Symbol(tok) for tok in text.split()])
+
+
+def test_decode_steps_handles_multi_letter_numbers_and_tags():
+    # A=0, T=19, UA=20, UT=39, VA=40, YT=119, UUA=120
+    assert decode_steps("ATUAUTVAYTUUA") == [0, 19, 20, 39, 40, 119, 120]
+    assert decode_steps("ABZCZ") == [0, 1, SAVE_STEP, 2, SAVE_STEP]
+
+
+def test_parse_compressed_proof_prepends_mandatory_hypotheses():
+    proof = parse_compressed_proof(_proof("( ax-mp a2 ) CDE ZFG"), [Label("wph"), Label("min")])
+
+    assert proof.labels == [Label("wph"), Label("min"), Label("ax-mp"), Label("a2")]
+    assert proof.steps == [2, 3, 4, SAVE_STEP, 5, 6]
+
+
+@pytest.mark.parametrize("code", ["AU", "UZ", "A$"])
+def test_malformed_code_is_rejected(code):
+    with pytest.raises(CompressedProofFormatError):
+        decode_steps(code)
+
+
+def test_unknown_step_is_reported_as_incomplete_proof():
+    with pytest.raises(IncompleteProofError):
+        decode_steps("AB?C")
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from build_dataset_of_python_files import DatasetArchive
+from mm import MM
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+
+RUN_ARCHIVED_PROOFS = '''
+import importlib, sys, zipimport
+sys.path.insert(0, sys.argv[1])
+for name in sys.argv[2:]:
+    module = importlib.import_module(f"metamath2py.proofs.{name}")
+    assert isinstance(module.__loader__, zipimport.zipimporter), module.__loader__
+    getattr(module, f"{name}_proof")().proof()
+'''
+
+
+@pytest.mark.parametrize("bytecode", [False, True])
+def test_proofs_are_imported_from_the_archive(isolated_name_maps, tmp_path, bytecode):
+    with Toks(str(DEMO_DB)) as toks:
+        results = list(MM().read(toks))
+    archive_path = tmp_path / "metamath2py.zip"
+
+    with DatasetArchive(str(archive_path), bytecode=bytecode) as archive:
+        for result in results:
+            archive.write_statement(result["name"], result["executable_class"], result["executable_proof"])
+
+    names = [result["name"] for result in results]
+    with zipfile.ZipFile(archive_path) as archive:
+        entries = archive.namelist()
+    assert sorted(entry[len("metamath2py/proofs/"):-3] for entry in entries
+                  if entry.startswith("metamath2py/proofs/") and entry.endswith(".py")
+                  and not entry.endswith("__init__.py")) == sorted(names)
+    compiled = [entry for entry in entries if entry.endswith(".pyc")]
+    assert len(compiled) == (2 * len(names) + 4 if bytecode else 0)
+
+    completed = subprocess.run([sys.executable, "-c", RUN_ARCHIVED_PROOFS, str(archive_path), *names],
+                               cwd=tmp_path, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
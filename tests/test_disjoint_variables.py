@@ -0,0 +1,42 @@
+import pytest
+
+from mm import MM
+from models.errors import DisjointVariableError
+from models.toks import Toks
+
+DISJOINT_DB = """
+$c wff |- ( ) $.
+$v x y $.
+wx $f wff x $.
+wy $f wff y $.
+${ $d x y $. ax $a |- ( x y ) $. $}
+${ $d y x $. th $p |- ( y x ) $= wy wx ax $. $}
+"""
+
+
+def _read(tmp_path, content: str, verify_only: bool):
+    path = tmp_path / "db.mm"
+    path.write_text(content)
+    with Toks(str(path)) as toks:
+        return list(MM().read(toks, verify_only=verify_only))
+
+
+def test_distinct_variables_satisfy_the_condition(isolated_name_maps, tmp_path):
+    results = _read(tmp_path, DISJOINT_DB, verify_only=True)
+
+    assert [(result.label, result.passed) for result in results] == [("th", True)]
+    assert len(_read(tmp_path, DISJOINT_DB, verify_only=False)) == 2
+
+
+@pytest.mark.parametrize("theorem", [
+    "th2 $p |- ( x x ) $= wx wx ax $.",
+    "${ th2 $p |- ( x y ) $= wx wy ax $. $}",
+])
+def test_violated_condition_is_reported(isolated_name_maps, tmp_path, theorem):
+    content = DISJOINT_DB + theorem + "\n"
+    results = _read(tmp_path, content, verify_only=True)
+
+    assert [(result.label, result.passed) for result in results] == [("th", True), ("th2", False)]
+    assert results[1].error.startswith("DisjointVariableError")
+    with pytest.raises(DisjointVariableError):
+        _read(tmp_path, content, verify_only=False)
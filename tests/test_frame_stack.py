@@ -0,0 +1,52 @@
+import pickle
+
+from models.frame import Frame
+from models.frame_stack import FrameStack
+from models.mm_models import Const, FloatingHyp, Label, Statement, Symbol, Var
+
+
+def _statement(text: str) -> Statement:
+    return Statement([Symbol(tok) for tok in text.split()])
+
+
+def _stack_with_outer_scope() -> FrameStack:
+    stack = FrameStack()
+    stack.push(Frame())
+    stack.add_variable(Var("ph"))
+    stack.add_variable(Var("ps"))
+    stack.add_floating(FloatingHyp(Const("wff"), Var("ph")), Label("wph"))
+    stack.add_definitions(_statement("ph ps"))
+    return stack
+
+
+def test_closing_a_scope_rolls_the_lookups_back():
+    stack = _stack_with_outer_scope()
+    assert stack.lookup_variable(Var("ph"))
+
+    stack.push(Frame())
+    stack.add_variable(Var("ch"))
+    stack.add_floating(FloatingHyp(Const("wff"), Var("ch")), Label("wch"))
+    stack.add_definitions(_statement("ph ps ch"))
+    assert stack.lookup_variable(Var("ch"))
+    assert stack.lookup_floating(Var("ch")) == Label("wch")
+    assert stack.lookup_definition(Var("ch"), Var("ph"))
+
+    stack.pop()
+    assert not stack.lookup_variable(Var("ch"))
+    assert stack.lookup_floating(Var("ch")) is None
+    assert not stack.lookup_definition(Var("ph"), Var("ch"))
+    # the pair was already active in the outer scope and stays active
+    assert stack.lookup_definition(Var("ps"), Var("ph"))
+    assert stack.lookup_floating(Var("ph")) == Label("wph")
+
+
+def test_snapshot_indexes_itself_after_unpickling():
+    stack = _stack_with_outer_scope()
+    stack.lookup_variable(Var("ph"))
+
+    frozen = pickle.loads(pickle.dumps(stack.snapshot()))
+
+    assert '_active' not in frozen.__dict__
+    assert frozen.lookup_variable(Var("ps"))
+    assert frozen.lookup_floating(Var("ph")) == Label("wph")
+    assert frozen.lookup_definition(Var("ph"), Var("ps"))
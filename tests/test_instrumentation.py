@@ -0,0 +1,47 @@
+import json
+
+from mm import MM
+from models.instrumentation import PhaseProfiler, active_profiler, profiling
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+
+
+def test_profiled_read_reports_phases_and_slowest_theorems(isolated_name_maps, tmp_path):
+    with Toks(str(DEMO_DB)) as toks, profiling(PhaseProfiler(slowest=3)) as profiler:
+        results = list(MM().read(toks))
+    assert active_profiler() is None
+
+    report_path = tmp_path / "report.json"
+    profiler.write_report(str(report_path))
+    report = json.loads(report_path.read_text())
+
+    assert report["statements"] == len(results)
+    for name in ["tokenize", "readstmt_aux", "make_assertion", "verify", "build", "replace_class_variables"]:
+        assert report["phases"][name]["calls"] > 0
+    assert report["phases"]["verify"]["calls"] == 1
+    assert len(report["slowest"]) == 3
+    assert [entry["seconds"] for entry in report["slowest"]] == sorted(
+        (entry["seconds"] for entry in report["slowest"]), reverse=True)
+    assert sum(phase["seconds"] for phase in report["phases"].values()) <= report["total_seconds"]
+
+
+def test_nested_phases_are_not_counted_twice():
+    profiler = PhaseProfiler()
+    with profiler.phase("outer"):
+        with profiler.phase("inner"):
+            sum(range(100000))
+
+    assert profiler.phases["outer"].calls == 1
+    assert profiler.phases["outer"].seconds < profiler.phases["inner"].seconds
+
+
+def test_closing_assertions_early_stops_profiling_the_tokens():
+    with Toks(str(DEMO_DB)) as toks, profiling(PhaseProfiler()) as profiler:
+        assertions = MM().iter_assertions(toks)
+        next(assertions)
+        assert toks.profiler is profiler
+        assertions.close()
+        assert toks.profiler is None
+        calls = profiler.phases["tokenize"].calls
+        toks.readc()
+    assert profiler.phases["tokenize"].calls == calls
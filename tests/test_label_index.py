@@ -0,0 +1,31 @@
+from mm import MM
+from models.label_index import OUTERMOST_SCOPE, LabelIndex
+from models.mm_models import StatementType
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+
+
+def test_index_records_offsets_scopes_and_dependencies():
+    with Toks(str(DEMO_DB)) as toks:
+        index = LabelIndex.build(toks)
+    source = DEMO_DB.read_bytes()
+
+    mp = index.get("mp")
+    assert mp.statement_type == StatementType.assertion
+    assert source[mp.offset:mp.offset + 2] == b"mp"
+    assert len(mp.scopes) == 2 and mp.scopes[0] == OUTERMOST_SCOPE
+    assert [source[o:o + 3] for o in index.scopes[mp.scopes[1]].statements] == [b"min", b"maj"]
+
+    th1 = index.get("th1")
+    assert th1.scopes == (OUTERMOST_SCOPE,)
+    assert set(th1.dependencies) == {"tt", "tze", "tpl", "weq", "wim", "a1", "a2", "mp"}
+
+
+def test_reconstruct_matches_full_translation(isolated_name_maps, tmp_path):
+    mm = MM()
+    with Toks(str(DEMO_DB)) as toks:
+        expected = {result["original_name"]: result for result in mm.read(toks)}
+    index = LabelIndex.from_database(str(DEMO_DB), str(tmp_path / "demo0.index"))
+
+    for name in ("th1", "mp", "a2"):
+        assert MM.reconstruct(str(DEMO_DB), name, index=index) == expected[name]
@@ -0,0 +1,49 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from mm import MM
+from models.errors import StaleSnapshotError
+from models.mm_models import Label
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+
+
+def _parsed(path: Path) -> MM:
+    mm = MM()
+    with Toks(str(path)) as toks:
+        mm.parse(toks)
+    return mm
+
+
+def test_snapshot_roundtrip_restores_parsed_state(tmp_path):
+    source = tmp_path / "demo0.mm"
+    shutil.copy(DEMO_DB, source)
+    snapshot = tmp_path / "demo0.snapshot"
+    mm = _parsed(source)
+
+    mm.dump_snapshot(str(snapshot), str(source))
+    restored = MM.load_snapshot(str(snapshot), str(source))
+
+    assert restored.labels == mm.labels
+    assert list(restored.labels) == list(mm.labels)
+    assert restored.proofs == mm.proofs
+    assert restored.comments_by_label == mm.comments_by_label
+    context = restored.frame_contexts[Label("th1")]
+    assert [frame.get_floatings() for frame in context] == [frame.get_floatings() for frame in mm.frame_contexts[Label("th1")]]
+
+
+def test_stale_snapshot_is_detected_and_rebuilt(tmp_path):
+    source = tmp_path / "demo0.mm"
+    shutil.copy(DEMO_DB, source)
+    snapshot = tmp_path / "demo0.snapshot"
+    MM.from_database(str(source), str(snapshot))
+
+    source.write_text(source.read_text() + "\n$( appended $)\n")
+
+    with pytest.raises(StaleSnapshotError):
+        MM.load_snapshot(str(snapshot), str(source))
+    rebuilt = MM.from_database(str(source), str(snapshot))
+    assert Label("th1") in rebuilt.labels
+    assert MM.load_snapshot(str(snapshot), str(source)).labels == rebuilt.labels
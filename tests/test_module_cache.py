@@ -0,0 +1,72 @@
+import os
+
+import verification
+from verification import ModuleCache, module_cache, verify_proof
+
+
+def test_unchanged_modules_stay_loaded(demo_proofs):
+    name = demo_proofs[-2]
+    assert verify_proof(name).success
+    loaded = module_cache.stats()
+
+    assert verify_proof(name).success
+
+    stats = module_cache.stats()
+    assert stats["misses"] == loaded["misses"]
+    assert stats["hits"] - loaded["hits"] == loaded["modules"]
+
+
+def test_edited_class_is_reloaded(demo_proofs):
+    name = demo_proofs[-2]
+    assert verify_proof(name).success
+    proof_path = os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{name}.py")
+    used_class = next(class_name for class_name in verification._imported_classes(proof_path) if class_name != name)
+    class_path = os.path.join(verification._DEFAULT_CLASSES_ROOT, f"{used_class}.py")
+    with open(class_path) as f:
+        source = f.read()
+
+    # the same content written again is still a hit
+    with open(class_path, "w") as f:
+        f.write(source)
+    os.utime(class_path, ns=(0, 0))
+    misses = module_cache.misses
+    assert verify_proof(name).success
+    assert module_cache.misses == misses
+
+    with open(class_path, "w") as f:
+        f.write(source.replace("def call(self", "def call(self, *args, **kwargs):\n        raise Exception('edited')\n\n    def former_call(self"))
+    result = verify_proof(name)
+    assert (result.success, result.stage, result.error_message) == (False, verification.ProofCheckStage.EXECUTION, "edited")
+
+
+def test_least_recently_used_modules_are_evicted(demo_proofs, tmp_path):
+    cache = ModuleCache(max_modules=2)
+    for index in range(3):
+        (tmp_path / f"module_{index}.py").write_text(f"value = {index}")
+        assert cache.load(f"cached_module_{index}", str(tmp_path / f"module_{index}.py")).value == index
+
+    assert cache.stats() == {"hits": 0, "misses": 3, "evictions": 1, "modules": 2}
+    assert "cached_module_0" not in verification.sys.modules
+    cache.clear()
+    assert "cached_module_2" not in verification.sys.modules
+
+
+def test_every_proof_importing_an_edited_class_uses_the_new_one(demo_proofs):
+    first = demo_proofs[-2]
+    proof_path = os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{first}.py")
+    with open(proof_path) as f:
+        proof = f.read()
+    # a second proof importing the same classes
+    with open(os.path.join(verification._DEFAULT_PROOFS_ROOT, "COPY.py"), "w") as f:
+        f.write(proof.replace(f"class {first}_proof", "class COPY_proof"))
+    assert verify_proof(first).success and verify_proof("COPY").success
+    used_class = next(class_name for class_name in verification._imported_classes(proof_path) if class_name != first)
+    class_path = os.path.join(verification._DEFAULT_CLASSES_ROOT, f"{used_class}.py")
+    with open(class_path) as f:
+        source = f.read()
+    with open(class_path, "w") as f:
+        f.write(source.replace("def call(self", "def call(self, *args, **kwargs):\n        raise Exception('edited')\n\n    def former_call(self"))
+
+    # the copy reloads the class, the first proof still has to notice it
+    assert verify_proof("COPY").error_message == "edited"
+    assert verify_proof(first).error_message == "edited"
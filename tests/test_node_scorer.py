@@ -152,7 +152,7 @@ def test_node_scorer_separates_nodes_with_same_verify_stage():
     assert less_score.stage == more_score.stage
     assert less_score.stage is not None
     assert less_score.stage.value == "execution"
-    assert more_score.verify_progress == less_score.verify_progress
+    assert more_score.verify_progress > less_score.verify_progress
     assert more_score.structural_progress > less_score.structural_progress
     assert more_score.score > less_score.score
 
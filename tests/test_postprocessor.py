@@ -0,0 +1,26 @@
+import random
+
+from code_builders.postprocessor import ClassVariablesReplacer, load_class_variables, replace_class_variables
+
+
+def _row_by_row(rows, text):
+    for token, replacement in rows:
+        text = text.replace(token, replacement)
+    return text
+
+
+def test_single_pass_matches_row_by_row_replacement():
+    replacer = load_class_variables()
+    fragments = [token for token, _ in replacer.rows] + [".", "X", "0", "<", "_", " ", "x_1", "( A", "cls"]
+    generator = random.Random(0)
+    texts = ["( A .X. B ) .<_ C", ".0.X.", ".x.1.", ".<_.<", "./\\ ./", "no tokens here"]
+    texts += ["".join(generator.choice(fragments) for _ in range(12)) for _ in range(2000)]
+    for text in texts:
+        assert replace_class_variables(text) == _row_by_row(replacer.rows, text), text
+
+
+def test_table_where_replacements_form_tokens_is_applied_row_by_row():
+    rows = [("ab", "b"), ("bb", "c")]
+    replacer = ClassVariablesReplacer(rows)
+
+    assert replacer.replace("abb") == _row_by_row(rows, "abb") == "c"
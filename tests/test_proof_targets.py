@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from code_builders.class_builder import ProofTarget
+from mm import MM
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+from tests.test_shared_subterms import _run_proofs
+from tests.test_substitution_templates import helper
+
+ROOT = Path(__file__).resolve().parents[1]
+
+VERIFY_PROOFS = '''
+import json, sys
+import verification
+verification._DEFAULT_CLASSES_ROOT = sys.argv[1] + '/metamath2py/classes'
+results = [verification._verify_proof_at(name, package='metamath2py.proofs', search_root=sys.argv[1] + '/metamath2py/proofs')
+           for name in sys.argv[2:]]
+print(json.dumps([[result.statement_name, result.stage] for result in results]))
+'''
+
+
+def _translate(target: ProofTarget):
+    with Toks(str(DEMO_DB)) as toks:
+        return list(MM().read(toks, target=target))
+
+
+def test_token_substitution_matches_string_substitution():
+    template = helper.StatementTemplate("|- ( ph -> ( ps -> ph ) )", ["ph", "ps"])
+    substitution = {"ph": "wff ( ch /\\ th )", "ps": "wff ta"}
+
+    substituted = template.substitute_tokens({key: tuple(value.split(" ")) for key, value in substitution.items()})
+
+    assert " ".join(substituted) == template.substitute(substitution)
+    assert template.substitute_tokens({}) == tuple(template.statement.split(" "))
+    assert helper.StatementTemplate("|- T.", ["ph"]).substitute_tokens({"ph": ("wff", "ch")}) == ("|-", "T.")
+
+
+def test_token_target_passes_tuples_between_calls(isolated_name_maps):
+    strings = _translate(ProofTarget.strings)
+    tokens = _translate(ProofTarget.tokens)
+
+    for string_result, tokens_result in zip(strings, tokens):
+        assert tokens_result["name"] == string_result["name"]
+        # the classes keep the string API and add call_tokens
+        assert tokens_result["executable_class"].startswith(string_result["executable_class"].rstrip("\n"))
+    assert "def call_tokens(" not in strings[-1]["executable_class"]
+    assert '= ("term", "t")' in tokens[-1]["proof_lines"]
+    assert ".call_tokens(" in tokens[-1]["proof_lines"] and ".call(" not in tokens[-1]["proof_lines"]
+
+
+def test_both_targets_verify_identically(isolated_name_maps, tmp_path):
+    stages = {}
+    for target in ProofTarget:
+        results = _translate(target)
+        root = tmp_path / target.value
+        assert _run_proofs(root, results).returncode == 0
+        completed = subprocess.run([sys.executable, "-c", VERIFY_PROOFS, str(root), *(r["name"] for r in results)],
+                                   cwd=ROOT, capture_output=True, text=True)
+        assert completed.returncode == 0, completed.stderr
+        stages[target] = json.loads(completed.stdout)
+
+    assert stages[ProofTarget.tokens] == stages[ProofTarget.strings]
+    assert {stage for _, stage in stages[ProofTarget.tokens]} == {"success"}
@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+import code_builders.pythonic_names_handler as names_module
+from code_builders.pythonic_names_handler import PythonicNamesHandler, generate_name
+from models.errors import PythonicNameCollisionError
+
+
+def test_names_are_derived_from_the_label(tmp_path):
+    first = PythonicNamesHandler(str(tmp_path / "first.csv"))
+    second = PythonicNamesHandler(str(tmp_path / "second.csv"))
+
+    names = [first.map_name(label) for label in ("ax-mp", "th1", "idi")]
+    assert names == [second.map_name(label) for label in ("ax-mp", "th1", "idi")]
+    assert all(re.fullmatch(r"[A-Z][A-Z1-9]{4}", name) for name in names)
+    assert first.map_name("th1") == names[1]
+    assert first.reverse_map_name(names[0]) == "ax-mp"
+
+
+def test_taken_names_are_skipped(tmp_path):
+    taken = generate_name("th1", 5, set())
+    path = tmp_path / "names.csv"
+    path.write_text(f"other {taken}\n")
+    handler = PythonicNamesHandler(str(path))
+
+    assert handler.map_name("th1") == generate_name("th1", 5, {taken}) != taken
+
+
+def test_names_are_written_in_batches_and_merged(tmp_path):
+    path = tmp_path / "names.csv"
+    path.write_text("idi T34J")
+    handler = PythonicNamesHandler(str(path), batch_size=2)
+    concurrent = PythonicNamesHandler(str(path))
+
+    handler.map_name("th1")
+    assert path.read_text() == "idi T34J"
+    concurrent.map_name("th2")
+    concurrent.flush()
+    handler.map_name("th3")  # the second new name fills the batch
+
+    lines = path.read_text().splitlines()
+    assert lines[:2] == ["idi T34J", f"th2 {concurrent.map_name('th2')}"]
+    assert sorted(line.split()[0] for line in lines[2:]) == ["th1", "th3"]
+    assert PythonicNamesHandler(str(path)).maps == {**handler.maps, "th2": concurrent.map_name("th2")}
+
+
+def test_names_written_by_another_process_are_avoided_when_created(tmp_path, monkeypatch):
+    path = tmp_path / "names.csv"
+    first, second = PythonicNamesHandler(str(path)), PythonicNamesHandler(str(path))
+    second.load()  # before the names of the first handler are written
+    taken = first.map_name("th1")
+    first.flush()
+
+    def colliding_name(label, length, exclusions):
+        return taken if taken not in exclusions else generate_name(label, length, exclusions)
+
+    monkeypatch.setattr(names_module, "generate_name", colliding_name)
+    assert second.map_name("th1") == taken
+    assert second.map_name("th2") != taken
+    second.flush()
+
+    on_disk = dict(line.split() for line in path.read_text().splitlines())
+    assert on_disk == {"th1": taken, "th2": second.map_name("th2")}
+
+
+def test_names_given_differently_before_the_flush_are_not_renamed(tmp_path, monkeypatch):
+    path = tmp_path / "names.csv"
+    first, second = PythonicNamesHandler(str(path)), PythonicNamesHandler(str(path))
+    monkeypatch.setattr(names_module, "generate_name", lambda label, length, exclusions: f"N{label.upper()}")
+    handed_out = [second.map_name("th1"), second.map_name("th2")]
+    first.map_name("th1")
+    monkeypatch.setattr(names_module, "generate_name", lambda label, length, exclusions: "NTH2")
+    first.map_name("th3")  # the name of th2 in the second handler
+    first.flush()
+
+    with pytest.raises(PythonicNameCollisionError, match="th2 as NTH2"):
+        second.flush()
+
+    assert path.read_text().splitlines() == ["th1 NTH1", "th3 NTH2"]
+    assert [second.map_name("th1"), second.map_name("th2")] == handed_out
+    second.flush()  # the collision is only reported once
@@ -0,0 +1,53 @@
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from mm import MM
+from models.toks import Toks
+from tests.conftest import DEMO_DB, TOOLS
+
+
+def _translate(share_subterms: bool):
+    with Toks(str(DEMO_DB)) as toks:
+        return list(MM().read(toks, share_subterms=share_subterms))
+
+
+def _run_proofs(root: Path, results) -> subprocess.CompletedProcess:
+    """Write the generated modules as a metamath2py package under ``root`` and run every proof."""
+    for folder in ("classes", "proofs"):
+        (root / "metamath2py" / folder).mkdir(parents=True)
+    shutil.copy2(TOOLS / "apply_substitution_for_generated_files.py", root / "metamath2py" / "classes")
+    for result in results:
+        (root / "metamath2py" / "classes" / f"{result['name']}.py").write_text(result["executable_class"])
+        (root / "metamath2py" / "proofs" / f"{result['name']}.py").write_text(result["executable_proof"])
+    names = [result["name"] for result in results]
+    script = ("import importlib\n"
+              f"for name in {names!r}:\n"
+              "    module = importlib.import_module(f'metamath2py.proofs.{name}')\n"
+              "    getattr(module, f'{name}_proof')().proof()\n")
+    return subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+
+
+def test_shared_subterms_emit_every_statement_once(isolated_name_maps):
+    plain = _translate(share_subterms=False)
+    shared = _translate(share_subterms=True)
+
+    assert [result["original_name"] for result in shared] == [result["original_name"] for result in plain]
+    for plain_result, shared_result in zip(plain, shared):
+        assert shared_result["executable_class"] == plain_result["executable_class"]
+    plain_lines = plain[-1]["proof_lines"].splitlines()
+    shared_lines = shared[-1]["proof_lines"].splitlines()
+    assert len(shared_lines) < len(plain_lines)
+    right_hand_sides = [line.split(" = ", 1)[1] for line in shared_lines]
+    assert len(set(right_hand_sides)) == len(right_hand_sides)
+    marks = [int(mark) for mark in re.findall(r"^\s*x_(\d+) =", shared[-1]["proof_lines"], re.MULTILINE)]
+    assert marks == list(range(1, len(marks) + 1))
+
+
+def test_shared_proofs_still_run(isolated_name_maps, tmp_path):
+    for share_subterms in (False, True):
+        root = tmp_path / str(share_subterms)
+        completed = _run_proofs(root, _translate(share_subterms))
+        assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,32 @@
+from code_builders.substitution import SubstitutionTemplate, apply_subst, substitute_symbols
+from models.marked_stack import MarkedStackSample
+from models.mm_models import Statement, Symbol, Var
+from models.symbol_table import symbol_table
+
+
+def _statement(text: str) -> Statement:
+    return Statement([Symbol(tok) for tok in text.split()])
+
+
+def test_template_matches_token_by_token_substitution():
+    statement = _statement("|- ( ph -> ( ps -> ph ) )")
+    variable_ids = set(symbol_table.intern_all(["ph", "ps"]))
+    values = {symbol_table.intern("ph"): _statement("( ch /\\ th )").symbols,
+              symbol_table.intern("ps"): _statement("ta").symbols}
+
+    substituted = SubstitutionTemplate(statement.symbols, variable_ids).apply(values)
+
+    assert substituted == substitute_symbols(statement.symbols, values)
+    assert symbol_table.names(substituted) == "|- ( ( ch /\\ th ) -> ( ta -> ( ch /\\ th ) ) )".split()
+    assert SubstitutionTemplate(_statement("|- T.").symbols, variable_ids).apply({}) == _statement("|- T.").symbols
+
+
+def test_substitution_records_are_built_on_demand():
+    substitution = {Var("ph"): MarkedStackSample(mark="x_1", statement=_statement("ps"))}
+
+    result = apply_subst(_statement("|- ( ph -> ph )"), substitution)
+
+    assert result.statement == _statement("|- ( ps -> ps )")
+    assert [(record.variable, record.stack_mark) for record in result.substituted] == [
+        (Var("ph"), "x_1"), (Var("ph"), "x_1")]
+    assert [symbol.content for symbol in result.substituted[0].substituted] == ["ps"]
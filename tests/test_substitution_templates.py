@@ -0,0 +1,39 @@
+import importlib.util
+
+import pytest
+
+from mm import MM
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+from tests.test_shared_subterms import TOOLS, _run_proofs
+
+spec = importlib.util.spec_from_file_location("apply_substitution_for_generated_files",
+                                              TOOLS / "apply_substitution_for_generated_files.py")
+helper = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(helper)
+
+
+@pytest.mark.parametrize("statement, substitution", [
+    ("|- ( ph -> ( ps -> ph ) )", {"ph": "wff ( ch /\\ th )", "ps": "wff ta"}),
+    ("|- ( ph -> ps )", {"ph": "wff ch"}),  # ps is kept
+    ("|- T.", {"ph": "wff ch"}),
+    ("ph", {"ph": "wff"}),  # the value is only a typecode
+    ("|- ph ps", {"ph": "wff ch", "ps": "wff th"}),
+])
+def test_template_matches_apply_substitution(statement, substitution):
+    template = helper.StatementTemplate(statement, ["ph", "ps"])
+
+    assert template.substitute(substitution) == helper.apply_substitution(statement, substitution)
+    assert template.statement == statement
+
+
+def test_generated_classes_tokenize_their_statements_once(isolated_name_maps, tmp_path):
+    with Toks(str(DEMO_DB)) as toks:
+        results = list(MM().read(toks))
+    for result in results:
+        assert "StatementTemplate(" in result["executable_class"]
+        assert "apply_substitution(" not in result["executable_class"]
+        assert 'self.assertion = r"""' in result["executable_class"]
+
+    completed = _run_proofs(tmp_path, results)
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,52 @@
+import pickle
+
+from models.mm_models import EssentialHyp, Statement, Symbol
+from models.symbol_table import CONSTANT, VARIABLE, SymbolKinds, SymbolTable, symbol_table
+
+
+def _statement(text: str) -> Statement:
+    return Statement([Symbol(tok) for tok in text.split()])
+
+
+def test_statements_are_interned_id_tuples_with_symbol_views():
+    statement = _statement("|- ( ph -> ph )")
+
+    assert statement.symbols == symbol_table.intern_all("|- ( ph -> ph )".split())
+    assert statement.symbols[2] == statement.symbols[4]
+    assert [symbol.content for symbol in statement.statement_content] == "|- ( ph -> ph )".split()
+    assert statement.statement_content[2] is statement.statement_content[4]
+    assert str(statement) == '"|- ( ph -> ph )"'
+
+
+def test_statement_equality_and_hash_follow_symbols_and_class():
+    statement = _statement("wff ph")
+
+    assert statement == _statement("wff ph")
+    assert hash(statement) == hash(_statement("wff ph"))
+    assert statement != _statement("wff ps")
+    assert statement != EssentialHyp.from_symbols(statement.symbols)
+
+
+def test_restore_translates_ids_of_another_table():
+    table = SymbolTable()
+    table.intern("ps")
+
+    table.begin_restore(("ph", "ps"))
+    restored = table.restore_ids((0, 1, 0))
+    table.end_restore()
+
+    assert table.names(restored) == ["ph", "ps", "ph"]
+    assert table.restore_ids((0, 1)) == (0, 1)
+
+
+def test_symbol_kinds_survive_pickling():
+    kinds = SymbolKinds()
+    kinds.declare(symbol_table.intern("wff"), CONSTANT)
+    kinds.declare(symbol_table.intern("ph"), VARIABLE)
+
+    kinds = pickle.loads(pickle.dumps(kinds))
+
+    assert kinds.is_constant(symbol_table.intern("wff"))
+    assert not kinds.is_variable(symbol_table.intern("wff"))
+    assert kinds.is_variable(symbol_table.intern("ph"))
+    assert not kinds.is_constant(symbol_table.intern("never-declared"))
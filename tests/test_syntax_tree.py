@@ -0,0 +1,66 @@
+import pytest
+
+from code_builders.verifier import check_proof
+from mm import MM
+from models.errors import SyntaxParseError
+from models.mm_models import Label, Statement
+from models.symbol_table import symbol_table
+from models.syntax_tree import SyntaxGrammar
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+
+# ql.mm-like syntax: the postfix complement makes "term" left-recursive
+POSTFIX_DB = """
+$c ( ) v ' = wff term |- $.
+$v a b $.
+wva $f term a $.
+wvb $f term b $.
+wn $a term a ' $.
+wo $a term ( a v b ) $.
+wb $a wff a = b $.
+${ ax $a |- ( a ' v a ' ) ' = a ' $. $}
+th $p |- ( a ' v a ' ) ' = a ' $= wva ax $.
+"""
+
+
+def _parse_database(path):
+    mm = MM()
+    with Toks(str(path)) as toks:
+        mm.parse(toks)
+    return mm, SyntaxGrammar.from_database(mm)
+
+
+def _statement(text: str) -> Statement:
+    return Statement.from_symbols(symbol_table.intern_all(text.split()))
+
+
+def _assert_proves(mm, label: str, node):
+    proof = Statement.from_symbols(symbol_table.intern_all(node.to_proof()))
+    check_proof(mm.frame_contexts[Label(label)], mm.labels, node.statement, proof)
+
+
+def test_statement_is_parsed_into_its_syntax_proof():
+    mm, grammar = _parse_database(DEMO_DB)
+    node = grammar.parse(mm.labels[Label("th1")].statement.statement, mm.frame_contexts[Label("th1")])
+
+    assert repr(node) == "weq(tt, tt)"
+    assert node.children[0] is node.children[1]
+    assert node.to_proof() == ["tt", "tt", "weq"]
+    assert symbol_table.names(node.statement.symbols) == ["wff", "t", "=", "t"]
+    _assert_proves(mm, "th1", node)
+
+
+def test_left_recursive_syntax_and_shared_subterms(tmp_path):
+    path = tmp_path / "postfix.mm"
+    path.write_text(POSTFIX_DB)
+    mm, grammar = _parse_database(path)
+
+    node = grammar.parse(_statement("|- ( a ' v a ' ) ' = a '"))
+    assert repr(node) == "wb(wn(wo(wn(wva), wn(wva))), wn(wva))"
+    left, right = node.children
+    assert left.children[0].children[0] is right
+    assert grammar.parse(_statement("term a '")) is right
+    _assert_proves(mm, "th", node)
+
+    with pytest.raises(SyntaxParseError):
+        grammar.parse(_statement("|- ( a v ) = a"))
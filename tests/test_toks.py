@@ -0,0 +1,33 @@
+from models.toks import Toks
+
+
+def _write_db(tmp_path, content: str) -> str:
+    path = tmp_path / "db.mm"
+    path.write_bytes(content.encode("ascii"))
+    return str(path)
+
+
+def test_iter_tokens_yields_byte_offsets(tmp_path):
+    content = "$c wff |- $.\n\n  \n ph $f wff ph $.\n"
+    toks = Toks(_write_db(tmp_path, content))
+
+    pairs = list(toks.iter_tokens())
+
+    assert [tok for tok, _ in pairs] == content.split()
+    for tok, offset in pairs:
+        assert content[offset:offset + len(tok)] == tok
+
+
+def test_readc_skips_comments_and_returns_last_one(tmp_path):
+    toks = Toks(_write_db(tmp_path, "$( first $) $( second  comment $)\n  a1 $a |- ph $."))
+
+    comment, tok = toks.readc()
+
+    assert comment == "second comment"
+    assert tok == "a1"
+    assert toks.last_offset == 36
+
+
+def test_empty_file_reads_nothing(tmp_path):
+    with Toks(_write_db(tmp_path, "")) as toks:
+        assert toks.readc() == (None, None)
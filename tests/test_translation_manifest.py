@@ -0,0 +1,76 @@
+from code_builders.class_builder import ProofTarget
+from translation_manifest import diff_manifests, fingerprint_database, load_manifest
+from translation_pipeline import load_database, translate_database, translate_incrementally
+from tests.conftest import DEMO_DB
+
+TH2 = "\n    th2 $p |- r = r $= tr th1 $.\n"
+
+
+def _write_db(tmp_path, content: str) -> str:
+    path = tmp_path / "db.mm"
+    path.write_text(content)
+    return str(path)
+
+
+def _fingerprints(source_path: str):
+    return fingerprint_database(load_database(source_path))
+
+
+def test_changed_statement_invalidates_its_dependents_only(tmp_path):
+    original = DEMO_DB.read_text() + TH2
+    previous = _fingerprints(_write_db(tmp_path, original))
+
+    current = _fingerprints(_write_db(tmp_path, original.replace("a2 $a |- ( t + 0 ) = t $.", "a2 $a |- ( 0 + t ) = t $.")))
+    diff = diff_manifests(previous, current)
+
+    # th1 uses a2; th2 only uses th1, whose statement did not change
+    assert diff.changed == ["a2", "th1"]
+    assert diff.to_translate == ["a2", "th1"]
+    assert "th2" in diff.unchanged
+    assert diff.new == [] and diff.deleted == [] and diff.renamed == {}
+
+
+def test_renames_and_deletions_are_reported(tmp_path):
+    original = DEMO_DB.read_text() + TH2
+    previous = _fingerprints(_write_db(tmp_path, original))
+
+    content = original.replace("th2 $p", "th2renamed $p").replace("    a2 $a", "    a3 $a").replace("tt a2", "tt a3")
+    diff = diff_manifests(previous, _fingerprints(_write_db(tmp_path, content + "\n    a4 $a wff t = t $.\n")))
+
+    assert diff.renamed == {"a2": "a3", "th2": "th2renamed"}
+    assert diff.new == ["a4"]
+    assert diff.deleted == []
+    assert diff.changed == ["th1"]  # its proof refers to a2 by name
+
+
+def test_incremental_run_translates_only_changes(isolated_name_maps, tmp_path):
+    source_path = _write_db(tmp_path, DEMO_DB.read_text() + TH2)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    diff, translations = translate_incrementally(source_path, manifest_path, jobs=1)
+    first = list(translations)
+    assert [row["original_name"] for row in first] == diff.to_translate == list(load_manifest(manifest_path))
+
+    diff, translations = translate_incrementally(source_path, manifest_path, jobs=1)
+    assert list(translations) == [] and diff.to_translate == []
+
+    renamed_path = _write_db(tmp_path, DEMO_DB.read_text() + TH2.replace("th2", "th3"))
+    diff, translations = translate_incrementally(renamed_path, manifest_path, jobs=1)
+    assert diff.renamed == {"th2": "th3"}
+    assert list(translations) == [row for row in translate_database(renamed_path, jobs=1)
+                                  if row["original_name"] == "th3"]
+    assert "th3" in load_manifest(manifest_path)
+
+
+def test_other_build_options_translate_everything(isolated_name_maps, tmp_path):
+    source_path = _write_db(tmp_path, DEMO_DB.read_text())
+    manifest_path = str(tmp_path / "manifest.json")
+    diff, translations = translate_incrementally(source_path, manifest_path, jobs=1)
+    list(translations)
+
+    diff, translations = translate_incrementally(source_path, manifest_path, jobs=1, target=ProofTarget.tokens)
+
+    assert diff.changed == diff.to_translate == list(load_manifest(manifest_path))
+    assert all("call_tokens" in row["executable_class"] for row in translations)
+    diff, translations = translate_incrementally(source_path, manifest_path, jobs=1, target=ProofTarget.tokens)
+    assert diff.to_translate == []
@@ -0,0 +1,23 @@
+from mm import MM
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+from translation_pipeline import translate_database
+
+
+def test_parallel_translation_matches_sequential_order_and_output(isolated_name_maps):
+    with Toks(str(DEMO_DB)) as toks:
+        sequential = list(MM().read(toks))
+
+    parallel = list(translate_database(str(DEMO_DB), jobs=2, chunksize=1))
+
+    assert [result["original_name"] for result in parallel] == [result["original_name"] for result in sequential]
+    assert parallel == sequential
+
+
+def test_translation_from_snapshot_matches_sequential_output(isolated_name_maps, tmp_path):
+    with Toks(str(DEMO_DB)) as toks:
+        sequential = list(MM().read(toks))
+
+    snapshot = str(tmp_path / "demo0.snapshot")
+    assert list(translate_database(str(DEMO_DB), jobs=1, snapshot_path=snapshot)) == sequential
+    assert list(translate_database(str(DEMO_DB), jobs=1, snapshot_path=snapshot)) == sequential
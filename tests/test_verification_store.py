@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import verification
+from models.errors import VerificationStoreFormatError
+from verification_store import DependencyFingerprints, VerificationStore
+
+
+def _fingerprints(names):
+    dependencies = DependencyFingerprints(verification._DEFAULT_PROOFS_ROOT, verification._DEFAULT_CLASSES_ROOT)
+    return {name: dependencies.fingerprint(name) for name in names}
+
+
+def _append(folder, name, text):
+    with open(os.path.join(folder, f"{name}.py"), "a") as f:
+        f.write(text)
+
+
+def test_fingerprints_follow_the_imported_modules(demo_proofs):
+    before = _fingerprints(demo_proofs)
+    theorem = demo_proofs[-2]
+    used_class = next(name for name in verification._imported_classes(
+        os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{theorem}.py")) if name != theorem)
+
+    _append(verification._DEFAULT_PROOFS_ROOT, theorem, "\n# edited\n")
+    edited_proof = _fingerprints(demo_proofs)
+    assert [name for name in demo_proofs if edited_proof[name] != before[name]] == [theorem]
+
+    _append(verification._DEFAULT_CLASSES_ROOT, used_class, "\n# edited\n")
+    edited_class = _fingerprints(demo_proofs)
+    changed = {name for name in demo_proofs if edited_class[name] != edited_proof[name]}
+    assert {theorem, "BROKEN", used_class} <= changed
+    assert all(verification._imported_classes(os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{name}.py"))
+               .count(used_class) for name in changed)
+
+    _append(verification._DEFAULT_CLASSES_ROOT, "apply_substitution_for_generated_files", "\n# edited\n")
+    edited_helper = _fingerprints(demo_proofs)
+    assert all(edited_helper[name] != edited_class[name] for name in demo_proofs)
+
+
+def test_stored_results_are_reused_while_the_fingerprint_holds(demo_proofs, tmp_path):
+    fingerprints = _fingerprints(demo_proofs)
+    results = list(verification.verify_proofs(demo_proofs))
+    with VerificationStore(str(tmp_path / "results.sqlite")) as store:
+        store.record(results, fingerprints)
+
+    fingerprints[demo_proofs[0]] = "changed"
+    with VerificationStore(str(tmp_path / "results.sqlite")) as store:
+        reused = store.lookup(fingerprints)
+
+    assert sorted(reused) == sorted(demo_proofs[1:])
+    assert [reused[result.statement_name] for result in results[1:]] == results[1:]
+    assert reused["BROKEN"].stage == verification.ProofCheckStage.EXECUTION
+
+
+def test_a_file_that_is_not_a_store_is_rejected(tmp_path):
+    (tmp_path / "results.sqlite").write_text("not a database" * 100)
+    with pytest.raises(VerificationStoreFormatError):
+        VerificationStore(str(tmp_path / "results.sqlite"))
@@ -0,0 +1,58 @@
+import pytest
+
+from code_builders.verifier import verify
+from mm import MM
+from models.mm_models import Label
+from models.toks import Toks
+from tests.conftest import DEMO_DB
+from translation_pipeline import verify_database
+
+COMPRESSED_TH2 = "\n    th2 $p |- r = r $= ( th1 ) AB $.\n"
+
+
+def _verify(tmp_path, content: str):
+    path = tmp_path / "db.mm"
+    path.write_text(content)
+    with Toks(str(path)) as toks:
+        return list(MM().read(toks, verify_only=True))
+
+
+def test_verify_only_reports_every_proof(tmp_path):
+    results = _verify(tmp_path, DEMO_DB.read_text() + COMPRESSED_TH2)
+
+    assert [(result.label, result.passed, result.error) for result in results] == [
+        ("th1", True, None), ("th2", True, None)]
+    assert all(result.seconds >= 0 for result in results)
+
+
+def test_failing_proof_is_reported_and_the_run_goes_on(tmp_path):
+    content = DEMO_DB.read_text().replace("tt a1 mp mp", "tt a1 mp") + COMPRESSED_TH2
+    results = _verify(tmp_path, content)
+
+    assert [(result.label, result.passed) for result in results] == [("th1", False), ("th2", True)]
+    assert results[0].error.startswith("OverfullStackError")
+
+
+def test_parallel_verification_reports_in_database_order(tmp_path):
+    content = DEMO_DB.read_text().replace("tt a1 mp mp", "tt a1 mp") + COMPRESSED_TH2
+    path = tmp_path / "db.mm"
+    path.write_text(content)
+    sequential = _verify(tmp_path, content)
+
+    for jobs, snapshot in ((2, None), (1, str(tmp_path / "db.snapshot"))):
+        results = list(verify_database(str(path), jobs=jobs, snapshot_path=snapshot, chunksize=1))
+        assert [(result.label, result.passed, result.error) for result in results] == \
+            [(result.label, result.passed, result.error) for result in sequential]
+
+
+def test_translating_verify_needs_a_builder():
+    mm = MM()
+    with Toks(str(DEMO_DB)) as toks:
+        mm.parse(toks)
+    th1 = Label("th1")
+
+    with pytest.raises(ValueError, match="builder is required"):
+        verify(frame_stack=mm.frame_contexts[th1], labels=mm.labels,
+               target_statement=mm.labels[th1].statement.statement, proof=mm.proofs[th1])
+    verify(frame_stack=mm.frame_contexts[th1], labels=mm.labels,
+           target_statement=mm.labels[th1].statement.statement, proof=mm.proofs[th1], verify_only=True)
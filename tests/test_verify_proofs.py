@@ -0,0 +1,19 @@
+import pytest
+
+import verification
+from verify_metamath2py_files import summarize
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_proofs_are_verified_in_batches(demo_proofs, jobs):
+    results = list(verification.verify_proofs(verification.iter_statement_names(), jobs=jobs, chunksize=3))
+
+    assert sorted(result.statement_name for result in results) == sorted(demo_proofs)
+    failed = [result for result in results if not result.success]
+    assert [(result.statement_name, result.stage) for result in failed] == [
+        ("BROKEN", verification.ProofCheckStage.EXECUTION)]
+
+    summary = summarize(results, elapsed=1.0)
+    assert (summary["total"], summary["passed"], summary["failed"]) == (len(demo_proofs), len(demo_proofs) - 1, 1)
+    assert summary["failures_by_stage"] == {"execution": 1}
+    assert summary["failures"][0]["error_message"] == "broken"
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import verification
+from verification import ProofCheckStage, verify_proof, verify_sources
+
+
+def _sources(name, label):
+    with open(os.path.join(verification._DEFAULT_CLASSES_ROOT, f"{name}.py")) as f:
+        class_source = f.read()
+    with open(os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{name}.py")) as f:
+        proof_source = f.read()
+    return class_source.replace(name, label), proof_source.replace(f"{name} import {name}", f"{label} import {label}").replace(
+        f"class {name}_proof({name})", f"class {label}_proof({label})")
+
+
+def _files():
+    return sorted(os.listdir(verification._DEFAULT_CLASSES_ROOT) + os.listdir(verification._DEFAULT_PROOFS_ROOT))
+
+
+def test_sources_are_verified_without_files(demo_proofs):
+    files = _files()
+    class_source, proof_source = _sources(demo_proofs[-2], "IN_MEMORY")
+
+    result = verify_sources(class_source, proof_source, "IN_MEMORY")
+
+    assert (result.statement_name, result.success, result.stage) == ("IN_MEMORY", True, ProofCheckStage.SUCCESS)
+    assert _files() == files
+    assert not [name for name in sys.modules if name.endswith("IN_MEMORY")]
+
+
+def test_in_memory_class_shadows_the_class_of_the_same_name(demo_proofs):
+    name = demo_proofs[-2]
+    class_source, proof_source = _sources(name, name)
+    class_source = class_source.replace("self.assertion = ", 'self.assertion = "|- changed" or ')
+
+    result = verify_sources(class_source, proof_source, name)
+
+    assert (result.success, result.stage) == (False, ProofCheckStage.EXECUTION)
+    assert "|- changed" in result.error_message
+    assert verify_proof(name).success
+
+
+def test_failures_have_the_stages_of_verify_proof(demo_proofs):
+    class_source, proof_source = _sources(demo_proofs[-2], "IN_MEMORY")
+
+    assert verify_sources(class_source, proof_source + "\n    )", "IN_MEMORY").stage == ProofCheckStage.IMPORT
+    missing_class = proof_source.replace("from metamath2py.classes.IN_MEMORY", "from metamath2py.classes.MISSING")
+    assert verify_sources(class_source, missing_class, "IN_MEMORY").stage == ProofCheckStage.IMPORT
+    renamed_proof = proof_source.replace("class IN_MEMORY_proof", "class RENAMED_proof")
+    assert verify_sources(class_source, renamed_proof, "IN_MEMORY").stage == ProofCheckStage.LOOKUP
@@ -0,0 +1,146 @@
+import os
+import re
+
+import pytest
+
+import verification
+from saplings.dtos.node import Node
+from saplings.dtos.proof_state import ProofState, ProofStep
+from saplings.dtos.tasks.create_node_task import CreateNodeTask
+from saplings.dtos.theorem_state import TheoremState
+from saplings.node_scorer import NodeScorer
+from saplings.tools.theorem_recovery import TheoremRecoveryRunner
+from verification import ProofCheckStage, step_cache, verify_sources, verify_steps
+
+
+@pytest.fixture
+def theorem(demo_proofs):
+    """The name, class source and proof source of the demo0 theorem."""
+    step_cache.clear()
+    name = demo_proofs[-2]
+    with open(os.path.join(verification._DEFAULT_CLASSES_ROOT, f"{name}.py")) as f:
+        class_source = f.read()
+    with open(os.path.join(verification._DEFAULT_PROOFS_ROOT, f"{name}.py")) as f:
+        proof_source = f.read()
+    yield name, class_source, proof_source
+    step_cache.clear()
+
+
+def _truncated(proof_source, steps):
+    """The proof with only its first ``steps`` steps."""
+    return proof_source[:proof_source.index(f"        x_{steps + 1} = ")]
+
+
+def test_every_step_is_executed_and_recorded(theorem):
+    name, class_source, proof_source = theorem
+    total = proof_source.count("        x_") + 1  # and the comparison with the assertion
+
+    result = verify_steps(class_source, proof_source, name)
+
+    assert (result.success, result.stage, result.total_steps, result.valid_steps) == (
+        True, ProofCheckStage.SUCCESS, total, total)
+    assert list(result.values) == [f"x_{index}" for index in range(1, total)]
+    assert result.values[f"x_{total - 1}"] == "|- t = t"
+    assert verify_steps(class_source, proof_source, name).reused_steps == total
+
+
+def test_extended_proof_resumes_after_the_verified_prefix(theorem):
+    name, class_source, proof_source = theorem
+
+    parent = verify_steps(class_source, _truncated(proof_source, 20), name)
+    child = verify_steps(class_source, proof_source, name)
+
+    assert (parent.success, parent.total_steps) == (True, 20)
+    assert (child.success, child.reused_steps) == (True, 20)
+    assert child.values == verify_steps(class_source + "\n", proof_source, name).values
+
+
+def test_statements_on_several_lines_are_one_step(theorem):
+    name, class_source, proof_source = theorem
+    # the closing bracket at the indentation of the steps needs the proof to be parsed as a whole
+    reformatted = re.sub(r"(x_2 = \w+\(\)\.call\()(.*)\)$", r"\1\n            \2\n        )", proof_source, flags=re.MULTILINE)
+    assert reformatted != proof_source
+
+    result = verify_steps(class_source, reformatted, name)
+
+    assert (result.success, result.total_steps) == (True, verify_steps(class_source, proof_source, name).total_steps)
+    assert result.values == verify_steps(class_source, proof_source, name).values
+
+
+def test_steps_see_earlier_steps_and_the_proof_class_like_verify_sources(theorem):
+    name, class_source, proof_source = theorem
+    last = proof_source.count("        x_")
+    comprehension = proof_source.replace(
+        "\n\n        if x_", f'\n        x_{last + 1} = " ".join(w for w in (x_1, "b"))\n\n        if x_')
+    # a member besides the proof method needs the proof to be parsed as a whole
+    member = comprehension.replace(
+        f"x_{last + 1} = \" \".join(", f"x_{last + 1} = self.separator.join(").replace(
+        "    def proof(self):", '    separator = " "\n\n    def proof(self):')
+
+    for source in comprehension, member:
+        result = verify_steps(class_source, source, name)
+
+        assert (result.success, result.stage) == (True, ProofCheckStage.SUCCESS)
+        assert result.values[f"x_{last + 1}"] == "term t b"
+        assert verify_sources(class_source, source, name).success
+
+        broken = source.replace('(x_1, "b")', '(x_1, undefined_name)')
+        result = verify_steps(class_source, broken, name)
+        assert (result.stage, result.first_failing_step) == (ProofCheckStage.EXECUTION, last)
+        assert verify_sources(class_source, broken, name).stage == ProofCheckStage.EXECUTION
+
+
+def test_a_step_that_returns_ends_the_proof(theorem):
+    name, class_source, proof_source = theorem
+    early_return = re.sub(r"(\n        x_3 = )", r'\n        if x_1 == "term t":\n            return\n        x_2 = undefined_name\1',
+                          proof_source)
+    # the lines after the step that returns are never executed, so they do not have to be valid
+    early_return = early_return.replace("\n\n        if x_", "\n        x_0 = undefined_name\n\n        if x_")
+    final_return = proof_source.replace("\n\n        if x_", "\n\n        if x_1 == \"term t\":\n            return\n        if x_")
+
+    for source in early_return, final_return:
+        result = verify_steps(class_source, source, name)
+
+        assert (result.success, result.stage, result.valid_steps) == (True, ProofCheckStage.SUCCESS, result.total_steps)
+        assert verify_sources(class_source, source, name).success
+    assert "undefined_name" not in str(verify_steps(class_source, early_return, name).values)
+    lines = early_return.splitlines()
+    failure = verify_steps(class_source, early_return.replace('== "term t"', '== "other"'), name)
+    assert f'line {lines.index("        x_2 = undefined_name") + 1}, in _step\nNameError' in failure.traceback
+
+
+def test_first_failing_step_is_reported(theorem):
+    name, class_source, proof_source = theorem
+    broken = re.sub(r"x_10 = .*", "x_10 = undefined_name", proof_source)
+
+    result = verify_steps(class_source, broken, name)
+
+    assert (result.success, result.stage, result.first_failing_step, result.valid_steps) == (
+        False, ProofCheckStage.EXECUTION, 9, 9)
+    assert list(result.values) == [f"x_{index}" for index in range(1, 10)]
+    assert "undefined_name" in result.error_message
+
+    wrong_assertion = class_source.replace('self.assertion = r"""|- t = t"""', 'self.assertion = r"""|- t"""')
+    result = verify_steps(wrong_assertion, proof_source, name)
+    assert result.first_failing_step == result.total_steps - 1
+
+
+def test_node_scorer_counts_valid_steps(theorem):
+    name, class_source, proof_source = theorem
+    steps = [ProofStep(left=left, right=right, comment=None)
+             for left, right in re.findall(r"^        (x_\d+) = (.*)$", proof_source, re.MULTILINE)]
+    theorem_state = TheoremState(label=name, floating_args=["t"], essential_args=[], required_theorem_premises=[],
+                                 assertion="|- t = t")
+    parent = Node(created_node_task=CreateNodeTask(goal="half", theorem=theorem_state,
+                                                   proof=ProofState(steps=steps[:len(steps) // 2])))
+    child = Node(created_node_task=CreateNodeTask(goal="all", theorem=theorem_state, proof=ProofState(steps=steps)),
+                 parent_node=parent)
+
+    parent_score = NodeScorer().score(parent)
+    assert TheoremRecoveryRunner(theorem_state, child.created_node_task.proof).verify_steps().reused_steps == len(steps) // 2
+    child_score = NodeScorer().score(child)
+
+    assert parent_score.stage == ProofCheckStage.EXECUTION
+    assert (parent_score.valid_steps, parent_score.total_steps) == (len(steps) // 2, len(steps) // 2 + 1)
+    assert parent_score.verify_progress == pytest.approx(0.4 + 0.6 * (len(steps) // 2) / (len(steps) // 2 + 1))
+    assert (child_score.stage, child_score.verify_progress) == (ProofCheckStage.SUCCESS, 1.0)
@@ -1,3 +1,8 @@
+import sys
+from itertools import chain
+from typing import Iterable, List, Tuple
+
+
 def apply_substitution(statement: str, substitution: dict[str, str]) -> str:
     result = []
     for tok in statement.split(sep=' '):
@@ -8,4 +13,58 @@ def apply_substitution(statement: str, substitution: dict[str, str]) -> str:
             result.append(with_no_specifier)
         else:
             result.append(tok)
-    return ' '.join(result)
\ No newline at end of file
+    return ' '.join(result)
+
+
+class StatementTemplate:
+    """A statement split once into constant pieces and variable slots.
+
+    Generated classes build their templates at import time, so ``call`` only fills
+    the slots and joins the pieces instead of tokenizing the statement on every
+    call. ``substitute`` returns what ``apply_substitution`` returns for a
+    substitution of the given ``variables``; ``substitute_tokens`` does the same
+    for statements given as tuples of interned tokens, the typecode first.
+    """
+    __slots__ = ('statement', 'tokens', '_pieces', '_token_pieces', '_slots')
+
+    def __init__(self, statement: str, variables: Iterable[str]) -> None:
+        self.statement = statement
+        self.tokens = tuple(sys.intern(tok) for tok in statement.split(' '))
+        variables = set(variables)
+        runs: List[Tuple[str, ...]] = []
+        slots: List[Tuple[int, str]] = []
+        constants: List[str] = []
+        for tok in self.tokens:
+            if tok not in variables:
+                constants.append(tok)
+                continue
+            if constants:
+                runs.append(tuple(constants))
+                constants = []
+            slots.append((len(runs), tok))
+            runs.append((tok,))
+        if constants or not runs:
+            runs.append(tuple(constants))
+        self._pieces = tuple(' '.join(run) for run in runs)
+        self._token_pieces = tuple(runs)
+        self._slots = tuple(slots)
+
+    def substitute(self, substitution: dict[str, str]) -> str:
+        if not self._slots:
+            return self.statement
+        pieces = list(self._pieces)
+        for index, variable in self._slots:
+            value = substitution.get(variable)
+            if value is not None:
+                pieces[index] = value.partition(' ')[2]  # without the typecode, as in apply_substitution
+        return ' '.join(pieces)
+
+    def substitute_tokens(self, substitution: dict[str, Tuple[str, ...]]) -> Tuple[str, ...]:
+        if not self._slots:
+            return self.tokens
+        pieces = list(self._token_pieces)
+        for index, variable in self._slots:
+            value = substitution.get(variable)
+            if value is not None:
+                pieces[index] = value[1:]
+        return tuple(chain.from_iterable(pieces))
@@ -0,0 +1,174 @@
+"""Fingerprints of the translated assertions, used to re-translate only what changed.
+
+The output of an assertion depends on its own statement, comment and proof, on the
+frame it is verified in and on the *interface* (hypotheses and conclusion) of every
+statement its proof refers to. The fingerprint hashes exactly these, so:
+
+* editing a proof only invalidates that theorem;
+* editing the statement of a theorem also invalidates every theorem using it;
+* a theorem whose only change is its label keeps its label-free content hash,
+  which is how renames are told apart from a deletion plus an addition;
+* changing the build options (such as the proof target) invalidates everything,
+  since the translations of one run call the classes generated by earlier ones.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from mm import MM
+from models.errors import ManifestFormatError
+from models.mm_models import Assertion, Label, StatementType
+from models.snapshot import file_sha256
+from models.symbol_table import symbol_table
+
+MANIFEST_FORMAT = 'metamath2py-translation-manifest'
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    fingerprint: str  # changes whenever the translation of the assertion may change
+    content_hash: str  # the same without the label of the assertion itself
+
+
+@dataclass
+class ManifestDiff:
+    """Comparison of the manifest of a previous run with the current database (labels in file order)."""
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    renamed: Dict[str, str] = field(default_factory=dict)  # old label -> new label
+    to_translate: List[str] = field(default_factory=list)  # new, changed and renamed assertions
+
+
+def _sha256(parts: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _text(symbols) -> str:
+    return ' '.join(symbol_table.names(symbols))
+
+
+def interface_hash(assertion: Assertion) -> str:
+    """Hash of what a proof using the assertion sees of it: $d conditions, hypotheses and conclusion."""
+    parts = sorted(f'$d {definition.x} {definition.y}' for definition in assertion.definitions)
+    parts.extend(f'$f {floating.const} {floating.variable}' for floating in assertion.floating)
+    parts.extend(f'$e {_text(essential.symbols)}' for essential in assertion.essential)
+    parts.append(_text(assertion.statement.symbols))
+    return _sha256(parts)
+
+
+def _proof_references(proof_names: List[str]) -> List[str]:
+    if proof_names and proof_names[0] == '(':
+        closing = proof_names.index(')') if ')' in proof_names else len(proof_names)
+        proof_names = proof_names[1:closing]
+    return list(dict.fromkeys(name for name in proof_names if name != '?'))
+
+
+def fingerprint_database(mm: MM, options: Optional[Dict[str, Any]] = None) -> Dict[str, ManifestEntry]:
+    """Return the manifest entry of every $a/$p of a database read by :meth:`MM.parse`, in file order.
+
+    ``options`` are the build options of the translation; they are part of every fingerprint.
+    """
+    options_text = json.dumps(options or {}, sort_keys=True)
+    interfaces: Dict[Label, str] = {}
+    entries: Dict[str, ManifestEntry] = {}
+    for label, full_statement in mm.labels.items():
+        statement_type = full_statement.statement_type
+        if statement_type not in {StatementType.assertion, StatementType.provable}:
+            continue
+        interface = interfaces[label] = interface_hash(full_statement.statement)
+        parts = [str(statement_type), mm.comments_by_label.get(label, ''), interface]
+
+        if statement_type == StatementType.provable:
+            proof_names = symbol_table.names(mm.proofs[label].symbols)
+            parts.append(' '.join(proof_names))
+            frame_context = mm.frame_contexts[label]
+            parts.extend(essential.name for frame in frame_context for essential in frame.get_essential_labels())
+            parts.extend(sorted(f'$d {definition.x} {definition.y}'
+                                for frame in frame_context for definition in frame.get_definitions()))
+            for name in _proof_references(proof_names):
+                used = mm.labels.get(Label(name))
+                if used is None:
+                    continue
+                if used.statement_type in {StatementType.assertion, StatementType.provable}:
+                    parts.append(f'{name} {interfaces.get(used.label, "")}')
+                else:
+                    parts.append(f'{name} {used.statement_type} {_text(used.statement.symbols)}')
+
+        content_hash = _sha256(parts)
+        entries[label.name] = ManifestEntry(fingerprint=_sha256([label.name, content_hash, options_text]), content_hash=content_hash)
+    return entries
+
+
+def diff_manifests(previous: Dict[str, ManifestEntry], current: Dict[str, ManifestEntry]) -> ManifestDiff:
+    diff = ManifestDiff()
+    for name, entry in current.items():
+        if name not in previous:
+            diff.new.append(name)
+        elif previous[name].fingerprint == entry.fingerprint:
+            diff.unchanged.append(name)
+        else:
+            diff.changed.append(name)
+        if name not in previous or previous[name].fingerprint != entry.fingerprint:
+            diff.to_translate.append(name)
+
+    deleted_by_content: Dict[str, List[str]] = {}
+    for name, entry in previous.items():
+        if name not in current:
+            deleted_by_content.setdefault(entry.content_hash, []).append(name)
+    new = []
+    for name in diff.new:
+        candidates = deleted_by_content.get(current[name].content_hash)
+        if candidates:
+            diff.renamed[candidates.pop(0)] = name
+        else:
+            new.append(name)
+    diff.new = new
+    diff.deleted = [name for name in previous if name not in current and name not in diff.renamed]
+    return diff
+
+
+def load_manifest(manifest_path: str) -> Dict[str, ManifestEntry]:
+    """Return the entries of a manifest; a missing manifest is empty, so everything gets translated."""
+    if not os.path.isfile(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            manifest = json.load(file)
+    except ValueError as exc:
+        raise ManifestFormatError(manifest_path, f'invalid JSON ({exc})')
+    if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT:
+        raise ManifestFormatError(manifest_path, f'not a {MANIFEST_FORMAT} file')
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ManifestFormatError(manifest_path, f'version {manifest.get("version")}, expected {MANIFEST_VERSION}')
+    return {name: ManifestEntry(*entry) for name, entry in manifest['labels'].items()}
+
+
+def write_manifest(manifest_path: str, source_path: str, entries: Dict[str, ManifestEntry],
+                   options: Optional[Dict[str, Any]] = None) -> None:
+    """Atomically replace the manifest with ``entries``, fingerprinted with the build ``options``."""
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'version': MANIFEST_VERSION,
+        'source_sha256': file_sha256(source_path),
+        'options': options or {},
+        'labels': {name: [entry.fingerprint, entry.content_hash] for name, entry in entries.items()},
+    }
+    tmp_path = f'{manifest_path}.tmp{os.getpid()}'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=0)
+        os.replace(tmp_path, manifest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
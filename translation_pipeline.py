@@ -0,0 +1,280 @@
+"""Two-phase translation of a Metamath database into metamath2py sources.
+
+:meth:`mm.MM.read` interleaves parsing, verification and code generation on a
+single core. Here the database is first parsed once (phase one), which yields
+the assertion table together with the frame context, proof and comment of every
+theorem. Verification and :class:`ClassBuilder` output of every ``$a``/``$p``
+(phase two) only read that table, so they are fanned out over a
+:class:`~concurrent.futures.ProcessPoolExecutor`:
+
+* on platforms with ``fork`` the workers inherit the parsed table copy-on-write;
+* elsewhere every worker loads the on-disk snapshot written by
+  :meth:`mm.MM.from_database`.
+
+Results are yielded in database order, exactly as the sequential mode does.
+Checking proofs without translating them (:func:`verify_database`) is fanned
+out the same way. With a manifest of the previous run (see :mod:`translation_manifest`), only the
+assertions whose fingerprint changed are translated again.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from code_builders.class_builder import ClassBuilder, ProofTarget
+from code_builders.floating_names_handler import floating_names_handler
+from code_builders.pythonic_names_handler import pythonic_names_handler
+from code_builders.verifier import check_theorem, verify
+from mm import MM
+from models.instrumentation import active_profiler, phase
+from models.mm_models import FullStatement, Label, StatementType, VerificationResult
+from models.toks import Toks
+from translation_manifest import ManifestDiff, diff_manifests, fingerprint_database, load_manifest, write_manifest
+
+# Parsed database shared with the workers; it is only read once the pool is started.
+_TABLE: Optional[MM] = None
+_POSITIONS: Dict[Label, int] = {}
+
+
+class LabelsBefore:
+    """Read-only view of a label table that only exposes the labels declared before ``limit``.
+
+    A theorem may only use statements that precede it, and the full table of a parsed
+    database also holds everything declared later.
+    """
+
+    def __init__(self, labels: Dict[Label, FullStatement], positions: Dict[Label, int], limit: int) -> None:
+        self._labels = labels
+        self._positions = positions
+        self._limit = limit
+
+    def get(self, label: Label, default: Optional[FullStatement] = None) -> Optional[FullStatement]:
+        position = self._positions.get(label)
+        if position is None or position >= self._limit:
+            return default
+        return self._labels[label]
+
+    def __contains__(self, label: Label) -> bool:
+        return self.get(label) is not None
+
+
+def _share_table(mm: MM) -> None:
+    global _TABLE, _POSITIONS
+    _TABLE = mm
+    _POSITIONS = {label: position for position, label in enumerate(mm.labels)}
+
+
+def _load_table(snapshot_path: str, source_path: str) -> None:
+    _share_table(MM.load_snapshot(snapshot_path, source_path))
+
+
+def _register_names(mm: MM) -> None:
+    """Assign every Python name up front, so that workers never write the name maps concurrently."""
+    for label, full_statement in mm.labels.items():
+        if full_statement.statement_type in {StatementType.assertion, StatementType.provable}:
+            pythonic_names_handler.map_name(label.name)
+            for floating in full_statement.statement.floating:
+                floating_names_handler.sanitize(floating.variable.content)
+    pythonic_names_handler.flush()
+
+
+def translate_label(name: str,
+                    share_subterms: bool = False,
+                    target: ProofTarget = ProofTarget.strings) -> Dict[str, str]:
+    """Verify (for a $p) and translate one assertion of the shared table."""
+    mm = _TABLE
+    started = time.perf_counter()
+    label = Label(name)
+    full_statement = mm.labels[label]
+    assertion = full_statement.statement
+
+    builder = ClassBuilder(share_subterms=share_subterms, target=target)
+    builder.set_comment(mm.comments_by_label[label])
+    builder.set_statement_name(name)
+    builder.set_assertion(assertion)
+    if full_statement.statement_type == StatementType.provable:
+        with phase('verify'):
+            verify(frame_stack=mm.frame_contexts[label],
+                   labels=LabelsBefore(mm.labels, _POSITIONS, _POSITIONS[label]),
+                   target_statement=assertion.statement,
+                   proof=mm.proofs[label],
+                   builder=builder)
+    with phase('build'):
+        result = builder.build()
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.record_theorem(name, time.perf_counter() - started)
+    return result
+
+
+def verify_label(name: str) -> VerificationResult:
+    """Check the proof of one $p of the shared table, see :func:`check_theorem`."""
+    mm = _TABLE
+    label = Label(name)
+    return check_theorem(label,
+                         frame_stack=mm.frame_contexts[label],
+                         labels=LabelsBefore(mm.labels, _POSITIONS, _POSITIONS[label]),
+                         target_statement=mm.labels[label].statement.statement,
+                         proof=mm.proofs[label])
+
+
+def assertion_names(mm: MM) -> List[str]:
+    return [label.name for label, full_statement in mm.labels.items()
+            if full_statement.statement_type in {StatementType.assertion, StatementType.provable}]
+
+
+def provable_names(mm: MM) -> List[str]:
+    return [label.name for label, full_statement in mm.labels.items()
+            if full_statement.statement_type == StatementType.provable]
+
+
+def _executor(jobs: int, source_path: Optional[str], snapshot_path: Optional[str]) -> ProcessPoolExecutor:
+    """A pool whose workers see the shared table: inherited with ``fork``, loaded from the snapshot otherwise."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork'))
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_load_table, initargs=(snapshot_path, source_path))
+
+
+def load_database(source_path: str, snapshot_path: Optional[str] = None) -> MM:
+    """Phase one: parse the database, or reuse (and refresh) its snapshot when ``snapshot_path`` is given."""
+    if snapshot_path is not None:
+        return MM.from_database(source_path, snapshot_path)
+    mm = MM()
+    with Toks(source_path) as toks:
+        mm.parse(toks)
+    return mm
+
+
+def translate_parsed(mm: MM,
+                     names: List[str],
+                     jobs: Optional[int] = None,
+                     source_path: Optional[str] = None,
+                     snapshot_path: Optional[str] = None,
+                     chunksize: int = 32,
+                     share_subterms: bool = False,
+                     target: ProofTarget = ProofTarget.strings) -> Iterator[Dict[str, str]]:
+    """Phase two: yield the translation of the assertions ``names`` of a parsed database, in that order.
+
+    Without ``fork``, the workers load ``snapshot_path`` (written for ``source_path``).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    _register_names(mm)
+    _share_table(mm)
+    translate = partial(translate_label, share_subterms=share_subterms, target=target)
+
+    if jobs == 1:
+        for name in names:
+            yield translate(name)
+        return
+
+    with _executor(jobs, source_path, snapshot_path) as executor:
+        yield from executor.map(translate, names, chunksize=chunksize)
+
+
+def translate_database(source_path: str,
+                       jobs: Optional[int] = None,
+                       snapshot_path: Optional[str] = None,
+                       chunksize: int = 32,
+                       share_subterms: bool = False,
+                       target: ProofTarget = ProofTarget.strings) -> Iterator[Dict[str, str]]:
+    """Yield the :meth:`ClassBuilder.build` result of every $a/$p of the database in file order.
+
+    ``jobs`` is the number of worker processes (all cores by default); with ``jobs=1``
+    this is the sequential :meth:`MM.read`. When ``snapshot_path`` is given, phase
+    one reuses (or refreshes) that snapshot instead of parsing the file again.
+    ``share_subterms`` and ``target`` are passed on to :class:`ClassBuilder`.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 and snapshot_path is None:
+        with Toks(source_path) as toks:
+            yield from MM().read(toks, share_subterms=share_subterms, target=target)
+        return
+
+    if snapshot_path is None and 'fork' not in multiprocessing.get_all_start_methods():
+        snapshot_path = f'{source_path}.snapshot'
+    mm = load_database(source_path, snapshot_path)
+    yield from translate_parsed(mm, assertion_names(mm), jobs=jobs, source_path=source_path,
+                                snapshot_path=snapshot_path, chunksize=chunksize, share_subterms=share_subterms,
+                                target=target)
+
+
+def verify_parsed(mm: MM,
+                  names: List[str],
+                  jobs: Optional[int] = None,
+                  source_path: Optional[str] = None,
+                  snapshot_path: Optional[str] = None,
+                  chunksize: int = 256) -> Iterator[VerificationResult]:
+    """Check the proofs of the $p statements ``names`` of a parsed database, yielding the results in that order."""
+    jobs = jobs or os.cpu_count() or 1
+    _share_table(mm)
+    profiler = active_profiler()
+    if jobs == 1:
+        yield from _recorded(map(verify_label, names), profiler)
+        return
+    with _executor(jobs, source_path, snapshot_path) as executor:
+        yield from _recorded(executor.map(verify_label, names, chunksize=chunksize), profiler)
+
+
+def _recorded(results: Iterator[VerificationResult], profiler) -> Iterator[VerificationResult]:
+    for result in results:
+        if profiler is not None:
+            profiler.record_theorem(result.label, result.seconds)
+        yield result
+
+
+def verify_database(source_path: str,
+                    jobs: Optional[int] = None,
+                    snapshot_path: Optional[str] = None,
+                    chunksize: int = 256) -> Iterator[VerificationResult]:
+    """Yield a :class:`VerificationResult` for every $p of the database in file order.
+
+    The database is parsed once and the proofs are then checked by ``jobs`` worker
+    processes; with ``jobs=1`` (and no snapshot) this is ``MM.read(toks, verify_only=True)``.
+    A failing proof is reported and does not stop the run.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 and snapshot_path is None:
+        with Toks(source_path) as toks:
+            yield from MM().read(toks, verify_only=True)
+        return
+
+    if snapshot_path is None and 'fork' not in multiprocessing.get_all_start_methods():
+        snapshot_path = f'{source_path}.snapshot'
+    mm = load_database(source_path, snapshot_path)
+    yield from verify_parsed(mm, provable_names(mm), jobs=jobs, source_path=source_path,
+                             snapshot_path=snapshot_path, chunksize=chunksize)
+
+
+def translate_incrementally(source_path: str,
+                            manifest_path: str,
+                            jobs: Optional[int] = None,
+                            snapshot_path: Optional[str] = None,
+                            chunksize: int = 32,
+                            share_subterms: bool = False,
+                            target: ProofTarget = ProofTarget.strings) -> Tuple[ManifestDiff, Iterator[Dict[str, str]]]:
+    """Translate only what changed since the run that wrote ``manifest_path``.
+
+    Returns the comparison with the previous manifest and an iterator over the
+    translations of its ``to_translate`` labels, in file order. Once the iterator is
+    exhausted, the manifest is replaced by the one of the current database. A run
+    with other ``share_subterms`` or ``target`` than the previous one translates
+    everything again.
+    """
+    if snapshot_path is None and 'fork' not in multiprocessing.get_all_start_methods():
+        snapshot_path = f'{source_path}.snapshot'
+    mm = load_database(source_path, snapshot_path)
+    options = {'share_subterms': share_subterms, 'target': str(target)}
+    current = fingerprint_database(mm, options)
+    diff = diff_manifests(load_manifest(manifest_path), current)
+
+    def translations() -> Iterator[Dict[str, str]]:
+        yield from translate_parsed(mm, diff.to_translate, jobs=jobs, source_path=source_path,
+                                    snapshot_path=snapshot_path, chunksize=chunksize, share_subterms=share_subterms,
+                                    target=target)
+        write_manifest(manifest_path, source_path, current, options)
+
+    return diff, translations()
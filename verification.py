@@ -21,14 +21,23 @@ results and present detailed feedback to users.
 """
 from __future__ import annotations
 
+import ast
+import builtins
+import copy
+import hashlib
 import importlib
 import importlib.util
+import keyword
 import os
+import re
 import sys
 import traceback
-from dataclasses import dataclass
-from types import ModuleType
-from typing import Iterable, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import CodeType, FunctionType, ModuleType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from strenum import StrEnum
 
@@ -71,6 +80,27 @@ class ProofCheckResult:
     traceback: Optional[str] = None
 
 
+@dataclass
+class StepCheckResult:
+    """Result of executing a proof one statement of its ``proof`` method at a time.
+
+    ``values`` holds the value of every step variable (``x_N``) assigned before the
+    first failing step; ``reused_steps`` of the steps were not executed because
+    the state after them was found in :data:`step_cache`.
+    """
+
+    statement_name: str
+    success: bool
+    stage: ProofCheckStage
+    total_steps: int = 0
+    valid_steps: int = 0
+    first_failing_step: Optional[int] = None
+    values: Dict[str, Any] = field(default_factory=dict)
+    reused_steps: int = 0
+    error_message: Optional[str] = None
+    traceback: Optional[str] = None
+
+
 def _format_traceback(exc: BaseException) -> str:
     return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
 
@@ -103,8 +133,172 @@ def _ensure_namespace(package: str, path: str) -> None:
             setattr(parent_module, child_name, module)
 
 
-def _load_module_from_path(module_name: str, file_path: str) -> ModuleType:
-    """Load ``module_name`` from ``file_path`` and register it in ``sys.modules``."""
+@dataclass
+class _CachedModule:
+    path: str
+    signature: Tuple[int, int]  # (st_mtime_ns, st_size) when the digest was computed
+    digest: bytes
+    module: ModuleType
+    dependencies: Dict[str, Optional[bytes]]  # digest of every module it imported when it was executed
+
+
+class ModuleCache:
+    """Modules executed by the verifier, kept while the content of their file is unchanged.
+
+    A module is loaded again only when the hash of its source changed, or when a
+    module it imported was loaded again since; the hash is only recomputed when the
+    modification time or size of the file changed. At most
+    ``max_modules`` modules are kept: the least recently used ones are evicted and
+    removed from ``sys.modules``.
+    """
+
+    def __init__(self, max_modules: int = 100_000) -> None:
+        self.max_modules = max_modules
+        self._entries: OrderedDict[str, _CachedModule] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, module_name: str, file_path: str, dependencies: Iterable[str] = ()) -> ModuleType:
+        """Return the module of ``file_path``, executing it unless the cached one is current.
+
+        ``dependencies`` are the names of the cached modules it imports.
+        """
+
+        normalized_path = os.path.abspath(os.fspath(file_path))
+        try:
+            stat = os.stat(normalized_path)
+        except FileNotFoundError:
+            raise ModuleNotFoundError(f"Cannot find module file: {normalized_path}") from None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        dependency_digests = {name: self.digest(name) for name in dependencies}
+
+        source = None
+        entry = self._entries.get(module_name)
+        if (
+            entry is not None
+            and entry.path == normalized_path
+            and sys.modules.get(module_name) is entry.module
+            and entry.dependencies == dependency_digests
+        ):
+            if entry.signature != signature:
+                source = _read_source(normalized_path)
+                if hashlib.blake2b(source).digest() == entry.digest:
+                    entry.signature = signature
+            if entry.signature == signature:
+                self.hits += 1
+                self._entries.move_to_end(module_name)
+                return entry.module
+
+        self.misses += 1
+        if source is None:
+            source = _read_source(normalized_path)
+        reloaded = self._entries.pop(module_name, None) is not None
+        # an edit may keep the mtime and size that __pycache__ checks, so a reload executes the hashed source
+        module = _load_module_from_path(module_name, normalized_path, source if reloaded else None)
+        self._entries[module_name] = _CachedModule(normalized_path, signature, hashlib.blake2b(source).digest(), module,
+                                                   dependency_digests)
+        while len(self._entries) > self.max_modules:
+            evicted_name, evicted = self._entries.popitem(last=False)
+            if sys.modules.get(evicted_name) is evicted.module:
+                del sys.modules[evicted_name]
+            self.evictions += 1
+        return module
+
+    def digest(self, module_name: str) -> Optional[bytes]:
+        """Hash of the source the cached ``module_name`` was executed from, if it is cached."""
+        entry = self._entries.get(module_name)
+        return entry.digest if entry is not None else None
+
+    def discard(self, module_name: str) -> None:
+        entry = self._entries.pop(module_name, None)
+        if entry is not None and sys.modules.get(module_name) is entry.module:
+            del sys.modules[module_name]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "modules": len(self._entries),
+        }
+
+    def clear(self) -> None:
+        for module_name in list(self._entries):
+            self.discard(module_name)
+
+
+module_cache = ModuleCache()
+
+
+class StepCache:
+    """States of stepwise proof executions, keyed by the hash of the executed step prefix.
+
+    A state is the step variables of a proof after the prefix. At most
+    ``max_states`` states are kept, the least recently used ones are dropped.
+    """
+
+    def __init__(self, max_states: int = 10_000) -> None:
+        self.max_states = max_states
+        self._states: OrderedDict[bytes, Dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def longest_prefix(self, keys: List[bytes]) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Return the length of the longest prefix with a stored state among ``keys`` and that state."""
+        for length in range(len(keys), 0, -1):
+            state = self._states.get(keys[length - 1])
+            if state is not None:
+                self.hits += 1
+                self._states.move_to_end(keys[length - 1])
+                return length, state
+        self.misses += 1
+        return 0, None
+
+    def put(self, key: bytes, variables: Dict[str, Any]) -> None:
+        self._states[key] = dict(variables)
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_states:
+            self._states.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "states": len(self._states)}
+
+    def clear(self) -> None:
+        self._states.clear()
+
+
+step_cache = StepCache()
+
+_CLASS_IMPORT = re.compile(rb"^from[ \t]+([\w.]+)[ \t]+import", re.MULTILINE)
+
+
+def _read_source(file_path: str) -> bytes:
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def imported_classes(source: bytes) -> List[str]:
+    """Names of the modules of ``metamath2py.classes`` that a generated module with ``source`` imports."""
+
+    prefix = _DEFAULT_CLASSES_PACKAGE + "."
+    names = []
+    for match in _CLASS_IMPORT.finditer(source):
+        module_name = match.group(1).decode()
+        if module_name.startswith(prefix):
+            names.append(module_name[len(prefix):])
+    return names
+
+
+def _imported_classes(proof_path: str) -> List[str]:
+    return imported_classes(_read_source(proof_path))
+
+
+def _load_module_from_path(module_name: str, file_path: str, source: Optional[bytes] = None) -> ModuleType:
+    """Load ``module_name`` from ``file_path`` and register it in ``sys.modules``.
+
+    When ``source`` is given, it is executed instead of the file, bypassing ``__pycache__``.
+    """
 
     normalized_path = os.path.abspath(os.fspath(file_path))
 
@@ -122,7 +316,10 @@ def _load_module_from_path(module_name: str, file_path: str) -> ModuleType:
     sys.modules[module_name] = module
 
     try:
-        spec.loader.exec_module(module)
+        if source is None:
+            spec.loader.exec_module(module)
+        else:
+            exec(compile(source, normalized_path, "exec", dont_inherit=True), module.__dict__)
     except Exception:
         sys.modules.pop(module_name, None)
         raise
@@ -153,12 +350,14 @@ def _verify_proof_at(
             traceback=_format_traceback(exc),
         )
 
-    class_module_name = f"{_DEFAULT_CLASSES_PACKAGE}.{statement_name}"
-    class_path = os.path.join(_DEFAULT_CLASSES_ROOT, *statement_name.split(".")) + ".py"
+    proof_path = os.path.join(trimmed_root, *statement_name.split(".")) + ".py"
 
     try:
-        if os.path.isfile(class_path):
-            _load_module_from_path(class_module_name, class_path)
+        # the classes the proof imports are refreshed first, so that its imports find current modules
+        class_names = [statement_name]
+        if os.path.isfile(proof_path):
+            class_names += _imported_classes(proof_path)
+        class_modules = _load_classes(class_names)
     except Exception as exc:  # noqa: BLE001
         return ProofCheckResult(
             statement_name=statement_name,
@@ -168,10 +367,9 @@ def _verify_proof_at(
             traceback=_format_traceback(exc),
         )
 
-    proof_path = os.path.join(trimmed_root, *statement_name.split(".")) + ".py"
-
     try:
-        module = _load_module_from_path(module_name, proof_path)
+        # a proof module loaded before holds the classes of that time, so it is reloaded once any was replaced
+        module = module_cache.load(module_name, proof_path, class_modules)
     except Exception as exc:  # noqa: BLE001
         return ProofCheckResult(
             statement_name=statement_name,
@@ -181,6 +379,27 @@ def _verify_proof_at(
             traceback=_format_traceback(exc),
         )
 
+    return _run_proof(statement_name, module)
+
+
+def _load_classes(class_names: Iterable[str]) -> List[str]:
+    """Load the existing modules of ``metamath2py.classes`` named ``class_names`` through the module cache.
+
+    Return the names of the loaded modules.
+    """
+
+    module_names = []
+    for class_name in dict.fromkeys(class_names):
+        class_path = os.path.join(_DEFAULT_CLASSES_ROOT, *class_name.split(".")) + ".py"
+        if os.path.isfile(class_path):
+            module_names.append(f"{_DEFAULT_CLASSES_PACKAGE}.{class_name}")
+            module_cache.load(module_names[-1], class_path)
+    return module_names
+
+
+def _run_proof(statement_name: str, module: ModuleType) -> ProofCheckResult:
+    """Find the ``<name>_proof`` class of an imported proof module, construct it and execute its ``proof`` method."""
+
     factory_name = f"{statement_name.split('.')[-1]}_proof"
     try:
         factory = getattr(module, factory_name)
@@ -228,6 +447,69 @@ def verify_proof(statement_name: str) -> ProofCheckResult:
     )
 
 
+@lru_cache(maxsize=1024)
+def _compile_source(source: str, filename: str) -> CodeType:
+    # every search node of a theorem renders the same class source
+    return compile(source, filename, "exec", dont_inherit=True)
+
+
+def _in_memory_module(module_name: str, source: str, module_builtins: Optional[dict] = None) -> ModuleType:
+    module = ModuleType(module_name)
+    module.__file__ = f"<{module_name}>"
+    if module_builtins is not None:
+        module.__builtins__ = module_builtins  # type: ignore[attr-defined]
+    exec(_compile_source(source, module.__file__), module.__dict__)
+    return module
+
+
+def _builtins_importing(class_module: ModuleType) -> dict:
+    """Builtins whose ``__import__`` resolves the name of ``class_module`` to it instead of ``sys.modules``."""
+
+    def import_module(name, globals=None, locals=None, fromlist=(), level=0):
+        if name == class_module.__name__ and level == 0 and fromlist:
+            return class_module
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+    return dict(builtins.__dict__, __import__=import_module)
+
+
+def _load_source_dependencies(class_source: str, proof_source: str, label: str) -> None:
+    """Load the classes other than ``label`` that the sources import through :data:`module_cache`."""
+
+    _ensure_namespace(_DEFAULT_CLASSES_PACKAGE, _DEFAULT_CLASSES_ROOT)
+    dependencies = imported_classes(class_source.encode("utf-8")) + imported_classes(proof_source.encode("utf-8"))
+    _load_classes(name for name in dependencies if name != label)
+
+
+def verify_sources(class_source: str, proof_source: str, label: str) -> ProofCheckResult:
+    """Verify the class and proof modules of ``label`` given as sources, without writing them anywhere.
+
+    Both modules are executed in fresh namespaces that are not registered in
+    ``sys.modules``: the proof's import of ``metamath2py.classes.<label>`` gets the
+    class module built from ``class_source``, so a module of the same name in the
+    classes folder is neither used nor replaced. The other classes imported by the
+    sources are loaded from the classes folder through :data:`module_cache`. The
+    result has the stages of :func:`verify_proof`; a source that does not compile
+    or execute fails at ``IMPORT``.
+    """
+
+    try:
+        _load_source_dependencies(class_source, proof_source, label)
+        class_module = _in_memory_module(f"{_DEFAULT_CLASSES_PACKAGE}.{label}", class_source)
+        proof_module = _in_memory_module(
+            f"{_DEFAULT_PROOFS_PACKAGE}.{label}", proof_source, _builtins_importing(class_module))
+    except Exception as exc:  # noqa: BLE001
+        return ProofCheckResult(
+            statement_name=label,
+            success=False,
+            stage=ProofCheckStage.IMPORT,
+            error_message=str(exc),
+            traceback=_format_traceback(exc),
+        )
+
+    return _run_proof(label, proof_module)
+
+
 def iter_statement_names(root_path: Optional[str] = None) -> Iterable[str]:
     """Yield module names relative to ``package`` for every ``.py`` file.
 
@@ -268,3 +550,237 @@ def verify_all_proofs() -> List[ProofCheckResult]:
             )
         )
     return results
+
+
+def _verify_batch(statement_names: List[str]) -> List[ProofCheckResult]:
+    return [verify_proof(statement_name) for statement_name in statement_names]
+
+
+def verify_proofs(
+    statement_names: Iterable[str],
+    jobs: int = 1,
+    chunksize: int = 64,
+) -> Iterator[ProofCheckResult]:
+    """Verify the default ``metamath2py`` proofs ``statement_names`` in ``jobs`` worker processes.
+
+    The names are sent to the workers in batches of ``chunksize`` and the results of
+    a batch are yielded as soon as it is done, so they arrive in completion order
+    rather than in the order of ``statement_names``. Every worker keeps the class
+    modules it imported for the following batches. With ``jobs=1`` the proofs are
+    verified in this process, in order.
+    """
+
+    if jobs == 1:
+        for statement_name in statement_names:
+            yield verify_proof(statement_name)
+        return
+
+    names = list(statement_names)
+    batches = [names[start:start + chunksize] for start in range(0, len(names), chunksize)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_verify_batch, batch) for batch in batches]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            # a consumer that stops early does not wait for the remaining batches
+            for future in futures:
+                future.cancel()
+
+
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+
+_BODY_INDENT = " " * 8
+
+
+@lru_cache(maxsize=100_000)
+def _step_names(step_source: str) -> Tuple[str, ...]:
+    # a name inside a string literal at worst adds a class that the step does not call
+    return tuple(sorted(set(_IDENTIFIER.findall(step_source))))
+
+
+def _block(lineno: int, step_source: str) -> str:
+    """``step_source``, indented as in the proof method, made the body of a function ``_step(_continue)``.
+
+    The names of the step are declared global, so its assignments go to the namespace
+    the function is run in. The function returns ``_continue`` unless the step
+    returns, and its code keeps the line numbers of the proof.
+    """
+
+    names = [name for name in _step_names(step_source) if not keyword.iskeyword(name) and name != "_continue"]
+    declaration = f"    global {', '.join(names)}\n" if names else "    pass\n"
+    return ("\n" * max(lineno - 4, 0) + "def _step(_continue):\n" + declaration + "    if 1:\n" + step_source
+            + "\n    return _continue\n")
+
+
+@lru_cache(maxsize=100_000)
+def _step_code(lineno: int, step_source: str, filename: str) -> CodeType:
+    module_code = compile(_block(lineno, step_source), filename, "exec", dont_inherit=True)
+    return next(constant for constant in module_code.co_consts if isinstance(constant, CodeType))
+
+
+_CONTINUE = object()
+
+
+def _split_proof_lines(proof_source: str, label: str,
+                       filename: str) -> Optional[Tuple[str, str, List[Tuple[int, str]]]]:
+    """Split a proof module laid out like the generated ones without parsing it as a whole.
+
+    Return the module without the ``proof`` method of ``<label>_proof``, the source
+    of that class without it, and the first line and source of every statement of
+    the method; or ``None`` for any other layout.
+    """
+
+    lines = proof_source.splitlines()
+    class_index = next((index for index, line in enumerate(lines) if line.startswith(f"class {label}_proof(")), None)
+    if class_index is None or lines[class_index + 1:class_index + 2] != ["    def proof(self):"]:
+        return None
+    body = "\n".join(lines[class_index + 2:])
+    if '"""' in body or "'''" in body:
+        # a line of a multi-line string would be taken for a step
+        return None
+
+    steps: List[Tuple[int, List[str]]] = []
+    for index in range(class_index + 2, len(lines)):
+        line = lines[index]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if not line.startswith(_BODY_INDENT):
+            return None
+        if line[len(_BODY_INDENT)] not in " \t":
+            steps.append((index + 1, [line]))
+        elif steps:
+            steps[-1][1].append(line)
+        else:
+            return None
+    step_sources = [(lineno, "\n".join(step_lines)) for lineno, step_lines in steps]
+    try:
+        for lineno, step_source in step_sources:
+            _step_code(lineno, step_source, filename)
+    except SyntaxError:
+        return None
+    proof_class = lines[class_index] + "\n    pass"
+    return "\n".join(lines[:class_index]) + "\n" + proof_class, proof_class, step_sources
+
+
+def _split_proof_tree(proof_source: str, label: str,
+                      filename: str) -> Tuple[ast.Module, str, List[Tuple[int, str]]]:
+    """Split any proof module like :func:`_split_proof_lines`."""
+
+    lines = proof_source.splitlines()
+    header = []
+    proof_class = None
+    steps: Optional[List[ast.stmt]] = None
+    for node in ast.parse(proof_source, filename).body:
+        if isinstance(node, ast.ClassDef) and node.name == f"{label}_proof":
+            proof_class = copy.copy(node)
+            proof_class.body = []
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "proof":
+                    steps = item.body
+                else:
+                    proof_class.body.append(item)
+            if not proof_class.body:
+                proof_class.body.append(ast.Pass(lineno=node.lineno, col_offset=node.col_offset))
+            node = proof_class
+        header.append(node)
+    if steps is None:
+        raise AttributeError(f"proof module of {label} has no {label}_proof class with a proof method")
+    return ast.Module(header, type_ignores=[]), ast.unparse(proof_class), [
+        (step.lineno, "\n".join(lines[step.lineno - 1:step.end_lineno])) for step in steps]
+
+
+def _step_failure(label: str, stage: ProofCheckStage, exc: BaseException, **fields: Any) -> StepCheckResult:
+    return StepCheckResult(
+        statement_name=label,
+        success=False,
+        stage=stage,
+        error_message=str(exc),
+        traceback=_format_traceback(exc),
+        **fields,
+    )
+
+
+def verify_steps(class_source: str, proof_source: str, label: str) -> StepCheckResult:
+    """Verify sources like :func:`verify_sources`, one statement of the ``proof`` method at a time.
+
+    Every statement of ``<label>_proof.proof`` is a step. The steps are executed in
+    order until one raises; its index is ``first_failing_step`` and the steps before
+    it are the ``valid_steps``. A step that returns ends the proof successfully. The
+    step variables after every executed step are stored in :data:`step_cache` under
+    a hash of the class source, of the steps so far and of the source of every class
+    they call, so a proof that extends a verified one (whatever else it imports) only
+    executes the new steps.
+    """
+
+    filename = f"<{_DEFAULT_PROOFS_PACKAGE}.{label}>"
+    try:
+        # a search node usually extends its parent by a line, so only the new lines are parsed
+        header, proof_class, steps = (_split_proof_lines(proof_source, label, filename)
+                                      or _split_proof_tree(proof_source, label, filename))
+    except SyntaxError as exc:
+        return _step_failure(label, ProofCheckStage.IMPORT, exc)
+    except AttributeError as exc:
+        return _step_failure(label, ProofCheckStage.LOOKUP, exc)
+
+    try:
+        _load_source_dependencies(class_source, proof_source, label)
+        class_module = _in_memory_module(f"{_DEFAULT_CLASSES_PACKAGE}.{label}", class_source)
+        namespace = {"__name__": f"{_DEFAULT_PROOFS_PACKAGE}.{label}", "__file__": filename,
+                     "__builtins__": _builtins_importing(class_module)}
+        header_code = _compile_source(header, filename) if isinstance(header, str) else compile(
+            header, filename, "exec", dont_inherit=True)
+        exec(header_code, namespace)
+    except Exception as exc:  # noqa: BLE001
+        return _step_failure(label, ProofCheckStage.IMPORT, exc, total_steps=len(steps))
+    try:
+        factory = namespace[f"{label}_proof"]
+    except KeyError as exc:
+        return _step_failure(label, ProofCheckStage.LOOKUP, exc, total_steps=len(steps))
+    try:
+        instance = factory()
+    except Exception as exc:  # noqa: BLE001
+        return _step_failure(label, ProofCheckStage.CONSTRUCTION, exc, total_steps=len(steps))
+
+    digest = hashlib.blake2b(class_source.encode("utf-8") + b"\0" + proof_class.encode("utf-8") + b"\0")
+    prefix_keys = []
+    for _, step_source in steps:
+        digest.update(step_source.encode("utf-8") + b"\0")
+        for name in _step_names(step_source):
+            module_name = getattr(namespace.get(name), "__module__", None)
+            if module_name and module_name != class_module.__name__:
+                digest.update(f"{name} {module_name}".encode("utf-8"))
+                digest.update(module_cache.digest(module_name) or b"-")
+        prefix_keys.append(digest.copy().digest())
+
+    # the steps run in one namespace, so comprehensions and lambdas in a step see the earlier
+    # step variables, as the closures of the proof method do
+    resumed, variables = step_cache.longest_prefix(prefix_keys)
+    scope = dict(namespace, **(variables or {}))
+    scope["self"] = instance
+    for index in range(resumed, len(steps)):
+        try:
+            returned = FunctionType(_step_code(*steps[index], filename), scope)(_CONTINUE)
+        except Exception as exc:  # noqa: BLE001
+            return _step_failure(label, ProofCheckStage.EXECUTION, exc, total_steps=len(steps), valid_steps=index,
+                                 first_failing_step=index, values=_step_values(scope, namespace),
+                                 reused_steps=resumed)
+        if returned is not _CONTINUE:
+            # the following steps are never executed by the proof method either
+            break
+        step_cache.put(prefix_keys[index], _step_values(scope, namespace))
+
+    return StepCheckResult(statement_name=label, success=True, stage=ProofCheckStage.SUCCESS,
+                           total_steps=len(steps), valid_steps=len(steps), values=_step_values(scope, namespace),
+                           reused_steps=resumed)
+
+
+_MISSING = object()
+
+
+def _step_values(scope: dict, namespace: dict) -> Dict[str, Any]:
+    """The variables the steps assigned in ``scope``, leaving out the module names of ``namespace`` and ``self``."""
+    return {name: value for name, value in scope.items()
+            if name != "self" and namespace.get(name, _MISSING) is not value}
@@ -0,0 +1,136 @@
+"""Results of verified proofs, kept to re-verify only the proofs whose modules changed.
+
+The result of a proof depends on the source of its module and on the source of
+every module of ``metamath2py.classes`` it imports, directly or through the
+classes themselves (which import the substitution helper). The fingerprint of a
+statement hashes exactly these files, so:
+
+* editing a proof only invalidates that proof;
+* editing a class invalidates every proof importing it;
+* editing the substitution helper invalidates every proof.
+
+The store is an SQLite file that maps each statement to the fingerprint it was
+verified with and its :class:`ProofCheckResult`.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+from models.errors import VerificationStoreFormatError
+from verification import ProofCheckResult, ProofCheckStage, imported_classes
+
+STORE_VERSION = 1
+
+_CREATE_RESULTS = '''
+CREATE TABLE IF NOT EXISTS results (
+    statement_name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    error_message TEXT,
+    traceback TEXT
+)
+'''
+
+
+class DependencyFingerprints:
+    """Fingerprints of the statements of a proofs folder and its classes folder.
+
+    Every file is read and hashed once, however many proofs import it.
+    """
+
+    def __init__(self, proofs_root: str, classes_root: str) -> None:
+        self.proofs_root = proofs_root
+        self.classes_root = classes_root
+        self._classes: Dict[str, Optional[tuple]] = {}  # class name -> (digest, imported class names)
+
+    def fingerprint(self, statement_name: str) -> str:
+        proof_path = os.path.join(self.proofs_root, *statement_name.split('.')) + '.py'
+        digest = hashlib.sha256(f'{STORE_VERSION} {statement_name}\0'.encode('utf-8'))
+        try:
+            with open(proof_path, 'rb') as file:
+                source = file.read()
+        except FileNotFoundError:
+            source = b''
+        digest.update(hashlib.sha256(source).digest())
+
+        # the classes imported by the proof and by those classes, in a stable order
+        pending = [statement_name, *imported_classes(source)]
+        seen = set()
+        while pending:
+            class_name = pending.pop()
+            if class_name in seen:
+                continue
+            seen.add(class_name)
+            entry = self._class(class_name)
+            if entry is not None:
+                pending.extend(entry[1])
+        for class_name in sorted(seen):
+            entry = self._class(class_name)
+            digest.update(f'{class_name} '.encode('utf-8'))
+            digest.update(entry[0] if entry is not None else b'-')
+        return digest.hexdigest()
+
+    def _class(self, class_name: str) -> Optional[tuple]:
+        if class_name not in self._classes:
+            class_path = os.path.join(self.classes_root, *class_name.split('.')) + '.py'
+            try:
+                with open(class_path, 'rb') as file:
+                    source = file.read()
+            except FileNotFoundError:
+                self._classes[class_name] = None
+            else:
+                self._classes[class_name] = (hashlib.sha256(source).digest(), imported_classes(source))
+        return self._classes[class_name]
+
+
+class VerificationStore:
+    """The results of the last verification of every statement, with the fingerprint they were obtained with.
+
+    A store written by another version of this module is emptied, since its
+    results are only a cache.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        try:
+            version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+            if version != STORE_VERSION:
+                self._connection.execute('DROP TABLE IF EXISTS results')
+                self._connection.execute(f'PRAGMA user_version = {STORE_VERSION}')
+            self._connection.execute(_CREATE_RESULTS)
+            self._connection.commit()
+        except sqlite3.DatabaseError as exc:
+            self._connection.close()
+            raise VerificationStoreFormatError(path, str(exc))
+
+    def lookup(self, fingerprints: Dict[str, str]) -> Dict[str, ProofCheckResult]:
+        """Return the stored results of the statements whose fingerprint is still the one they were verified with."""
+        results = {}
+        rows = self._connection.execute(
+            'SELECT statement_name, fingerprint, success, stage, error_message, traceback FROM results')
+        for statement_name, fingerprint, success, stage, error_message, traceback in rows:
+            if fingerprints.get(statement_name) == fingerprint:
+                results[statement_name] = ProofCheckResult(statement_name, bool(success), ProofCheckStage(stage),
+                                                           error_message, traceback)
+        return results
+
+    def record(self, results: Iterable[ProofCheckResult], fingerprints: Dict[str, str]) -> None:
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+            ((result.statement_name, fingerprints[result.statement_name], int(result.success), str(result.stage),
+              result.error_message, result.traceback) for result in results))
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'VerificationStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,29 +1,101 @@
+import argparse
+import dataclasses
+import json
 import os
-from pathlib import Path
+import time
+from collections import Counter
 
 from tqdm import tqdm
 
-from paths import proofs_folder_path
+from paths import classes_folder_path, mmverify_output_folder, proofs_folder_path
 
-from verification import iter_statement_names, verify_proof
+from verification import iter_statement_names, verify_proofs
+from verification_store import DependencyFingerprints, VerificationStore
+
+
+def summarize(results, elapsed: float, reused: int = 0) -> dict:
+    """Totals, failures per stage and the failing statements of a verification run.
+
+    ``reused`` of the results were taken from the store instead of being verified again.
+    """
+    failures = [result for result in results if not result.success]
+    return {
+        "total": len(results),
+        "passed": len(results) - len(failures),
+        "failed": len(failures),
+        "reused": reused,
+        "seconds": elapsed,
+        "failures_by_stage": dict(Counter(str(result.stage) for result in failures)),
+        "failures": [{"statement_name": result.statement_name, "stage": str(result.stage),
+                      "error_message": result.error_message}
+                     for result in sorted(failures, key=lambda result: result.statement_name)],
+    }
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Verify every generated proof of the metamath2py folders")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes; the proofs are sent to them in batches of --chunksize.")
+    parser.add_argument("--chunksize", type=int, default=64, help="Proofs per batch sent to a worker.")
+    parser.add_argument("--report", default=None,
+                        help="Write one JSON line per proof (statement_name, success, stage, error_message, "
+                             "traceback) as the results arrive.")
+    parser.add_argument("--summary", default=None,
+                        help="Write the totals, the failures per stage and the failing proofs as JSON.")
+    parser.add_argument("--store", default=os.path.join(mmverify_output_folder, "verification_results.sqlite"),
+                        help="SQLite file keeping the result of every proof with the hashes of its module and of the "
+                             "classes it imports.")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Only verify the proofs whose module or imported classes changed since their result "
+                             "was stored; report the others from the store.")
+    args = parser.parse_args()
+
     if not os.path.isdir(proofs_folder_path):
         raise SystemExit(f"Proofs folder '{proofs_folder_path}' does not exist")
 
-    failures = []
-    for statement_name in tqdm(iter_statement_names(root_path=proofs_folder_path)):
-        result = verify_proof(statement_name=statement_name)
-        if not result.success:
-            failures.append(result)
-            print(f"\n[FAIL] {statement_name} ({result.stage})")
-            if result.error_message:
-                print(result.error_message)
-            if result.traceback:
-                print(result.traceback)
-
-    if not failures:
+    started = time.perf_counter()
+    statement_names = list(iter_statement_names(root_path=proofs_folder_path))
+    dependencies = DependencyFingerprints(proofs_folder_path, classes_folder_path)
+    fingerprints = {statement_name: dependencies.fingerprint(statement_name) for statement_name in statement_names}
+    store = VerificationStore(args.store)
+    reused = store.lookup(fingerprints) if args.changed_only else {}
+    if reused:
+        print(f"{len(reused)} unchanged proofs are reported from {args.store}")
+    verified = []
+    report = open(args.report, 'w') if args.report else None
+    try:
+        pending = [statement_name for statement_name in statement_names if statement_name not in reused]
+        for result in tqdm(verify_proofs(pending, jobs=args.jobs, chunksize=args.chunksize), total=len(pending)):
+            verified.append(result)
+            if report:
+                report.write(json.dumps(dataclasses.asdict(result)) + '\n')
+            if not result.success:
+                print(f"\n[FAIL] {result.statement_name} ({result.stage})")
+                if result.error_message:
+                    print(result.error_message)
+                if result.traceback:
+                    print(result.traceback)
+        if report:
+            for result in reused.values():
+                report.write(json.dumps(dataclasses.asdict(result)) + '\n')
+    finally:
+        if report:
+            report.close()
+        # an interrupted run keeps what it verified
+        store.record(verified, fingerprints)
+        store.close()
+
+    summary = summarize(verified + list(reused.values()), time.perf_counter() - started, reused=len(reused))
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    print(f"{summary['total']} proofs verified in {summary['seconds']:.2f}s"
+          + (f" ({summary['reused']} reported from the store)" if summary['reused'] else ""))
+    if not summary['failed']:
         print("All proofs succeeded")
     else:
-        print(f"Total failing proofs: {len(failures)}")
+        for stage, count in summary['failures_by_stage'].items():
+            print(f"  {stage}: {count}")
+        print(f"Total failing proofs: {summary['failed']}")
+        raise SystemExit(1)
@@ -0,0 +1,46 @@
+import argparse
+import dataclasses
+import json
+import time
+
+from models.instrumentation import PhaseProfiler, profiling
+from translation_pipeline import verify_database
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check every proof of a Metamath database without translating it")
+    parser.add_argument("database", help="Path of the .mm file")
+    parser.add_argument("--report", default=None, help="Write one JSON line per $p (label, passed, seconds, error).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes: the database is parsed once and the proofs are checked in parallel.")
+    parser.add_argument("--snapshot", default=None,
+                        help="Path of a parsed-database snapshot to reuse (it is rebuilt when stale).")
+    parser.add_argument("--slowest", type=int, default=10, help="How many of the slowest proofs to list.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    failures = []
+    checked = 0
+    report = open(args.report, 'w') if args.report else None
+    try:
+        with profiling(PhaseProfiler(slowest=args.slowest)) as profiler:
+            for result in verify_database(args.database, jobs=args.jobs, snapshot_path=args.snapshot):
+                checked += 1
+                if not result.passed:
+                    failures.append(result)
+                    print(f"[FAIL] {result.label}: {result.error}")
+                if report:
+                    report.write(json.dumps(dataclasses.asdict(result)) + '\n')
+    finally:
+        if report:
+            report.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{checked} proofs checked in {elapsed:.2f}s ({checked / elapsed:.0f} proofs/s)")
+    for entry in profiler.report()['slowest']:
+        print(f"  {entry['label']}: {entry['seconds']:.4f}s")
+    if not failures:
+        print("All proofs succeeded")
+    else:
+        print(f"Total failing proofs: {len(failures)}")
+        raise SystemExit(1)